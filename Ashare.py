@@ -1,30 +1,64 @@
 #-*- coding:utf-8 -*-    --------------Ashare 股票行情数据双核心版( https://github.com/mpquant/Ashare ) 
-import json,requests,datetime;      import pandas as pd  #
+import os,json,requests,datetime;      import numpy as np;   import pandas as pd  #
+import asyncio;   from itertools import chain;   from functools import partial;   from concurrent.futures import ThreadPoolExecutor;   from requests.adapters import HTTPAdapter
+from ashare_health import SourceRouter, SourceUnavailable
+
+#---共享连接池---  所有行情请求复用同一个Session(keep-alive), 避免每根K线请求都新建TCP连接
+SINA_URL='http://money.finance.sina.com.cn/quotes_service/api/json_v2.php/CN_MarketData.getKLineData'
+TX_DAY_URL='http://web.ifzq.gtimg.cn/appstock/app/fqkline/get'
+TX_MIN_URL='http://ifzq.gtimg.cn/appstock/app/kline/mkline'
+TIMEOUT=(3,10)            #(连接超时, 读取超时) 秒
+MAX_CONCURRENCY=32        #批量获取时的最大并发数 = 连接池大小
+_session=requests.Session();   _session.mount('http://',HTTPAdapter(pool_connections=8,pool_maxsize=MAX_CONCURRENCY))
+_executor=ThreadPoolExecutor(max_workers=MAX_CONCURRENCY,thread_name_prefix='ashare')
+try:    import orjson;   _loads=orjson.loads     #可选: 更快的JSON解码
+except ImportError:      _loads=json.loads
+
+def _http_get(URL):                                                       #统一的HTTP GET(连接池+超时)
+    r=_session.get(URL,timeout=TIMEOUT);   r.raise_for_status();   return r.content
+
+#---解析层---  JSON直接解码成扁平列表 → 一次float转换成二维数组, 时间直接解析成datetime64[ns], DataFrame只构造一次
+_SINA_FIELDS=('open','high','low','close','volume');   _TX_FIELDS=['open','close','high','low','volume']
+def _bars_frame(index, flat, columns):
+    values=np.array(flat,dtype=float).reshape(-1,len(columns))
+    df=pd.DataFrame(values,columns=columns,index=pd.DatetimeIndex(index),copy=False);   df.index.name='';   return df
+
+def _iso_times(times):  return np.array(times,dtype='datetime64[ns]')     #'2026-01-30' / '2026-01-30 10:00:00'
+
+def _compact_times(times):                                                #'yyyymmddHHMM' → datetime64: 日期去重后只解析几百个, 时分用整数运算
+    v=np.array(times,dtype=np.int64);   days,inv=np.unique(v//10000,return_inverse=True);   hm=v%10000
+    base=np.array([f'{d//10000}-{d//100%100:02d}-{d%100:02d}' for d in days.tolist()],dtype='datetime64[ns]')
+    return base[inv]+(hm//100*60+hm%100).astype('timedelta64[m]')
+
+def _parse_sina(content):                                                 #[{"day","open","high","low","close","volume",...},...]
+    dstr=_loads(content) or []
+    return _bars_frame(_iso_times([d['day'] for d in dstr]),[d[k] for d in dstr for k in _SINA_FIELDS],list(_SINA_FIELDS))
+
+def _parse_tx_day(content, code, unit):                                   #data[code]['qfqday']=[[time,open,close,high,low,volume,(分红信息)],...]
+    st=_loads(content);   ms='qfq'+unit;   stk=st['data'][code]
+    buf=stk[ms] if ms in stk else stk[unit]       #指数返回不是qfqday,是day
+    return _bars_frame(_iso_times([r[0] for r in buf]),list(chain.from_iterable(r[1:6] for r in buf)),_TX_FIELDS)
+
+def _parse_tx_min(content, code, ts):                                     #data[code]['m1']=[[yyyymmddHHMM,open,close,high,low,volume,n1,n2],...]
+    st=_loads(content);   buf=st['data'][code]['m'+str(ts)]
+    flat=list(chain.from_iterable(r[1:6] for r in buf))
+    if flat:  flat[-4]=st['data'][code]['qt'][code][3]                    #最新基金数据是3位的 (最后一根的close)
+    return _bars_frame(_compact_times([r[0] for r in buf]),flat,_TX_FIELDS)
 
 #---腾讯日线---  2025-12-21日正常使用
 def get_price_day_tx(code, end_date='', count=10, frequency='1d'):     #日线获取  
     unit='week' if frequency in '1w' else 'month' if frequency in '1M' else 'day'     #判断日线，周线，月线
     if end_date:  end_date=end_date.strftime('%Y-%m-%d') if isinstance(end_date,datetime.date) else end_date.split(' ')[0]
     end_date='' if end_date==datetime.datetime.now().strftime('%Y-%m-%d') else end_date   #如果日期今天就变成空    
-    URL=f'http://web.ifzq.gtimg.cn/appstock/app/fqkline/get?param={code},{unit},,{end_date},{count},qfq'     
-    st= json.loads(requests.get(URL).content);    ms='qfq'+unit;      stk=st['data'][code]   
-    buf=stk[ms] if ms in stk else stk[unit]       #指数返回不是qfqday,是day
-    df=pd.DataFrame(buf,columns=['time','open','close','high','low','volume'],dtype='float')     
-    df.time=pd.to_datetime(df.time);    df.set_index(['time'], inplace=True);   df.index.name=''          #处理索引 
-    return df
+    URL=f'{TX_DAY_URL}?param={code},{unit},,{end_date},{count},qfq'     
+    return _parse_tx_day(_http_get(URL),code,unit)
 
 #腾讯分钟线
 def get_price_min_tx(code, end_date=None, count=10, frequency='1d'):    #分钟线获取 
     ts=int(frequency[:-1]) if frequency[:-1].isdigit() else 1           #解析K线周期数
     if end_date: end_date=end_date.strftime('%Y-%m-%d') if isinstance(end_date,datetime.date) else end_date.split(' ')[0]        
-    URL=f'http://ifzq.gtimg.cn/appstock/app/kline/mkline?param={code},m{ts},,{count}' 
-    st= json.loads(requests.get(URL).content);       buf=st['data'][code]['m'+str(ts)] 
-    df=pd.DataFrame(buf,columns=['time','open','close','high','low','volume','n1','n2'])   
-    df=df[['time','open','close','high','low','volume']]    
-    df[['open','close','high','low','volume']]=df[['open','close','high','low','volume']].astype('float')
-    df.time=pd.to_datetime(df.time);   df.set_index(['time'], inplace=True);   df.index.name=''          #处理索引     
-    df['close'][-1]=float(st['data'][code]['qt'][code][3])                #最新基金数据是3位的
-    return df
+    URL=f'{TX_MIN_URL}?param={code},m{ts},,{count}' 
+    return _parse_tx_min(_http_get(URL),code,ts)
 
 
 #sina新浪全周期获取函数，分钟线 5m,15m,30m,60m  日线1d=240m   周线1w=1200m  1月=7200m
@@ -36,28 +70,83 @@ def get_price_sina(code, end_date='', count=10, frequency='60m'):    #新浪全
         unit=4 if frequency=='1200m' else 29 if frequency=='7200m' else 1    #4,29多几个数据不影响速度
         count=count+(datetime.datetime.now()-end_date).days//unit            #结束时间到今天有多少天自然日(肯定 >交易日)        
         #print(code,end_date,count)    
-    URL=f'http://money.finance.sina.com.cn/quotes_service/api/json_v2.php/CN_MarketData.getKLineData?symbol={code}&scale={ts}&ma=5&datalen={count}' 
-    dstr= json.loads(requests.get(URL).content);       
-    #df=pd.DataFrame(dstr,columns=['day','open','high','low','close','volume'],dtype='float') 
-    df= pd.DataFrame(dstr,columns=['day','open','high','low','close','volume'])
-    df['open'] = df['open'].astype(float); df['high'] = df['high'].astype(float);                          #转换数据类型
-    df['low'] = df['low'].astype(float);   df['close'] = df['close'].astype(float);  df['volume'] = df['volume'].astype(float)    
-    df.day=pd.to_datetime(df.day);    df.set_index(['day'], inplace=True);     df.index.name=''            #处理索引                 
+    URL=f'{SINA_URL}?symbol={code}&scale={ts}&ma=5&datalen={count}' 
+    df=_parse_sina(_http_get(URL))
     if (end_date!='') & (frequency in ['240m','1200m','7200m']): return df[df.index<=end_date][-mcount:]   #日线带结束时间先返回              
     return df
 
-def get_price(code, end_date='',count=10, frequency='1d', fields=[]):        #对外暴露只有唯一函数，这样对用户才是最友好的  
+def get_price(code, end_date='',count=10, frequency='1d', fields=[], hedge=False):   #对外暴露只有唯一函数，这样对用户才是最友好的;  hedge=True 主源慢时同时请求备用源
     xcode= code.replace('.XSHG','').replace('.XSHE','')                      #证券代码编码兼容处理 
     xcode='sh'+xcode if ('XSHG' in code)  else  'sz'+xcode  if ('XSHE' in code)  else code     
+    return get_price_via_store(xcode,end_date,count,frequency,partial(_get_price_remote,hedge=hedge))
+
+#---行情源路由---  见ashare_health.py: 按源统计错误率/耗时, 熔断的源直接跳过, 健康的源按耗时排序;  source_metrics() 供监控
+_router=SourceRouter(['sina','tencent'])
+def configure_sources(**options):  global _router;  _router=SourceRouter(['sina','tencent'],**options);  return _router   #参数见SourceRouter/SourceHealth
+def source_metrics():  return _router.metrics()
 
+def _get_price_remote(xcode, end_date='',count=10, frequency='1d', hedge=False):   #直接访问行情源(默认新浪主力, 腾讯备用)
+    sina=('sina',lambda: get_price_sina(xcode,end_date=end_date,count=count,frequency=frequency))
     if  frequency in ['1d','1w','1M']:   #1d日线  1w周线  1M月线
-         try:    return get_price_sina( xcode, end_date=end_date,count=count,frequency=frequency)   #主力
-         except: return get_price_day_tx(xcode,end_date=end_date,count=count,frequency=frequency)   #备用                    
+         return _router.call([(*sina,'bfq'),('tencent',lambda: get_price_day_tx(xcode,end_date=end_date,count=count,frequency=frequency),'qfq')],hedge=hedge)   #新浪不复权, 腾讯前复权: 口径不同, 腾讯只在新浪失败时备用
     
     if  frequency in ['1m','5m','15m','30m','60m']:  #分钟线 ,1m只有腾讯接口  5分钟5m   60分钟60m
-         if frequency in '1m': return get_price_min_tx(xcode,end_date=end_date,count=count,frequency=frequency)
-         try:    return get_price_sina(  xcode,end_date=end_date,count=count,frequency=frequency)   #主力   
-         except: return get_price_min_tx(xcode,end_date=end_date,count=count,frequency=frequency)   #备用
+         tx=('tencent',lambda: get_price_min_tx(xcode,end_date=end_date,count=count,frequency=frequency))
+         return _router.call([tx] if frequency in '1m' else [sina,tx],hedge=hedge)
+
+#---本地K线仓库---  见ashare_store.py, 默认关闭;  set_bar_store(路径或BarStore) 或环境变量 ASHARE_STORE 启用
+#                 5m/15m/30m/60m 由缓存的1m合成, 1w/1M 由缓存的日线合成(见ashare_resample.py): 一次基础拉取服务所有周期
+_store=None;   _store_freqs=[];   _resample=None
+RESAMPLE_LIMIT={'1m':2000,'1d':5000}      #所需基础K线超过此数(接口历史不够)时仍直接拉取目标周期
+def set_bar_store(store):                                                    #传None关闭
+    global _store,_store_freqs,_resample
+    if isinstance(store,(str,os.PathLike)):  import ashare_store;  store=ashare_store.BarStore(store)
+    if store is not None:  import ashare_store,ashare_resample;  _store_freqs=ashare_store.FREQUENCIES;  _resample=ashare_resample
+    _store=store;   return store
+
+def _get_price_stored(xcode, end_date, count, frequency, fetch):
+    base=_resample.BASE.get(frequency);   n=_resample.base_count(frequency,count) if base else 0
+    if base and n<=RESAMPLE_LIMIT[base]:
+        return _resample.resample_bars(_store.get(xcode,end_date,n,base,fetch),frequency)[-count:]
+    return _store.get(xcode,end_date,count,frequency,fetch)
+
+def get_price_via_store(xcode, end_date, count, frequency, fetch):           #本地仓库优先, 否则直接fetch(xcode,end_date,count,frequency);  其它行情源(如港股)共用仓库也走这里
+    if _store is not None and frequency in _store_freqs: return _get_price_stored(xcode,end_date,count,frequency,fetch)
+    return fetch(xcode,end_date,count,frequency)
+if os.environ.get('ASHARE_STORE'):  set_bar_store(os.environ['ASHARE_STORE'])
+
+#---异步/批量接口---  在共享线程池里执行get_price(保留新浪→腾讯的双核心备用), 信号量限制并发
+async def get_price_async(code, end_date='', count=10, frequency='1d', fields=[], semaphore=None):
+    async def fetch():  return await asyncio.get_running_loop().run_in_executor(_executor, lambda: get_price(code,end_date=end_date,count=count,frequency=frequency,fields=fields))
+    if semaphore is None:  return await fetch()
+    async with semaphore:  return await fetch()
+
+async def get_prices_async(codes, end_date='', count=10, frequency='1d', max_concurrency=MAX_CONCURRENCY):   #并发获取多只证券 → {code: df}, 失败为None
+    sem=asyncio.Semaphore(max_concurrency)
+    async def one(code):
+        try:    return code, await get_price_async(code,end_date=end_date,count=count,frequency=frequency,semaphore=sem)
+        except Exception: return code, None
+    return dict(await asyncio.gather(*(one(code) for code in codes)))
+
+def get_prices(codes, end_date='', count=10, frequency='1d', max_concurrency=MAX_CONCURRENCY):             #同步版本(不能在运行中的事件循环里调用, 那里请用get_prices_async)
+    return asyncio.run(get_prices_async(codes,end_date=end_date,count=count,frequency=frequency,max_concurrency=max_concurrency))
+
+
+#---多证券宽表---  列为(字段,代码)两级MultiIndex, 行为所有证券K线时间的并集(共同交易日历), 停牌/缺失/获取失败处为NaN
+PANEL_FIELDS=['open','high','low','close','volume']
+def _panel_array(frames, codes, fields=PANEL_FIELDS):                     #{code:df} → (日历, 时间×字段×代码 三维数组)
+    frames=[(j,df) for j,code in enumerate(codes) if (df:=frames.get(code)) is not None and len(df)]
+    calendar=pd.DatetimeIndex(np.unique(np.concatenate([df.index.values for _,df in frames]))) if frames else pd.DatetimeIndex([])
+    data=np.full((len(calendar),len(fields),len(codes)),np.nan)
+    for j,df in frames:  data[calendar.searchsorted(df.index),:,j]=df[fields].to_numpy(dtype=float)
+    return calendar,data
+
+def get_price_panel(codes, frequency='1d', count=10, end_date='', fields=PANEL_FIELDS, max_concurrency=MAX_CONCURRENCY):   #并发获取并对齐, 保留最近count个交易时间
+    codes=list(dict.fromkeys(codes))                                      #去重保序
+    calendar,data=_panel_array(get_prices(codes,end_date=end_date,count=count,frequency=frequency,max_concurrency=max_concurrency),codes,fields)
+    calendar,data=calendar[-count:],data[-count:]
+    panel=pd.DataFrame(data.reshape(len(calendar),-1),index=calendar,columns=pd.MultiIndex.from_product([fields,codes]),copy=False)
+    panel.index.name='';   return panel         #panel['close'] → 时间×代码收盘价;  panel.to_numpy().reshape(len(panel),len(fields),len(codes)) → 三维数组
         
 if __name__ == '__main__':    
     df=get_price('sh000001',frequency='1d',count=10)      #支持'1d'日, '1w'周, '1M'月  
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ashare 行情接口基准测试 (本地模拟服务器, 不访问真实行情源)
+
+用法:
+    python ashare_bench.py fetch [--symbols 500] [--latency 0.02]
+    python ashare_bench.py store [--symbols 500] [--latency 0.02]
+    python ashare_bench.py parse [--bars 1000 10000 100000]
+    python ashare_bench.py resample [--symbols 500] [--latency 0.02]
+    python ashare_bench.py health [--calls 200]
+    python ashare_bench.py hk [--symbols 500] [--latency 0.02]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import timeit
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+import Ashare
+import ashare_hk
+import ashare_resample
+import ashare_store
+
+
+# ============ 模拟行情服务器 ============
+def trading_stamps(count, end=None, minutes=None):
+    """截止到end (默认当前时间) 的最近count个交易时间: 工作日; 分钟线按交易时段 09:30-11:30 / 13:00-15:00 以K线结束时间标注"""
+    end = end or datetime.now()
+    day, stamps = end.replace(hour=0, minute=0, second=0, microsecond=0), []
+    while len(stamps) < count:
+        if day.weekday() < 5:
+            if minutes:
+                offsets = [k if k <= 120 else k + 90 for k in range(240, 0, -minutes)]     # 交易分钟序号 → 距09:30的分钟数
+                stamps += [s for s in (day + timedelta(minutes=570 + k) for k in offsets) if s <= end]
+            else:
+                stamps.append(day)
+        day -= timedelta(days=1)
+    return stamps[:count][::-1]
+
+
+def make_sina_payload(count, end=None, minutes=None):
+    """新浪K线接口格式: [{"day","open","high","low","close","volume"}, ...] (数值为字符串)
+    每根K线只由其时间决定, 不同count的请求在重叠部分数据一致"""
+    bars = []
+    for stamp in trading_stamps(count, end, minutes):
+        rng = random.Random(stamp.timestamp())
+        o = 10 * (1 + rng.uniform(-0.2, 0.2))
+        c = o * (1 + rng.uniform(-0.03, 0.03))
+        bars.append({
+            "day": stamp.strftime("%Y-%m-%d %H:%M:%S" if minutes else "%Y-%m-%d"),
+            "open": f"{o:.3f}", "high": f"{max(o, c) * 1.01:.3f}", "low": f"{min(o, c) * 0.99:.3f}",
+            "close": f"{c:.3f}", "volume": str(rng.randint(10000, 9000000)),
+        })
+    return bars
+
+
+def make_tx_day_payload(code, count, unit="day"):
+    """腾讯日线接口格式: data[code]['qfqday'] = [[time, open, close, high, low, volume], ...]"""
+    rows = [[b["day"], b["open"], b["close"], b["high"], b["low"], b["volume"]] for b in make_sina_payload(count)]
+    return {"data": {code: {"qfq" + unit: rows}}}
+
+
+def make_tx_min_payload(code, count, ts=1):
+    """腾讯分钟线接口格式: data[code]['m1'] = [[yyyymmddHHMM, open, close, high, low, volume, n1, n2], ...]"""
+    bars = make_sina_payload(count, minutes=ts)
+    rows = [[b["day"].replace("-", "").replace(" ", "").replace(":", "")[:12], b["open"], b["close"], b["high"],
+             b["low"], b["volume"], {}, ""] for b in bars]
+    return {"data": {code: {"m" + str(ts): rows, "qt": {code: ["1", "name", code, bars[-1]["close"]]}}}}
+
+
+class FakeQuoteServer:
+    """本地线程化HTTP服务器, 模拟新浪/腾讯接口; 可注入延迟和失败率"""
+
+    def __init__(self, latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self.bars_served = 0
+        self.by_source = Counter()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # 头部与正文分两次写出, 避免Nagle延迟
+
+            def do_GET(self):
+                server.requests += 1
+                url = urlparse(self.path)
+                source = url.path.strip("/")
+                server.by_source[source] += 1
+                latency, failure_rate = server.behaviour(source)
+                if latency:
+                    time.sleep(latency)
+                if failure_rate and random.random() < failure_rate:
+                    self.send_response(503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                payload, bars = server.payload(source, parse_qs(url.query))
+                server.bars_served += bars
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def behaviour(self, source):
+        """(延迟秒, 失败率) — 子类可按数据源区分"""
+        return self.latency, self.failure_rate
+
+    def payload(self, source, query):
+        """(响应JSON, K线根数)"""
+        if source == "sina":
+            bars = make_sina_payload(int(query["datalen"][0]), minutes=None if query["scale"][0] == "240" else int(query["scale"][0]))
+            return bars, len(bars)
+        code, unit_or_ts = query["param"][0].split(",")[:2]
+        count = int(query["param"][0].split(",")[-2 if source == "txday" else -1])
+        if source == "txday":
+            return make_tx_day_payload(code, count, unit_or_ts), count
+        return make_tx_min_payload(code, count, int(unit_or_ts[1:])), count
+
+    def __enter__(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        self._saved = (Ashare.SINA_URL, Ashare.TX_DAY_URL, Ashare.TX_MIN_URL)
+        Ashare.SINA_URL, Ashare.TX_DAY_URL, Ashare.TX_MIN_URL = (f"{self.url}/sina", f"{self.url}/txday", f"{self.url}/txmin")
+        return self
+
+    def __exit__(self, *exc):
+        Ashare.SINA_URL, Ashare.TX_DAY_URL, Ashare.TX_MIN_URL = self._saved
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+# ============ 基准测试 ============
+def bench_fetch(n_symbols, latency, count=60):
+    """顺序 get_price vs 并发 get_prices"""
+    codes = [f"sh{600000 + i}" for i in range(n_symbols)]
+    with FakeQuoteServer(latency=latency):
+        start = time.perf_counter()
+        for code in codes:
+            Ashare.get_price(code, frequency="1d", count=count)
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        frames = Ashare.get_prices(codes, frequency="1d", count=count)
+        concurrent = time.perf_counter() - start
+
+    assert all(df is not None and len(df) == count for df in frames.values())
+    print(f"{n_symbols} symbols x {count} bars, simulated latency {latency * 1000:.0f} ms")
+    print(f"  sequential get_price   {sequential:8.2f} s  ({n_symbols / sequential:7.1f} symbols/s)")
+    print(f"  concurrent get_prices  {concurrent:8.2f} s  ({n_symbols / concurrent:7.1f} symbols/s, "
+          f"max_concurrency={Ashare.MAX_CONCURRENCY})")
+
+
+def bench_store(n_symbols, latency, count=250):
+    """日报场景: 冷启动完整拉取 / TTL内重复 / 过期后增量刷新, 对比请求数和传输K线数"""
+    codes = [f"sh{600000 + i}" for i in range(n_symbols)]
+    with FakeQuoteServer(latency=latency) as server, tempfile.TemporaryDirectory() as folder:
+        store = ashare_store.BarStore(os.path.join(folder, "bars.db"))
+        Ashare.set_bar_store(store)
+        rows = []
+        try:
+            for name, ttl in [("no store", None), ("cold store", 3600), ("within TTL", 3600), ("TTL expired", 0)]:
+                if ttl is None:
+                    Ashare.set_bar_store(None)
+                else:
+                    Ashare.set_bar_store(store)
+                    store.ttl["1d"] = ttl
+                requests, bars = server.requests, server.bars_served
+                start = time.perf_counter()
+                frames = Ashare.get_prices(codes, frequency="1d", count=count)
+                elapsed = time.perf_counter() - start
+                assert all(df is not None and len(df) == count for df in frames.values())
+                rows.append((name, elapsed, server.requests - requests, server.bars_served - bars))
+        finally:
+            Ashare.set_bar_store(None)
+
+    print(f"{n_symbols} symbols x {count} daily bars, simulated latency {latency * 1000:.0f} ms")
+    print(f"  {'run':<14}{'seconds':>10}{'requests':>10}{'bars fetched':>14}")
+    for name, elapsed, requests, bars in rows:
+        print(f"  {name:<14}{elapsed:>10.2f}{requests:>10}{bars:>14}")
+
+
+def _legacy_parse_sina(content):
+    """原新浪解析 (逐列转换): dict列表建表, 五次单列astype, 字符串to_datetime"""
+    df = pd.DataFrame(json.loads(content), columns=["day", "open", "high", "low", "close", "volume"])
+    df["open"] = df["open"].astype(float); df["high"] = df["high"].astype(float)
+    df["low"] = df["low"].astype(float); df["close"] = df["close"].astype(float); df["volume"] = df["volume"].astype(float)
+    df.day = pd.to_datetime(df.day); df.set_index(["day"], inplace=True); df.index.name = ""
+    return df
+
+
+def _legacy_parse_tx_min(content, code, ts):
+    """原腾讯分钟线解析 (逐列转换): 8列建表, 切片后再转换 (收盘价改写改为iloc, 原链式赋值在pandas 3下无效)"""
+    st = json.loads(content)
+    df = pd.DataFrame(st["data"][code]["m" + str(ts)], columns=["time", "open", "close", "high", "low", "volume", "n1", "n2"])
+    df = df[["time", "open", "close", "high", "low", "volume"]]
+    df[["open", "close", "high", "low", "volume"]] = df[["open", "close", "high", "low", "volume"]].astype("float")
+    df.time = pd.to_datetime(df.time); df.set_index(["time"], inplace=True); df.index.name = ""
+    df.iloc[-1, df.columns.get_loc("close")] = float(st["data"][code]["qt"][code][3])
+    return df
+
+
+def bench_parse(sizes, repeat=5):
+    """录制的响应体 (bytes) → DataFrame, 旧解析 vs 解析层; 结果逐值核对"""
+    code = "sh600000"
+    print(f"{'payload':<22}{'bars':>8}{'legacy ms':>12}{'new ms':>10}{'speedup':>9}")
+    for bars in sizes:
+        cases = [
+            ("sina 1d", json.dumps(make_sina_payload(bars)).encode(),
+             _legacy_parse_sina, Ashare._parse_sina, ()),
+            ("sina 5m", json.dumps(make_sina_payload(bars, minutes=5)).encode(),
+             _legacy_parse_sina, Ashare._parse_sina, ()),
+            ("tencent 1m", json.dumps(make_tx_min_payload(code, bars)).encode(),
+             _legacy_parse_tx_min, Ashare._parse_tx_min, (code, 1)),
+        ]
+        for name, content, legacy, parse, extra in cases:
+            pd.testing.assert_frame_equal(legacy(content, *extra), parse(content, *extra), check_index_type=False)
+            legacy_ms = min(timeit.repeat(lambda: legacy(content, *extra), number=1, repeat=repeat)) * 1000
+            new_ms = min(timeit.repeat(lambda: parse(content, *extra), number=1, repeat=repeat)) * 1000
+            print(f"{name:<22}{bars:>8}{legacy_ms:>12.2f}{new_ms:>10.2f}{legacy_ms / new_ms:>8.1f}x")
+    print(f"json decoder: {Ashare._loads.__module__ or 'json'}")
+
+
+def bench_resample(n_symbols, latency, count=20):
+    """本地仓库下请求全部周期: 各周期分别拉取 vs 由1m/1d合成; 合成结果先与pandas groupby核对"""
+    bars = Ashare._parse_sina(json.dumps(make_sina_payload(5000, minutes=1)).encode())
+    for frequency in ["5m", "60m", "1w", "1M"]:
+        base = bars if frequency.endswith("m") else Ashare._parse_sina(json.dumps(make_sina_payload(500)).encode())
+        key = (base.index.to_period("W") if frequency == "1w" else base.index.to_period("M") if frequency == "1M"
+               else ashare_resample.resample_bars(base, frequency).index.searchsorted(base.index))
+        expected = base.groupby(key).agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+        got = ashare_resample.resample_bars(base, frequency)
+        assert (got.to_numpy() == expected[got.columns].to_numpy()).all(), frequency
+
+    codes = [f"sh{600000 + i}" for i in range(n_symbols)]
+    frequencies = ["1M", "1w", "1d", "60m", "30m", "15m", "5m", "1m"]      # 粗周期在前: 基础K线一次取够
+    limits = dict(Ashare.RESAMPLE_LIMIT)
+    rows = []
+    with FakeQuoteServer(latency=latency) as server, tempfile.TemporaryDirectory() as folder:
+        try:
+            for name, resample in [("fetch each frequency", False), ("resample from 1m/1d", True)]:
+                store = Ashare.set_bar_store(os.path.join(folder, f"{resample}.db"))
+                Ashare.RESAMPLE_LIMIT.update(limits if resample else {base: 0 for base in limits})
+                for run in ["cold", "refresh"]:
+                    if run == "refresh":                                         # 两小时后再跑: 全部过期, 只补尾部
+                        store.clock = lambda: datetime.now() + timedelta(hours=2)
+                    requests, fetched = server.requests, server.bars_served
+                    start = time.perf_counter()
+                    for frequency in frequencies:
+                        frames = Ashare.get_prices(codes, frequency=frequency, count=count)
+                        assert all(df is not None and len(df) == count for df in frames.values()), frequency
+                    rows.append((f"{name}, {run}", time.perf_counter() - start,
+                                 server.requests - requests, server.bars_served - fetched))
+        finally:
+            Ashare.set_bar_store(None)
+            Ashare.RESAMPLE_LIMIT.update(limits)
+
+    print(f"{n_symbols} symbols x {len(frequencies)} frequencies x {count} bars, simulated latency {latency * 1000:.0f} ms")
+    print(f"  {'run':<32}{'seconds':>10}{'requests':>10}{'bars fetched':>14}")
+    for name, elapsed, requests, fetched in rows:
+        print(f"  {name:<32}{elapsed:>10.2f}{requests:>10}{fetched:>14}")
+
+
+class ScenarioServer(FakeQuoteServer):
+    """按数据源注入故障: {source: (延迟秒, 失败率, 长尾比例, 长尾延迟秒)}, source 为 sina / txday / txmin"""
+
+    def __init__(self, scenario):
+        super().__init__()
+        self.scenario = scenario
+
+    def behaviour(self, source):
+        latency, failure_rate, tail_rate, tail_latency = self.scenario.get(source, (0.02, 0, 0, 0))
+        return (tail_latency if random.random() < tail_rate else latency), failure_rate
+
+
+def bench_health(n_calls):
+    """故障场景下顺序调用get_price: 旧的固定主备 vs 熔断+按耗时选源 vs 对冲请求"""
+    tencent = (0.02, 0, 0, 0)
+    scenarios = [
+        ("sina down, 503 after 300 ms", {"sina": (0.3, 1.0, 0, 0), "txday": tencent}),
+        ("sina slow, 150 ms", {"sina": (0.15, 0, 0, 0), "txday": tencent}),
+        ("sina tail, 5% take 1 s", {"sina": (0.02, 0, 0.05, 1.0), "txday": tencent}),
+    ]
+    modes = [
+        ("fixed fallback", dict(adaptive=False, failure_threshold=2.0), False),
+        ("breaker + routing", {}, False),
+        ("breaker + hedge", {}, True),
+    ]
+    random.seed(1)
+    print(f"{n_calls} sequential get_price calls per run")
+    print(f"  {'scenario':<30}{'mode':<20}{'total s':>9}{'p50 ms':>9}{'p99 ms':>9}{'sina req':>10}{'tx req':>8}")
+    try:
+        for scenario_name, scenario in scenarios:
+            for mode_name, options, hedge in modes:
+                Ashare.configure_sources(**options)
+                latencies = []
+                with ScenarioServer(scenario) as server:
+                    for i in range(n_calls):
+                        start = time.perf_counter()
+                        df = Ashare.get_price(f"sh{600000 + i}", count=20, hedge=hedge)
+                        latencies.append(time.perf_counter() - start)
+                        assert len(df) == 20
+                    latencies.sort()
+                    print(f"  {scenario_name:<30}{mode_name:<20}{sum(latencies):>9.2f}"
+                          f"{latencies[len(latencies) // 2] * 1000:>9.1f}{latencies[int(len(latencies) * 0.99)] * 1000:>9.1f}"
+                          f"{server.by_source['sina']:>10}{server.by_source['txday']:>8}")
+        states = {name: m["state"] for name, m in Ashare.source_metrics().items()}
+        print(f"source states after last run: {states}")
+    finally:
+        Ashare.configure_sources()
+
+
+# ============ 港股 ============
+class FakeHKHist:
+    """替代 ashare_hk._stock_hk_hist: 按日期区间返回AKShare格式 (中文列名) 的港股日线, 统计调用次数和行数"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, symbol, start_date, end_date):
+        time.sleep(self.latency)
+        days = pd.bdate_range(start_date, end_date)
+        close = 100 + (int(symbol) % 50) + pd.Series(range(len(days)), dtype=float) * 0.1
+        with self._lock:
+            self.calls += 1
+            self.rows += len(days)
+        return pd.DataFrame({'日期': days.date, '开盘': close, '收盘': close + 0.5, '最高': close + 1,
+                             '最低': close - 1, '成交量': 1e6, '成交额': close * 1e6, '涨跌幅': 0.5})
+
+
+def bench_hk(n_symbols, latency, count=60):
+    """港股日报场景: 不用仓库 / 冷启动 / TTL内重复 / 次日增量刷新, 对比接口调用数和返回行数"""
+    symbols = [f"{i:05d}" for i in range(1, n_symbols + 1)]
+    fake, original = FakeHKHist(latency), ashare_hk._stock_hk_hist
+    now = [datetime(2026, 1, 30, 17)]
+    rows = []
+    ashare_hk._stock_hk_hist = fake
+    try:
+        with tempfile.TemporaryDirectory() as folder, ThreadPoolExecutor(max_workers=16) as pool:
+            store = ashare_store.BarStore(os.path.join(folder, "bars.db"), clock=lambda: now[0])
+            for name, use_store, advance in [("no store", False, 0), ("cold store", True, 0),
+                                             ("within TTL", True, 0), ("next day", True, 24)]:
+                Ashare.set_bar_store(store if use_store else None)
+                now[0] += timedelta(hours=advance)
+                calls, fetched = fake.calls, fake.rows
+                start = time.perf_counter()
+                frames = list(pool.map(lambda symbol: ashare_hk.get_hk_price(symbol, count=count), symbols))
+                elapsed = time.perf_counter() - start
+                assert all(list(df.columns) == ashare_store.FIELDS and len(df) == count for df in frames)
+                rows.append((name, elapsed, fake.calls - calls, fake.rows - fetched))
+    finally:
+        ashare_hk._stock_hk_hist = original
+        Ashare.set_bar_store(None)
+
+    print(f"{n_symbols} HK symbols x {count} daily bars, simulated latency {latency * 1000:.0f} ms")
+    print(f"  {'run':<14}{'seconds':>10}{'calls':>10}{'rows fetched':>14}")
+    for name, elapsed, calls, fetched in rows:
+        print(f"  {name:<14}{elapsed:>10.2f}{calls:>10}{fetched:>14}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ashare 基准测试")
+    parser.add_argument("suite", choices=["fetch", "store", "parse", "resample", "health", "hk"], help="测试项目")
+    parser.add_argument("--symbols", type=int, default=500, help="证券数量 (默认500)")
+    parser.add_argument("--latency", type=float, default=0.02, help="模拟服务器延迟秒数 (默认0.02)")
+    parser.add_argument("--calls", type=int, default=100, help="health: 每轮调用次数 (默认100)")
+    parser.add_argument("--bars", type=int, nargs="+", default=[1000, 10000, 100000], help="parse: 每个响应的K线数")
+
+    args = parser.parse_args()
+
+    if args.suite == "fetch":
+        bench_fetch(args.symbols, args.latency)
+    elif args.suite == "store":
+        bench_store(args.symbols, args.latency)
+    elif args.suite == "parse":
+        bench_parse(args.bars)
+    elif args.suite == "resample":
+        bench_resample(args.symbols, args.latency)
+    elif args.suite == "health":
+        bench_health(args.calls)
+    elif args.suite == "hk":
+        bench_hk(args.symbols, args.latency)
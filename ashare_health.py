@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ashare 行情源健康度与熔断
+
+每个行情源 (新浪 / 腾讯) 维护最近window次调用的成功率和耗时:
+  - 熔断: 窗口内错误率达到阈值 → 打开, cooldown秒内不再请求该源;
+          冷却后实际请求时放行一次探测 (半开), 成功则恢复, 失败则重新打开
+  - 选源: 在可用的源中按近期中位耗时排序, 没有样本的源先试; 定期探测较慢的源
+          只在价格口径 (复权方式) 与主源相同的源之间排序, 口径不同的源只在它们都失败后故障转移,
+          如日线的新浪(不复权)与腾讯(前复权)不会因耗时互换, 同一序列的价格口径不随耗时波动改变
+  - 对冲: 主源超过其近期p90耗时仍未返回时, 同时请求口径相同的备用源, 先成功者返回
+  - 监控: metrics() 返回各源的状态, 错误率, 分位耗时和累计耗时直方图
+"""
+
+import bisect
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)   # 秒, 直方图上界 (另有 +Inf)
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class SourceUnavailable(Exception):
+    """所有行情源都处于熔断状态"""
+
+
+class SourceHealth:
+    """单个行情源的滚动统计和熔断状态, 线程安全"""
+
+    def __init__(self, name, window=50, failure_threshold=0.5, min_calls=5, cooldown=30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = CLOSED
+        self.opened_at = None
+        self._calls = deque(maxlen=window)                  # (是否成功, 耗时)
+        self._buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._totals = {'calls': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+        self._lock = threading.Lock()
+
+    def available(self):
+        """选源用, 不改变状态: 关闭, 冷却已结束, 或半开且没有进行中的探测"""
+        with self._lock:
+            return self._probe_open(self.clock())
+
+    def _probe_open(self, now):
+        if self.state == CLOSED:
+            return True
+        # 半开后探测一直没有结果 (未实际发出或调用方异常退出) 时, 再过一个冷却期放行新的探测
+        return now - self.opened_at >= self.cooldown
+
+    def try_acquire(self):
+        """实际请求本源前调用; 冷却结束时放行一次探测 (半开), 探测结果由record()决定"""
+        with self._lock:
+            now = self.clock()
+            if self._probe_open(now):
+                if self.state != CLOSED:
+                    self.state, self.opened_at = HALF_OPEN, now
+                return True
+            self._totals['rejected'] += 1
+            return False
+
+    def record(self, ok, latency):
+        with self._lock:
+            self._calls.append((ok, latency))
+            self._buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+            self._totals['calls'] += 1
+            self._totals['failures'] += not ok
+            if self.state == HALF_OPEN:
+                if ok:
+                    self.state = CLOSED
+                    self._calls.clear()
+                else:
+                    self._open()
+            elif self.state == CLOSED and not ok and len(self._calls) >= self.min_calls \
+                    and self._error_rate() >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.state, self.opened_at = OPEN, self.clock()
+        self._totals['opened'] += 1
+
+    def _error_rate(self):
+        return sum(not ok for ok, _ in self._calls) / len(self._calls) if self._calls else 0.0
+
+    def latency(self, q):
+        """窗口内成功调用耗时的q分位数; 样本不足min_calls时为None"""
+        with self._lock:
+            samples = sorted(latency for ok, latency in self._calls if ok)
+        if len(samples) < self.min_calls:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def snapshot(self):
+        with self._lock:
+            error_rate = self._error_rate()
+            state, totals, buckets = self.state, dict(self._totals), list(self._buckets)
+        cumulative, histogram = 0, {}
+        for bound, count in zip([*LATENCY_BUCKETS, float('inf')], buckets):
+            cumulative += count
+            histogram['+Inf' if bound == float('inf') else str(bound)] = cumulative
+        return {'state': state, 'error_rate': round(error_rate, 4),
+                'p50': self.latency(0.5), 'p95': self.latency(0.95),
+                **totals, 'latency_histogram': histogram}
+
+
+class SourceRouter:
+    """按健康度和耗时为一次请求安排行情源顺序, 执行故障转移或对冲请求"""
+
+    def __init__(self, names, adaptive=True, explore_every=10, hedge_quantile=0.9, hedge_delay=0.5,
+                 min_hedge_delay=0.05, **health_options):
+        self.sources = {name: SourceHealth(name, **health_options) for name in names}
+        self.adaptive = adaptive
+        self.explore_every = explore_every          # 每N次调用先试排在最后的源, 使其耗时样本保持新鲜
+        self.hedge_quantile = hedge_quantile        # 主源超过其该分位耗时即发出对冲请求
+        self.hedge_delay = hedge_delay              # 主源没有耗时样本时的对冲等待秒数
+        self.min_hedge_delay = min_hedge_delay
+        self._calls = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix='ashare-hedge')
+
+    def order(self, names):
+        """可用的源按中位耗时排序, 还没有耗时样本的源排在最前 (都没有时保持默认主备顺序);
+        每explore_every次调用把排在最后的源提到最前探测"""
+        available = [name for name in names if self.sources[name].available()]
+        if self.adaptive and len(available) > 1:
+            p50 = {name: self.sources[name].latency(0.5) for name in available}
+            available.sort(key=lambda name: (p50[name] is not None, p50[name] or 0))
+            with self._lock:
+                self._calls += 1
+                explore = self.explore_every and self._calls % self.explore_every == 0
+            if explore:
+                available.insert(0, available.pop())
+        return available
+
+    def _timed(self, name, fn):
+        if not self.sources[name].try_acquire():    # 选源后被并发请求占用了探测
+            raise SourceUnavailable(f"行情源已熔断: {name}")
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception:
+            self.sources[name].record(False, time.perf_counter() - start)
+            raise
+        self.sources[name].record(True, time.perf_counter() - start)
+        return result
+
+    def call(self, attempts, hedge=False):
+        """
+        attempts: [(源名, 无参函数[, 价格口径]), ...] 按默认主备顺序; 返回第一个成功的结果, 全部失败时抛出最后一个异常
+
+        与主源口径相同的源按耗时排序并可对冲; 口径不同的源按默认顺序排在其后, 仅用于故障转移
+        """
+        fns = {attempt[0]: attempt[1] for attempt in attempts}
+        basis = {attempt[0]: attempt[2] if len(attempt) > 2 else None for attempt in attempts}
+        primary = basis[attempts[0][0]]
+        same = self.order([name for name in fns if basis[name] == primary])
+        names = same + [name for name in fns if basis[name] != primary and self.sources[name].available()]
+        if not names:
+            raise SourceUnavailable(f"行情源均已熔断: {', '.join(fns)}")
+        if hedge and len(same) > 1:
+            done, result, error = self._hedged(names[0], names[1], fns)
+            if done:
+                return result
+            names = names[2:]
+        else:
+            error = None
+        for name in names:
+            try:
+                return self._timed(name, fns[name])
+            except Exception as e:
+                error = e
+        raise error
+
+    def _hedged(self, primary, backup, fns):
+        """(是否成功, 结果, 异常): 主源超过对冲等待仍未返回则并发请求备用源"""
+        delay = self.sources[primary].latency(self.hedge_quantile) or self.hedge_delay
+        futures = [self._pool.submit(self._timed, primary, fns[primary])]
+        done, _ = wait(futures, timeout=max(delay, self.min_hedge_delay))
+        if not done or futures[0].exception() is not None:
+            futures.append(self._pool.submit(self._timed, backup, fns[backup]))
+        error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return True, future.result(), None
+                error = future.exception()
+        return False, None, error
+
+    def metrics(self):
+        return {name: source.snapshot() for name, source in self.sources.items()}
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+港股K线: AKShare (东方财富) 港股日线, 接入 Ashare 的本地K线仓库
+
+get_hk_price(symbol, end_date='', count=10, frequency='1d') 与 Ashare.get_price 的参数和返回格式相同:
+  - 中文列名和日期在拉取时一次转换为 open/high/low/close/volume + DatetimeIndex, 之后的分析代码只见一种格式
+  - Ashare 启用了本地仓库 (set_bar_store 或环境变量 ASHARE_STORE) 时与A股共用: 未过期直接读盘,
+    过期只拉取尾部 (见 ashare_store.BarStore.get); 仓库中的代码加 hk 前缀 (hk00700), 与A股互不冲突
+  - 周期为 1d/1w/1M, 周线/月线由日线合成 (见 ashare_resample)
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import Ashare
+from ashare_resample import base_count, resample_bars
+
+try:
+    import akshare as ak
+except ImportError:                 # 只读本地仓库时不需要
+    ak = None
+
+FIELDS = ['open', 'high', 'low', 'close', 'volume']
+FREQUENCIES = ['1d', '1w', '1M']
+HK_COLUMNS = {'开盘': 'open', '最高': 'high', '最低': 'low', '收盘': 'close', '成交量': 'volume'}
+
+
+def _stock_hk_hist(symbol, start_date, end_date):
+    """行情接口 (yyyymmdd 日期区间, 不复权), 返回AKShare原始表"""
+    if ak is None:
+        raise ImportError('获取港股行情需要安装 akshare')
+    return ak.stock_hk_hist(symbol=symbol, period='daily', start_date=start_date, end_date=end_date, adjust='')
+
+
+def parse_hk_hist(df):
+    """AKShare港股表 (日期, 开盘, 收盘, 最高, 最低, 成交量, ...) → 标准OHLCV, 升序"""
+    out = pd.DataFrame({field: df[name].to_numpy(dtype=float) for name, field in HK_COLUMNS.items()},
+                       index=pd.DatetimeIndex(np.array(df['日期'].astype(str), dtype='datetime64[ns]')))[FIELDS]
+    out.index.name = ''
+    return out.sort_index()
+
+
+def _fetch_hk(xcode, end_date='', count=10, frequency='1d'):
+    """直接访问行情接口: 最近count根K线 (end_date之前); 按每周5个交易日估算日期区间, 多留港股假期余量"""
+    if frequency != '1d':
+        return resample_bars(_fetch_hk(xcode, end_date, base_count(frequency, count)), frequency)[-count:]
+    end = pd.to_datetime(end_date) if end_date else datetime.now()
+    start = end - timedelta(days=count * 7 // 5 + 15)
+    df = _stock_hk_hist(xcode[2:], start.strftime('%Y%m%d'), end.strftime('%Y%m%d'))
+    return parse_hk_hist(df)[-count:]
+
+
+def get_hk_price(symbol, end_date='', count=10, frequency='1d'):
+    """港股K线, symbol 如 '00700'"""
+    if frequency not in FREQUENCIES:
+        raise ValueError(f'港股不支持的周期: {frequency}')
+    return Ashare.get_price_via_store('hk' + symbol, end_date, count, frequency, _fetch_hk)
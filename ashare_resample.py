@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ashare 本地K线合成: 由1分钟线合成 5m/15m/30m/60m, 由日线合成周线/月线
+
+分钟线按交易时段内的分钟序号分桶 (上午 09:30-11:30 为 1..120, 下午 13:00-15:00 为 121..240),
+标签取桶的结束时间, 与新浪一致: 60m → 10:30, 11:30, 14:00, 15:00; 09:30 集合竞价K线并入第一根.
+周线/月线按自然周/自然月分组, 标签取组内最后一个交易日.
+
+输入K线须按时间升序; 各组是连续区间, 用 numpy reduceat 一次聚合 (open取首, high取最大, low取最小,
+close取末, volume求和).
+"""
+
+import numpy as np
+import pandas as pd
+
+BASE = {'5m': '1m', '15m': '1m', '30m': '1m', '60m': '1m', '1w': '1d', '1M': '1d'}   # 目标周期 → 基础周期
+BARS_PER_DAY = 240
+MORNING_OPEN = np.timedelta64(9 * 60 + 30, 'm')
+AFTERNOON_OPEN = np.timedelta64(13 * 60, 'm')
+SESSION_MINUTES = 120
+
+
+def base_count(frequency, count):
+    """合成count根目标K线所需的基础K线数 (上界, 多取一组补齐最早一根)"""
+    if frequency == '1w':
+        return (count + 1) * 5
+    if frequency == '1M':
+        return (count + 1) * 23
+    ts = int(frequency[:-1])
+    bars = (count + 1) * ts
+    return bars + bars // BARS_PER_DAY + 1                  # 每天多一根09:30集合竞价
+
+
+def _intraday_groups(index, ts):
+    """(分组键, 标签) — 按交易分钟序号分桶"""
+    stamps = index.values.astype('datetime64[m]')
+    days = stamps.astype('datetime64[D]')
+    minute_of_day = stamps - days
+    morning = minute_of_day <= MORNING_OPEN + np.timedelta64(SESSION_MINUTES, 'm')
+    trading_minute = np.where(morning, (minute_of_day - MORNING_OPEN).astype(np.int64),
+                              SESSION_MINUTES + (minute_of_day - AFTERNOON_OPEN).astype(np.int64))
+    bucket = np.maximum(-(-trading_minute // ts), 1)       # 向上取整, 09:30 (序号0) 并入第一桶
+    end = bucket * ts
+    label = days + np.where(end <= SESSION_MINUTES, MORNING_OPEN + end.astype('timedelta64[m]'),
+                            AFTERNOON_OPEN + (end - SESSION_MINUTES).astype('timedelta64[m]'))
+    return label, label
+
+
+def _period_groups(index, frequency):
+    """(分组键, 标签) — 自然周 (周一起) / 自然月, 标签为组内最后一个交易日"""
+    days = index.values.astype('datetime64[D]')
+    if frequency == '1w':
+        key = (days.astype(np.int64) + 3) // 7               # 1970-01-01 是周四, +3 使每组从周一开始
+    else:
+        key = days.astype('datetime64[M]').astype(np.int64)
+    return key, None
+
+
+def resample_bars(df, frequency):
+    """把升序的基础K线 (1m 或 1d) 合成为目标周期, 保持输入的列顺序"""
+    if frequency not in BASE:
+        raise ValueError(f'不支持的合成周期: {frequency}')
+    if len(df) == 0:
+        return df.copy()
+
+    if frequency in ('1w', '1M'):
+        key, label = _period_groups(df.index, frequency)
+    else:
+        key, label = _intraday_groups(df.index, int(frequency[:-1]))
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    ends = np.r_[starts[1:], len(key)] - 1
+    times = df.index.values[ends] if label is None else label[starts]
+
+    columns = {}
+    for col in df.columns:
+        values = df[col].to_numpy(dtype=float)
+        if col == 'open':
+            columns[col] = values[starts]
+        elif col == 'high':
+            columns[col] = np.maximum.reduceat(values, starts)
+        elif col == 'low':
+            columns[col] = np.minimum.reduceat(values, starts)
+        elif col == 'volume':
+            columns[col] = np.add.reduceat(values, starts)
+        else:                                                # close 及其他: 取组内最后一个
+            columns[col] = values[ends]
+    out = pd.DataFrame(columns, index=pd.DatetimeIndex(times.astype(df.index.values.dtype)))
+    out.index.name = df.index.name
+    return out
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ashare 本地K线仓库: SQLite 缓存 + 增量刷新
+
+每个序列记录已覆盖的连续区间 [起, 止] (每次拉取得到一段连续K线, 与已有区间重叠时合并),
+读取只在一个连续区间内取K线, 不会把两段不相连的缓存拼成一个窗口.
+
+get_price 先查本地仓库:
+  - 最新K线: 距上次拉取最新K线未超过该周期的TTL, 且最新的区间足够count根 → 直接返回, 不访问网络
+    已过期 → 只拉取该区间最后一根K线之后的尾部(含最后一根, 它可能还未收盘), 合并后返回;
+             尾部超过一次拉取的上限, 或拉回的K线与缓存接不上(中间有缺口) → 完整拉取, 另起一个区间
+    区间不足count根 → 完整拉取一次
+  - 带结束时间 (日/周/月线): 有一个区间覆盖到结束时间且其中有count根 → 直接返回, 否则拉取该窗口;
+    历史拉取不刷新最新K线的拉取时间
+每次拉取立即提交, 中断的批量回补重新运行时只会补齐缺失部分.
+
+启用:  Ashare.set_bar_store('~/.ashare/bars.db')      或环境变量 ASHARE_STORE=~/.ashare/bars.db
+港股 (ashare_hk.get_hk_price) 共用同一仓库, 代码加 hk 前缀.
+"""
+
+import math
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+FIELDS = ['open', 'high', 'low', 'close', 'volume']
+FREQUENCIES = ['1m', '5m', '15m', '30m', '60m', '1d', '1w', '1M']
+DAILY = ['1d', '1w', '1M']
+DEFAULT_TTL = {'1m': 60, '5m': 300, '15m': 900, '30m': 1800, '60m': 3600,   # 秒
+               '1d': 3600, '1w': 3600, '1M': 3600}
+MINUTES_PER_DAY = 240          # A股每个交易日240分钟
+MAX_FETCH = 1000               # 一次拉取最多的K线数 (新浪datalen上限约1023)
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    code TEXT, frequency TEXT, time TEXT,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (code, frequency, time)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS series (
+    code TEXT, frequency TEXT, fetched_at TEXT,
+    PRIMARY KEY (code, frequency)
+);
+CREATE TABLE IF NOT EXISTS ranges (
+    code TEXT, frequency TEXT, start_time TEXT, end_time TEXT,
+    PRIMARY KEY (code, frequency, start_time)
+) WITHOUT ROWID;
+"""
+EARLIEST = ''                  # 区间起点: 历史已取尽 (行情源返回的不足count根), 之前没有更多K线
+
+
+class BarStore:
+    """按 (证券代码, 周期) 存放K线的本地仓库, 线程安全 (每线程一个连接, 写操作串行)"""
+
+    def __init__(self, path, ttl=None, clock=datetime.now, max_fetch=MAX_FETCH):
+        self.path = os.path.expanduser(str(path))
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self.max_fetch = max_fetch
+        self.clock = clock
+        self.stats = {'hits': 0, 'tail_fetches': 0, 'full_fetches': 0, 'bars_fetched': 0}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with self._lock:
+            self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')     # WAL下断电不损坏, 只可能丢最后一次提交
+        return conn
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    # ---------- 读取 ----------
+    def _fetched_at(self, code, frequency):
+        """上次拉取最新K线的时间或 None"""
+        row = self._conn().execute('SELECT fetched_at FROM series WHERE code=? AND frequency=?',
+                                   (code, frequency)).fetchone()
+        return datetime.strptime(row[0], TIME_FORMAT) if row and row[0] else None
+
+    def _range(self, code, frequency, at=None):
+        """包含时间 at 的区间 (起, 止), at 为空时取最新的区间; 没有时为 None"""
+        sql = 'SELECT start_time, end_time FROM ranges WHERE code=? AND frequency=?'
+        params = (code, frequency)
+        if at:
+            sql, params = sql + ' AND start_time<=? AND end_time>=?', params + (at, at)
+        return self._conn().execute(sql + ' ORDER BY end_time DESC LIMIT 1', params).fetchone()
+
+    def _stored(self, code, frequency, start, end=None):
+        """区间内 (start 到 end) 的缓存K线根数和最后一根的时间"""
+        sql = 'SELECT COUNT(*), MAX(time) FROM bars WHERE code=? AND frequency=? AND time>=?'
+        params = (code, frequency, start)
+        if end:
+            sql, params = sql + ' AND time<=?', params + (end,)
+        n, last = self._conn().execute(sql, params).fetchone()
+        return n, datetime.strptime(last, TIME_FORMAT) if last else None
+
+    def read(self, code, frequency, count, end=None, start=EARLIEST):
+        """最近count根K线 (start 到 end 之间), 升序, 列为open/high/low/close/volume"""
+        sql = 'SELECT time, open, high, low, close, volume FROM bars WHERE code=? AND frequency=? AND time>=?'
+        params = (code, frequency, start)
+        if end:
+            sql, params = sql + ' AND time<=?', params + (end,)
+        rows = self._conn().execute(sql + ' ORDER BY time DESC LIMIT ?', params + (count,)).fetchall()[::-1]
+        df = pd.DataFrame([row[1:] for row in rows], columns=FIELDS, dtype='float')
+        df.index = pd.DatetimeIndex(np.array([row[0] for row in rows], dtype='datetime64[ns]'))
+        df.index.name = ''
+        return df
+
+    # ---------- 写入 ----------
+    def write(self, code, frequency, df, start, end, latest=False):
+        """
+        合并一批连续的K线 (同一时间的旧K线被覆盖), 记录它覆盖的区间 [start, end]
+
+        与已有区间重叠的合并为一个; latest=True (拉取的是最新K线, end 为拉取时间) 时记录拉取时间
+        """
+        times = pd.DatetimeIndex(df.index).strftime(TIME_FORMAT)
+        rows = [(code, frequency, t, *values) for t, values in zip(times, df[FIELDS].itertuples(index=False, name=None))]
+        conn = self._conn()
+        with self._lock, conn:
+            conn.executemany('INSERT OR REPLACE INTO bars VALUES (?,?,?,?,?,?,?,?)', rows)
+            overlapping = conn.execute('SELECT start_time, end_time FROM ranges WHERE code=? AND frequency=? '
+                                       'AND start_time<=? AND end_time>=?', (code, frequency, end, start)).fetchall()
+            conn.execute('DELETE FROM ranges WHERE code=? AND frequency=? AND start_time<=? AND end_time>=?',
+                         (code, frequency, end, start))
+            conn.execute('INSERT INTO ranges VALUES (?,?,?,?)',
+                         (code, frequency, min([start] + [r[0] for r in overlapping]),
+                          max([end] + [r[1] for r in overlapping])))
+            if latest:
+                conn.execute('INSERT INTO series (code, frequency, fetched_at) VALUES (?,?,?) '
+                             'ON CONFLICT(code, frequency) DO UPDATE SET fetched_at=excluded.fetched_at',
+                             (code, frequency, end))
+            self.stats['bars_fetched'] += len(rows)
+
+    def clear(self, code=None, frequency=None):
+        """删除缓存 (默认全部)"""
+        where = ' AND '.join(f'{col}=?' for col, value in (('code', code), ('frequency', frequency)) if value)
+        params = tuple(value for value in (code, frequency) if value)
+        conn = self._conn()
+        with self._lock, conn:
+            for table in ('bars', 'series', 'ranges'):
+                conn.execute(f'DELETE FROM {table}' + (f' WHERE {where}' if where else ''), params)
+
+    # ---------- 增量刷新 ----------
+    def _tail_count(self, last, frequency, now):
+        """从最后一根缓存K线到现在最多可能新增的K线数 (含最后一根), 按自然日估计的上界"""
+        days = max(0, (now.date() - last.date()).days)
+        if frequency == '1d':
+            return days + 1
+        if frequency == '1w':
+            return days // 7 + 2
+        if frequency == '1M':
+            return days // 28 + 2
+        ts = int(frequency[:-1])
+        minutes = max(0.0, (now - last).total_seconds() / 60)
+        return min(math.ceil(minutes / ts), (days + 1) * (MINUTES_PER_DAY // ts)) + 1
+
+    def _end_key(self, end_date, frequency):
+        """结束时间只对日/周/月线生效 (与行情接口一致)"""
+        if not end_date or frequency not in DAILY:
+            return None
+        return pd.to_datetime(end_date).strftime(TIME_FORMAT)
+
+    def _fetch_block(self, code, end_date, count, frequency, fetch, end, latest):
+        """拉取一段连续K线并写入, 返回它在缓存中的区间起点"""
+        df = fetch(code, end_date, count, frequency)
+        start = EARLIEST if len(df) < count else pd.Timestamp(df.index[0]).strftime(TIME_FORMAT)
+        self.write(code, frequency, df, start, end, latest=latest)
+        return start
+
+    def get(self, code, end_date, count, frequency, fetch):
+        """先查缓存, 必要时用 fetch(code, end_date, count, frequency) 补齐"""
+        now = self.clock()
+        now_key = now.strftime(TIME_FORMAT)
+        end = self._end_key(end_date, frequency)
+
+        if end:                                    # 历史区间: 一个连续区间覆盖到end且其中有count根即不会再变
+            end = min(end, now_key)
+            covered = self._range(code, frequency, end)
+            if covered and (covered[0] == EARLIEST or self._stored(code, frequency, covered[0], end)[0] >= count):
+                self._count('hits')
+                return self.read(code, frequency, count, end, covered[0])
+            self._count('full_fetches')
+            start = self._fetch_block(code, end_date, count, frequency, fetch, end, latest=False)
+            return self.read(code, frequency, count, end, start)
+
+        fetched_at, latest = self._fetched_at(code, frequency), self._range(code, frequency)
+        if fetched_at and latest and latest[1] >= fetched_at.strftime(TIME_FORMAT):
+            start = latest[0]
+            n, last = self._stored(code, frequency, start)
+            if last and (n >= count or start == EARLIEST):
+                if (now - fetched_at).total_seconds() < self.ttl.get(frequency, 0):
+                    self._count('hits')
+                    return self.read(code, frequency, count, start=start)
+                needed = self._tail_count(last, frequency, now)
+                if needed <= self.max_fetch:
+                    df = fetch(code, '', max(2, needed), frequency)
+                    if len(df) and pd.Timestamp(df.index[0]) <= last:      # 与缓存重叠, 没有缺口
+                        self._count('tail_fetches')
+                        self.write(code, frequency, df, pd.Timestamp(df.index[0]).strftime(TIME_FORMAT), now_key,
+                                   latest=True)
+                        return self.read(code, frequency, count, start=start)
+
+        self._count('full_fetches')                # 没有缓存, 不足count根, 或停更太久尾部接不上: 另起一个区间
+        start = self._fetch_block(code, '', count, frequency, fetch, now_key, latest=True)
+        return self.read(code, frequency, count, start=start)
@@ -8,16 +8,105 @@
 import sys
 sys.path.insert(0, '/root/clawd')
 
+import argparse
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from Ashare import *
-import akshare as ak
+from ashare_hk import get_hk_price
+from indicators import Indicators, make_panel
+from screener import Screener, load_universe, universe_from_sectors
 import pandas as pd
 from datetime import datetime, timedelta
 
+# 日报覆盖的证券
+INDICES = {
+    '上证指数': 'sh000001',
+    '深证成指': 'sz399001',
+    '创业板指': 'sz399006'
+}
+HOT_SECTORS = {
+    '有色金属': {
+        '紫金矿业': 'sh601899',
+        '山东黄金': 'sh600547',
+        '中金黄金': 'sh600489',
+        '江西铜业': 'sh600362'
+    }
+}
+HK_CONNECT = {
+    '腾讯控股': '00700',
+    '美团-W': '03690',
+    '小米集团-W': '01810',
+    '比亚迪股份': '01211',
+    '药明生物': '02269'
+}
+
 class FinancialAnalyzer:
-    def __init__(self):
+    def __init__(self, max_workers=16, fetch_timeout=15, universe=None, screener=None):
         self.today = datetime.now().strftime('%Y-%m-%d')
         self.yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
         self.week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y%m%d')
+        self.max_workers = max_workers
+        self.fetch_timeout = fetch_timeout  # 单个数据请求的最长等待秒数
+        self.timings = {}
+        self.results = {}   # 最近一次日报各项的指标表 (行为代码), 供流水线输出
+        # 板块/港股通扫描的证券池 (见 screener.load_universe) 和选股条件; 缺省为上面的固定列表, 全部展示
+        self.universe = universe if universe is not None else pd.concat(
+            [universe_from_sectors(HOT_SECTORS), universe_from_sectors({'港股通': HK_CONNECT}, market='hk')])
+        self.screener = screener or Screener()
+
+    @contextmanager
+    def stage(self, name):
+        """记录一个阶段的耗时 (秒) 到 self.timings"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def gather(self, tasks):
+        """并发执行 {key: 无参函数}; 每个调用从开始执行起最多等待 fetch_timeout 秒, 超时或失败为 None"""
+        started = {}
+
+        def run(key, fn):
+            started[key] = time.perf_counter()
+            return fn()
+
+        pool = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(tasks))))
+        futures = {pool.submit(run, key, fn): key for key, fn in tasks.items()}
+        results, pending = {}, set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = futures[future]
+                results[key] = future.result() if future.exception() is None else None
+            now = time.perf_counter()
+            for future in list(pending):
+                key = futures[future]
+                if key in started and now - started[key] > self.fetch_timeout:
+                    print(f"获取 {key} 超时 ({self.fetch_timeout}s)")
+                    pending.discard(future)
+                    results[key] = None
+        pool.shutdown(wait=False, cancel_futures=True)  # 超时的请求不再等待
+        return results
+
+    def report_codes(self, full=False):
+        """日报用到的证券 {'a': [代码], 'hk': [代码]}; 证券池超过一块时只含指数 (扫描时分块获取), full=True 时全部"""
+        pool = self.universe if full or len(self.universe) <= self.screener.chunk_size else self.universe.iloc[:0]
+        a_codes = list(INDICES.values()) + list(pool.index[pool['market'] == 'a'])
+        return {'a': list(dict.fromkeys(a_codes)), 'hk': list(pool.index[pool['market'] == 'hk'])}
+
+    def collect(self, days=10):
+        """采集阶段: 日报用到的全部A股/港股数据并发获取, 返回 {'a': {code: df}, 'hk': {symbol: df}}"""
+        # 证券池不超过一块时随日报一起采集; 更大的证券池在扫描时分块获取, 不常驻内存
+        codes = self.report_codes()
+        tasks = {('a', code): (lambda code=code: self.get_a_stock(code, days=days)) for code in codes['a']}
+        tasks.update({('hk', symbol): (lambda symbol=symbol: self.get_hk_stock(symbol, days=days))
+                      for symbol in codes['hk']})
+        data = {'a': {}, 'hk': {}}
+        for (market, key), df in self.gather(tasks).items():
+            data[market][key] = df
+        return data
 
     def get_a_stock(self, code, days=10):
         """获取A股数据"""
@@ -27,117 +116,125 @@ class FinancialAnalyzer:
             print(f"获取A股 {code} 失败: {e}")
             return None
 
+    def get_a_panel(self, codes, days=10):
+        """批量获取A股数据, 返回 (字段, 代码) 两级列的宽表"""
+        try:
+            return get_price_panel(codes, frequency='1d', count=days)
+        except Exception as e:
+            print(f"批量获取A股 {codes} 失败: {e}")
+            return None
+
     def get_hk_stock(self, symbol, days=10):
-        """获取港股数据"""
+        """获取港股数据 (与A股相同的英文OHLCV格式, 启用本地仓库时与A股共用缓存)"""
         try:
-            start = (datetime.now() - timedelta(days=days)).strftime('%Y%m%d')
-            end = datetime.now().strftime('%Y%m%d')
-            df = ak.stock_hk_hist(symbol=symbol, period="daily",
-                                 start_date=start, end_date=end, adjust="")
-            df['date'] = pd.to_datetime(df['日期'])
-            df.set_index('date', inplace=True)
-            return df[['开盘', '收盘', '最高', '最低', '成交量']]
+            return get_hk_price(symbol, count=days)
         except Exception as e:
             print(f"获取港股 {symbol} 失败: {e}")
             return None
 
+    def fetch_frames(self, codes, market, data=None):
+        """一块证券的K线 {代码: df}: 先取 collect() 已采集的, 其余现场获取 (A股一次批量, 港股并发)"""
+        collected = data[market] if data is not None else {}
+        frames = {code: collected[code] for code in codes if code in collected}
+        missing = [code for code in codes if code not in frames]
+        if missing and market == 'a':
+            panel = self.get_a_panel(missing, days=10)
+            frames.update({code: panel.xs(code, axis=1, level=1).dropna(how='all') if panel is not None else None
+                           for code in missing})
+        elif missing:
+            frames.update(self.gather({code: (lambda code=code: self.get_hk_stock(code, days=10))
+                                       for code in missing}))
+        return frames
+
+    def screen(self, market, data=None):
+        """在证券池的 market 市场部分上运行选股器, 返回 (证券池, 各板块前N名)"""
+        universe = self.universe[self.universe['market'] == market]
+        return universe, self.screener.run(universe, lambda codes: self.fetch_frames(codes, market, data))
+
     def analyze_trend(self, df, stock_name):
         """分析趋势"""
         if df is None or len(df) < 3:
             return None
+        return self.format_trend(stock_name, Indicators(make_panel({stock_name: df})).snapshot().iloc[0])
 
-        latest = df.iloc[-1]
-        prev = df.iloc[-2]
-
-        close = latest['close'] if 'close' in df.columns else latest['收盘']
-        prev_close = prev['close'] if 'close' in df.columns else prev['收盘']
-
-        change_pct = ((close - prev_close) / prev_close) * 100
-
-        # 计算5日涨跌幅
-        five_days_ago = df.iloc[-5]['close'] if 'close' in df.columns else df.iloc[-5]['收盘']
-        five_day_pct = ((close - five_days_ago) / five_days_ago) * 100
-
-        trend = "🔺 上涨" if change_pct > 0 else "🔻 下跌"
+    def trend_table(self, frames):
+        """多只证券一次算完全部指标 (行为代码, 列见 Indicators.snapshot); 不足3根K线的证券不在表中"""
+        frames = {code: df for code, df in frames.items() if df is not None and len(df) >= 3}
+        return Indicators(make_panel(frames)).snapshot()
 
+    @staticmethod
+    def format_trend(stock_name, row):
+        """指标行 → 日报展示用的字典"""
+        trend = "🔺 上涨" if row['change_pct'] > 0 else "🔻 下跌"
         return {
             'name': stock_name,
-            'price': f"{close:.2f}",
-            'change': f"{trend} {change_pct:+.2f}%",
-            '5day_change': f"{five_day_pct:+.2f}%",
-            'volume': f"{latest['volume']:,.0f}" if 'volume' in df.columns else f"{latest['成交量']:,.0f}"
+            'price': f"{row['close']:.2f}",
+            'change': f"{trend} {row['change_pct']:+.2f}%",
+            '5day_change': f"{row['change_5d_pct']:+.2f}%",
+            'volume': f"{row['volume']:,.0f}"
         }
 
-    def scan_hot_sectors(self):
-        """扫描热点板块"""
+    def scan_hot_sectors(self, data=None):
+        """扫描热点板块; data 为 collect() 的结果, 缺省时现场获取"""
         print("\n🔥 热点板块扫描:" + "="*50)
 
-        # 有色金属板块
-        print("\n【有色金属】")
-        stocks = {
-            '紫金矿业': 'sh601899',
-            '山东黄金': 'sh600547',
-            '中金黄金': 'sh600489',
-            '江西铜业': 'sh600362'
-        }
-
-        for name, code in stocks.items():
-            df = self.get_a_stock(code, days=10)
-            if df is not None:
-                result = self.analyze_trend(df, name)
-                if result:
-                    print(f"  {result['name']}: {result['price']}元 | {result['change']} | 5日: {result['5day_change']}")
+        universe, table = self.screen('a', data)
+        for sector in universe['sector'].unique():
+            print(f"\n【{sector}】")
+            for code, row in table[table['sector'] == sector].iterrows():
+                result = self.format_trend(row['name'], row)
+                print(f"  {result['name']}: {result['price']}元 | {result['change']} | 5日: {result['5day_change']}")
+        return table
 
-    def scan_hk_connect(self):
-        """扫描港股通热门股"""
+    def scan_hk_connect(self, data=None):
+        """扫描港股通热门股; data 为 collect() 的结果, 缺省时现场获取"""
         print("\n🌏 港股通扫描:" + "="*50)
 
-        hk_stocks = {
-            '腾讯控股': '00700',
-            '美团-W': '03690',
-            '小米集团-W': '01810',
-            '比亚迪股份': '01211',
-            '药明生物': '02269'
-        }
-
-        for name, symbol in hk_stocks.items():
-            df = self.get_hk_stock(symbol, days=10)
-            if df is not None:
-                result = self.analyze_trend(df, name)
-                if result:
-                    print(f"  {result['name']}: HK${result['price']} | {result['change']} | 5日: {result['5day_change']}")
+        _, table = self.screen('hk', data)
+        for code, row in table.iterrows():
+            result = self.format_trend(row['name'], row)
+            print(f"  {result['name']}: HK${result['price']} | {result['change']} | 5日: {result['5day_change']}")
+        return table
 
-    def analyze_index(self):
-        """分析指数"""
+    def analyze_index(self, data=None):
+        """分析指数; data 为 collect() 的结果, 缺省时现场获取"""
         print("\n📊 大盘指数:" + "="*50)
 
-        indices = {
-            '上证指数': 'sh000001',
-            '深证成指': 'sz399001',
-            '创业板指': 'sz399006'
-        }
-
-        for name, code in indices.items():
-            df = self.get_a_stock(code, days=5)
-            if df is not None:
-                result = self.analyze_trend(df, name)
-                if result:
-                    print(f"  {result['name']}: {result['price']} | {result['change']}")
+        frames = {code: data['a'].get(code) if data is not None else self.get_a_stock(code, days=5)
+                  for code in INDICES.values()}
+        table = self.trend_table(frames)
+        for name, code in INDICES.items():
+            if code in table.index:
+                result = self.format_trend(name, table.loc[code])
+                print(f"  {result['name']}: {result['price']} | {result['change']}")
+        names = pd.Series({code: name for name, code in INDICES.items()}, name='name')
+        return names.to_frame().join(table, how='inner')
 
-    def daily_report(self):
-        """生成日报"""
+    def daily_report(self, data=None):
+        """生成日报: 先并发采集全部数据 (或使用传入的 collect() 格式数据), 再逐项分析; 返回各阶段耗时 (秒)"""
+        self.timings, self.results = {}, {}
         print("\n" + "="*60)
         print(f"📊 野码AI财经日报 [{self.today}]")
         print("="*60)
 
-        self.analyze_index()
-        self.scan_hot_sectors()
-        self.scan_hk_connect()
+        if data is None:
+            with self.stage('collect'):
+                data = self.collect()
+        with self.stage('analyze_index'):
+            self.results['index'] = self.analyze_index(data)
+        with self.stage('scan_hot_sectors'):
+            self.results['hot_sectors'] = self.scan_hot_sectors(data)
+        with self.stage('scan_hk_connect'):
+            self.results['hk_connect'] = self.scan_hk_connect(data)
 
         print("\n" + "="*60)
         print("⚡ 投资建议:")
         print("="*60)
-        self.generate_recommendations()
+        with self.stage('recommendations'):
+            self.generate_recommendations()
+
+        print("\n⏱️ 耗时: " + " | ".join(f"{name} {seconds:.2f}s" for name, seconds in self.timings.items()))
+        return self.timings
 
     def generate_recommendations(self):
         """生成投资建议"""
@@ -148,5 +245,14 @@ class FinancialAnalyzer:
         print("  - 大盘指数震荡,控制仓位")
 
 if __name__ == '__main__':
-    analyzer = FinancialAnalyzer()
+    parser = argparse.ArgumentParser(description="野码AI财经日报")
+    parser.add_argument("--universe", help="证券池CSV (code,name,sector[,market][,index]), 缺省为内置板块和港股通")
+    parser.add_argument("--index", help="只扫描该指数的成分股")
+    parser.add_argument("--filter", help='筛选表达式, 例如 "rsi14 < 70 and close > ma20"')
+    parser.add_argument("--rank", help='排序表达式 (越大越靠前), 例如 "change_5d_pct + 2 * volume_z20"')
+    parser.add_argument("--top", type=int, help="每个板块展示前N名")
+    args = parser.parse_args()
+
+    universe = load_universe(args.universe, index=args.index) if args.universe else None
+    analyzer = FinancialAnalyzer(universe=universe, screener=Screener(args.filter, args.rank, args.top))
     analyzer.daily_report()
@@ -1,27 +1,51 @@
 """
 Task API Routes
 """
-from fastapi import APIRouter, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Query, Response, status
 from typing import List, Optional
 from models.task import Task, TaskCreate, TaskUpdate, TaskStatus
+from services.executor import ExecutorFull
 from services.task_service import task_service
-from services.agent_service import agent_service
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
 
 @router.get("", response_model=List[Task], summary="列出所有任务")
 async def list_tasks(
-    status: Optional[TaskStatus] = None,
-    agent_id: Optional[str] = None
+    response: Response,
+    task_status: Optional[TaskStatus] = Query(None, alias="status"),
+    agent_id: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None
 ):
     """
-    列出所有任务
+    列出所有任务（按创建时间倒序）
 
     - **status**: 可选，按状态筛选
     - **agent_id**: 可选，按Agent筛选
+    - **limit**: 可选，每页条数，不传返回全部
+    - **cursor**: 可选，上一页响应头 X-Next-Cursor 的值；没有该响应头表示已到最后一页
     """
-    return await task_service.list_tasks(status, agent_id)
+    try:
+        tasks, next_cursor = await task_service.list_tasks_page(task_status, agent_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return tasks
+
+
+@router.get("/executor/metrics", summary="获取执行池指标")
+async def executor_metrics():
+    """
+    执行池指标: 队列深度, 活跃worker数, 各Agent执行中的任务数, 完成/失败/超时/重试/取消计数,
+    以及排队、单次执行、端到端耗时 (秒) 的均值和 p50/p95/p99;
+    使用队列后端 (TASK_QUEUE_BACKEND=redis) 时另有队列深度
+    """
+    return task_service.execution_metrics()
 
 
 @router.get("/{task_id}", response_model=Task, summary="获取任务详情")
@@ -46,14 +70,15 @@ async def create_task(task_data: TaskCreate):
     - **title**: 任务标题
     - **description**: 可选，任务描述
     - **priority**: 优先级（low/medium/high/urgent）
-    - **skill_requirements**: 可选，需要的技能列表
+    - **skill_requirements**: 可选，需要的技能列表（技能ID或技能类别）
+    - **skill_match**: 可选，all=全部具备（默认）/ any=具备任一
     - **context**: 可选，任务上下文
+    - **timeout_seconds**: 可选，单次执行超时（秒）
+    - **max_retries**: 可选，失败或超时后的最多重试次数
     - **preferred_agent_id**: 可选，首选Agent ID
     """
-    # 获取所有可用Agents
-    agents = await agent_service.list_agents(status=None)
-    
-    task = await task_service.create_task(task_data, agents)
+    # Agent及其技能由Agent服务的技能索引维护, 这里不再逐个扫描
+    task = await task_service.create_task(task_data)
     return task
 
 
@@ -70,7 +95,13 @@ async def update_task(task_id: str, update_data: TaskUpdate):
     - **result**: 可选，执行结果
     - **error**: 可选，错误信息
     """
-    task = await task_service.update_task(task_id, update_data)
+    try:
+        task = await task_service.update_task(task_id, update_data)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -94,37 +125,49 @@ async def delete_task(task_id: str):
 
 
 @router.post("/{task_id}/execute", summary="执行任务")
-async def execute_task(task_id: str, background_tasks: BackgroundTasks):
+async def execute_task(task_id: str):
     """
     执行指定任务
 
-    系统会自动分配最合适的Agent并执行任务
+    任务交给执行池 (或队列后端的worker进程) 排队, 在分配的Agent上执行
+    (受Agent并发上限、超时和重试策略约束); 执行进度通过任务详情查看
     """
     try:
-        # 获取所有可用Agents
-        agents = await agent_service.list_agents(status=None)
-        
-        # 异步执行任务
-        background_tasks.add_task(task_service.execute_task, task_id, agents)
-        
-        return {
-            "task_id": task_id,
-            "status": "executing",
-            "message": "Task execution started"
-        }
+        future = await task_service.submit_execution(task_id)
+    except ExecutorFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
+    if future is not None and future.done():
+        outcome = future.result()
+        return {
+            "task_id": task_id,
+            "status": outcome.status.value,
+            "message": outcome.error
+        }
+    return {
+        "task_id": task_id,
+        "status": "queued",
+        "message": "Task queued for execution",
+        "queue_depth": task_service.queue_depth()
+    }
+
 
 @router.post("/{task_id}/cancel", response_model=Task, summary="取消任务")
 async def cancel_task(task_id: str):
     """
     取消指定任务
+
+    排队中的任务出队, 执行中的任务停止执行
     """
-    task = await task_service.update_task(task_id, TaskUpdate(status=TaskStatus.CANCELLED))
+    task = await task_service.cancel_task(task_id)
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,137 @@
+"""
+Executor Simulation - 任务执行池基准
+
+N个模拟Agent, 每个Agent同时处理超过4个请求后按比例变慢 (模拟限流/排队的后端API);
+单次执行基准时长服从均值20ms的对数正态分布, 3%的任务第一次执行时报错, 1%第一次执行时卡住 (hang 秒).
+对比:
+  background  旧逻辑 BackgroundTasks: 每个任务立即并发执行, 不限并发, 无超时, 无重试
+  pool        TaskExecutor: 有界队列, 每个Agent并发上限, 超时, 指数退避重试
+另外在 pool 下随机取消10%的任务, 检查被取消的任务确实停止执行.
+报告墙钟耗时, 成功/失败数, 单个Agent的最大并发, 端到端耗时 p50/p99 (秒).
+
+用法: python benchmarks/executor_sim.py [--agents 8] [--tasks 2000] [--hang 2.0]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.task import TaskStatus
+from services.executor import TaskExecutor
+
+SATURATION = 4          # Agent同时处理超过该数量后变慢
+
+
+class SimAgents:
+    """模拟Agent后端, 记录每个Agent的并发和每个任务的执行情况"""
+
+    def __init__(self, n_tasks, hang, seed=1):
+        rng = random.Random(seed)
+        self.base = [rng.lognormvariate(-4.0, 0.5) for _ in range(n_tasks)]          # 均值约20ms
+        self.fault = ["error" if r < 0.03 else "hang" if r < 0.04 else None
+                      for r in (rng.random() for _ in range(n_tasks))]
+        self.hang = hang
+        self.running = defaultdict(int)
+        self.peak = defaultdict(int)
+        self.attempts = defaultdict(int)
+        self.finished_runs = set()              # 执行完 (未被中途取消) 的任务
+
+    async def run(self, task_id, agent_id):
+        i = int(task_id)
+        self.attempts[i] += 1
+        self.running[agent_id] += 1
+        self.peak[agent_id] = max(self.peak[agent_id], self.running[agent_id])
+        try:
+            fault = self.fault[i] if self.attempts[i] == 1 else None
+            if fault == "hang":
+                await asyncio.sleep(self.hang)
+            slowdown = max(1.0, self.running[agent_id] / SATURATION)
+            await asyncio.sleep(self.base[i] * slowdown)
+            if fault == "error":
+                raise RuntimeError("upstream error")
+            self.finished_runs.add(i)
+            return {"task": i}
+        finally:
+            self.running[agent_id] -= 1
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else float("nan")
+
+
+async def run_background(n_agents, n_tasks, hang):
+    sim = SimAgents(n_tasks, hang)
+    start = time.perf_counter()
+    latencies, ok = [], 0
+
+    async def one(i):
+        nonlocal ok
+        try:
+            await sim.run(str(i), f"agent-{i % n_agents}")
+            ok += 1
+        except Exception:
+            pass
+        latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(n_tasks)))
+    return time.perf_counter() - start, ok, n_tasks - ok, max(sim.peak.values()), latencies, None
+
+
+async def run_pool(n_agents, n_tasks, hang, cancel_share=0.0):
+    sim = SimAgents(n_tasks, hang)
+    executor = TaskExecutor(sim.run, workers=4 * n_agents, queue_size=n_tasks, agent_limit=SATURATION,
+                            timeout=0.5, max_retries=2, backoff=0.01, backoff_max=0.1)
+    start = time.perf_counter()
+    futures = [executor.submit(str(i), f"agent-{i % n_agents}") for i in range(n_tasks)]
+    latencies = []
+    for future in futures:
+        future.add_done_callback(lambda _: latencies.append(time.perf_counter() - start))
+    cancelled = set()
+    if cancel_share:
+        rng = random.Random(2)
+        await asyncio.sleep(0.05)
+        for i in rng.sample(range(n_tasks), int(cancel_share * n_tasks)):
+            if await executor.cancel(str(i)):
+                cancelled.add(i)
+    outcomes = await asyncio.gather(*futures)
+    elapsed = time.perf_counter() - start
+    metrics = executor.metrics()
+    await executor.shutdown()
+    ok = sum(o.status == TaskStatus.COMPLETED for o in outcomes)
+    failed = sum(o.status == TaskStatus.FAILED for o in outcomes)
+    cancelled_ok = {i for i in cancelled if outcomes[i].status == TaskStatus.CANCELLED}
+    leaked = len(cancelled_ok & sim.finished_runs)              # 报告已取消却仍执行完的任务
+    return elapsed, ok, failed, max(sim.peak.values()), latencies, (metrics, len(cancelled), len(cancelled_ok), leaked)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="任务执行池基准")
+    parser.add_argument("--agents", type=int, default=8)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--hang", type=float, default=2.0, help="卡住的任务第一次执行的时长 (秒)")
+    args = parser.parse_args()
+
+    print(f"{args.agents} agents (slow down above {SATURATION} concurrent), {args.tasks} tasks, "
+          f"3% first-attempt errors, 1% first-attempt hangs of {args.hang}s")
+    print(f"  {'mode':<12}{'wall s':>8}{'ok':>7}{'failed':>8}{'peak/agent':>12}{'p50 s':>8}{'p99 s':>8}")
+    for name, runner in [("background", run_background), ("pool", run_pool)]:
+        elapsed, ok, failed, peak, latencies, _ = await runner(args.agents, args.tasks, args.hang)
+        print(f"  {name:<12}{elapsed:>8.2f}{ok:>7}{failed:>8}{peak:>12}"
+              f"{percentile(latencies, 0.5):>8.2f}{percentile(latencies, 0.99):>8.2f}")
+
+    _, ok, failed, _, _, (metrics, n_cancelled, cancelled_ok, leaked) = await run_pool(
+        args.agents, args.tasks, args.hang, cancel_share=0.1)
+    print(f"\npool with 10% cancelled: {n_cancelled} cancelled ({cancelled_ok} stopped, "
+          f"{leaked} of those still ran to completion), {ok} ok, {failed} failed")
+    print(f"  retried {metrics['retried']}, timed out {metrics['timed_out']}, "
+          f"queue wait p99 {metrics['latency_seconds']['queue_wait']['p99']:.3f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
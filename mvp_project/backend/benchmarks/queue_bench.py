@@ -0,0 +1,296 @@
+"""
+Queue Backend Benchmark - 任务队列后端基准
+
+FakeRedis 在进程内实现 RedisStreamBackend 用到的命令 (Streams 消费组, hash, set), 返回格式同
+redis-py (decode_responses=True), 每条命令可加模拟网络往返 (--rtt-ms). 多个worker各自一个线程和事件循环,
+模拟多个worker进程共用一个任务池. 每个任务在Agent上执行 --work-ms 毫秒 (asyncio.sleep).
+  throughput  memory / redis-stream 两种后端, 1~8个worker的吞吐 (tasks/s)
+  crash       一个worker认领一批任务后崩溃 (不确认), 其余worker在可见超时后接手;
+              检查全部任务都完成, 以及重复执行的数量
+
+用法: python benchmarks/queue_bench.py [--tasks 4000] [--workers 1 2 4 8] [--concurrency 16]
+                                      [--work-ms 5] [--rtt-ms 0.1]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.queue_backend import MemoryQueueBackend, RedisStreamBackend
+from services.queue_worker import QueueWorker
+
+
+class ResponseError(Exception):
+    pass
+
+
+def _parse_id(message_id):
+    ms, _, seq = message_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+class FakeRedis:
+    """进程内Redis替身, 只实现队列后端用到的命令; 线程安全"""
+
+    def __init__(self, rtt_ms=0.0):
+        self.rtt = rtt_ms / 1000
+        self._cond = threading.Condition()
+        self._streams = {}          # name -> OrderedDict(id -> fields)
+        self._groups = {}           # (name, group) -> {"last": id, "pel": OrderedDict(id -> [consumer, 时间, 次数])}
+        self._hashes = {}
+        self._sets = {}
+        self._last_id = (0, 0)
+        self.commands = Counter()
+
+    def _call(self, name):
+        self.commands[name] += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+
+    def _now_ms(self):
+        return int(time.time() * 1000)
+
+    # ---------- streams ----------
+    def xgroup_create(self, name, groupname, id="$", mkstream=False):
+        self._call("xgroup_create")
+        with self._cond:
+            if name not in self._streams:
+                if not mkstream:
+                    raise ResponseError("ERR The XGROUP subcommand requires the key to exist")
+                self._streams[name] = OrderedDict()
+            if (name, groupname) in self._groups:
+                raise ResponseError("BUSYGROUP Consumer Group name already exists")
+            last = self._format_id(self._last_id) if id == "$" else id
+            self._groups[name, groupname] = {"last": last, "pel": OrderedDict()}
+            return True
+
+    def _format_id(self, parts):
+        return f"{parts[0]}-{parts[1]}"
+
+    def xadd(self, name, fields, id="*"):
+        self._call("xadd")
+        with self._cond:
+            ms = self._now_ms()
+            self._last_id = (ms, 0) if ms > self._last_id[0] else (self._last_id[0], self._last_id[1] + 1)
+            message_id = self._format_id(self._last_id)
+            self._streams.setdefault(name, OrderedDict())[message_id] = dict(fields)
+            self._cond.notify_all()
+            return message_id
+
+    def xlen(self, name):
+        self._call("xlen")
+        with self._cond:
+            return len(self._streams.get(name, ()))
+
+    def xdel(self, name, *ids):
+        self._call("xdel")
+        with self._cond:
+            stream = self._streams.get(name, {})
+            return sum(stream.pop(message_id, None) is not None for message_id in ids)
+
+    def xreadgroup(self, groupname, consumername, streams, count=None, block=None, noack=False):
+        self._call("xreadgroup")
+        (name, _), = streams.items()
+        deadline = time.monotonic() + block / 1000 if block else None
+        with self._cond:
+            while True:
+                group = self._groups[name, groupname]
+                last = _parse_id(group["last"])
+                entries = []
+                for message_id, fields in self._streams[name].items():
+                    if _parse_id(message_id) > last:
+                        entries.append((message_id, dict(fields)))
+                        if count and len(entries) >= count:
+                            break
+                if entries:
+                    now = self._now_ms()
+                    for message_id, _ in entries:
+                        group["pel"][message_id] = [consumername, now, 1]
+                    group["last"] = entries[-1][0]
+                    return [[name, entries]]
+                if deadline is None or time.monotonic() >= deadline:
+                    return []
+                self._cond.wait(deadline - time.monotonic())
+
+    def xautoclaim(self, name, groupname, consumername, min_idle_time, start_id="0-0", count=None, justid=False):
+        self._call("xautoclaim")
+        with self._cond:
+            pel = self._groups[name, groupname]["pel"]
+            stream = self._streams[name]
+            now = self._now_ms()
+            start = _parse_id(start_id)
+            claimed, deleted = [], []
+            for message_id in list(pel):
+                if _parse_id(message_id) < start or now - pel[message_id][1] < min_idle_time:
+                    continue
+                if message_id not in stream:
+                    del pel[message_id]
+                    deleted.append(message_id)
+                    continue
+                entry = pel[message_id]
+                entry[0], entry[1], entry[2] = consumername, now, entry[2] + 1
+                claimed.append((message_id, dict(stream[message_id])))
+                if count and len(claimed) >= count:
+                    break
+            return ["0-0", claimed, deleted]
+
+    def xclaim(self, name, groupname, consumername, min_idle_time, message_ids, justid=False):
+        self._call("xclaim")
+        with self._cond:
+            pel = self._groups[name, groupname]["pel"]
+            now = self._now_ms()
+            claimed = []
+            for message_id in message_ids:
+                entry = pel.get(message_id)
+                if entry is not None and now - entry[1] >= min_idle_time:
+                    entry[0], entry[1] = consumername, now      # JUSTID 不增加投递次数
+                    claimed.append(message_id)
+            return claimed
+
+    def xpending_range(self, name, groupname, min, max, count, consumername=None, idle=None):
+        self._call("xpending_range")
+        with self._cond:
+            pel = self._groups[name, groupname]["pel"]
+            low, high = _parse_id(min), _parse_id(max)
+            now = self._now_ms()
+            return [{"message_id": message_id, "consumer": consumer, "time_since_delivered": now - delivered,
+                     "times_delivered": times}
+                    for message_id, (consumer, delivered, times) in pel.items()
+                    if low <= _parse_id(message_id) <= high][:count]
+
+    def xack(self, name, groupname, *ids):
+        self._call("xack")
+        with self._cond:
+            pel = self._groups[name, groupname]["pel"]
+            return sum(pel.pop(message_id, None) is not None for message_id in ids)
+
+    # ---------- hash / set ----------
+    def hset(self, name, key, value):
+        self._call("hset")
+        with self._cond:
+            self._hashes.setdefault(name, {})[key] = value
+            return 1
+
+    def hmget(self, name, keys):
+        self._call("hmget")
+        with self._cond:
+            values = self._hashes.get(name, {})
+            return [values.get(key) for key in keys]
+
+    def hdel(self, name, *keys):
+        self._call("hdel")
+        with self._cond:
+            values = self._hashes.get(name, {})
+            return sum(values.pop(key, None) is not None for key in keys)
+
+    def sadd(self, name, *values):
+        self._call("sadd")
+        with self._cond:
+            members = self._sets.setdefault(name, set())
+            before = len(members)
+            members.update(values)
+            return len(members) - before
+
+    def smismember(self, name, values):
+        self._call("smismember")
+        with self._cond:
+            members = self._sets.get(name, set())
+            return [value in members for value in values]
+
+    def srem(self, name, *values):
+        self._call("srem")
+        with self._cond:
+            members = self._sets.get(name, set())
+            return sum(value in members and not members.discard(value) for value in values)
+
+
+class WorkerThread(threading.Thread):
+    """一个worker "进程": 独立线程和事件循环"""
+
+    def __init__(self, backend, name, concurrency, work_ms, executions):
+        super().__init__(daemon=True)
+        self.backend, self.worker_name, self.concurrency = backend, name, concurrency
+        self.work_ms, self.executions = work_ms, executions
+        self.loop = None
+        self.stop = None
+        self.ready = threading.Event()
+
+    async def runner(self, payload):
+        await asyncio.sleep(self.work_ms / 1000)
+        self.executions[payload["task_id"]] += 1
+        return {"task": payload["title"]}
+
+    async def main(self):
+        self.loop, self.stop = asyncio.get_running_loop(), asyncio.Event()
+        self.ready.set()
+        worker = QueueWorker(self.backend, self.runner, self.worker_name, self.concurrency, poll_ms=50,
+                             agent_limit=self.concurrency, timeout=30.0)
+        await worker.run(self.stop)
+
+    def run(self):
+        asyncio.run(self.main())
+
+    def shutdown(self):
+        self.loop.call_soon_threadsafe(self.stop.set)
+        self.join()
+
+
+def run_workers(backend, n_tasks, n_workers, concurrency, work_ms, crash_batch=0):
+    """放入 n_tasks 个任务, 启动 n_workers 个worker直到全部确认; 返回 (秒, 每个任务的执行次数)"""
+    executions = Counter()
+    for i in range(n_tasks):
+        backend.enqueue({"task_id": f"task-{i}", "agent_id": f"agent-{i % 8}", "title": f"task {i}",
+                         "context": {}, "timeout_seconds": None, "max_retries": None})
+    if crash_batch:
+        backend.claim("crashed-worker", crash_batch)      # 认领后不再确认
+    start = time.perf_counter()
+    threads = [WorkerThread(backend, f"worker-{w}", concurrency, work_ms, executions) for w in range(n_workers)]
+    for thread in threads:
+        thread.start()
+        thread.ready.wait()
+    while backend.depth():
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    for thread in threads:
+        thread.shutdown()
+    return elapsed, executions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="任务队列后端基准")
+    parser.add_argument("--tasks", type=int, default=4000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--concurrency", type=int, default=16, help="每个worker同时执行的任务数")
+    parser.add_argument("--work-ms", type=float, default=5.0, help="每个任务在Agent上的耗时")
+    parser.add_argument("--rtt-ms", type=float, default=0.1, help="FakeRedis每条命令的模拟往返")
+    args = parser.parse_args()
+
+    print(f"{args.tasks} tasks x {args.work_ms} ms, concurrency {args.concurrency}/worker, "
+          f"fake redis rtt {args.rtt_ms} ms")
+    print(f"  {'backend':<14}" + "".join(f"{f'{w} worker(s)':>14}" for w in args.workers) + "   (tasks/s)")
+    for name in ["memory", "redis-stream"]:
+        cells = []
+        for n_workers in args.workers:
+            backend = MemoryQueueBackend() if name == "memory" else RedisStreamBackend(FakeRedis(args.rtt_ms))
+            elapsed, executions = run_workers(backend, args.tasks, n_workers, args.concurrency, args.work_ms)
+            assert len(executions) == args.tasks
+            cells.append(f"{args.tasks / elapsed:>14.0f}")
+        print(f"  {name:<14}" + "".join(cells))
+
+    redis = FakeRedis(args.rtt_ms)
+    backend = RedisStreamBackend(redis, visibility_timeout=0.5)
+    crash_batch = args.tasks // 10
+    elapsed, executions = run_workers(backend, args.tasks, 4, args.concurrency, args.work_ms, crash_batch)
+    duplicates = sum(n > 1 for n in executions.values())
+    print(f"\ncrash: {crash_batch} tasks claimed by a crashed worker, visibility timeout 0.5 s, 4 workers")
+    print(f"  completed {len(executions)}/{args.tasks} in {elapsed:.2f}s, executed twice {duplicates}, "
+          f"redis commands per task {sum(redis.commands.values()) / args.tasks:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Skill Match Benchmark - 技能匹配基准
+
+随机生成N个Agent (300个技能分属30个类别, 每个Agent 3~12个技能, 技能热度服从 Zipf 分布),
+和一批技能要求 (1~3个技能ID或类别, all/any 各半), 对比:
+  scan   逐个Agent检查技能 (原 find_best_agent 的做法, 每个Agent的技能集合已预先算好)
+  index  SkillIndex 集合运算
+报告每次匹配的微秒数, 以及更新一个Agent技能的索引维护开销.
+
+用法: python benchmarks/skill_match.py [--agents 1000 5000 20000] [--queries 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.agent import Agent, AgentStatus, Skill
+from services.skill_index import SkillIndex
+
+N_SKILLS, N_CATEGORIES = 300, 30
+
+
+def make_agents(n_agents, rng):
+    skills = [Skill(id=f"skill_{i:03d}", name=f"skill {i}", category=f"category_{i % N_CATEGORIES:02d}")
+              for i in range(N_SKILLS)]
+    popularity = [1.0 / (rank + 1) for rank in range(N_SKILLS)]
+    agents = []
+    for i in range(n_agents):
+        chosen = {id(s): s for s in rng.choices(skills, weights=popularity, k=rng.randint(3, 12))}
+        status = AgentStatus.ACTIVE if rng.random() < 0.9 else AgentStatus.INACTIVE
+        agents.append(Agent(id=f"agent_{i}", name=f"Agent {i}", status=status, skills=list(chosen.values())))
+    return skills, agents
+
+
+def make_queries(n_queries, skills, rng):
+    popularity = [1.0 / (rank + 1) for rank in range(N_SKILLS)]
+    queries = []
+    for _ in range(n_queries):
+        picked = rng.choices(skills, weights=popularity, k=rng.randint(1, 3))
+        keys = [s.category if rng.random() < 0.2 else s.id for s in picked]
+        queries.append((keys, "all" if rng.random() < 0.5 else "any"))
+    return queries
+
+
+def scan_match(agents, agent_keys, keys, mode):
+    wanted = set(keys)
+    if mode == "any":
+        return {a.id for a in agents if a.status == AgentStatus.ACTIVE and agent_keys[a.id] & wanted}
+    return {a.id for a in agents if a.status == AgentStatus.ACTIVE and wanted <= agent_keys[a.id]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="技能匹配基准")
+    parser.add_argument("--agents", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{N_SKILLS} skills in {N_CATEGORIES} categories, {args.queries} queries (1-3 keys, all/any)")
+    print(f"  {'agents':>8}{'scan us':>10}{'index us':>10}{'speedup':>9}{'update us':>11}{'avg matches':>13}")
+    for n_agents in args.agents:
+        rng = random.Random(n_agents)
+        skills, agents = make_agents(n_agents, rng)
+        queries = make_queries(args.queries, skills, rng)
+        agent_keys = {a.id: SkillIndex.skill_keys(a) for a in agents}
+        index = SkillIndex()
+        for agent in agents:
+            index.add(agent)
+
+        start = time.perf_counter()
+        expected = [scan_match(agents, agent_keys, keys, mode) for keys, mode in queries]
+        scan_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+        start = time.perf_counter()
+        results = [index.match(keys, mode) for keys, mode in queries]
+        index_us = (time.perf_counter() - start) / len(queries) * 1e6
+        assert results == expected
+
+        sample = rng.sample(agents, min(1000, n_agents))
+        start = time.perf_counter()
+        for agent in sample:
+            agent.skills = rng.sample(skills, len(agent.skills))
+            index.add(agent)
+        update_us = (time.perf_counter() - start) / len(sample) * 1e6
+
+        matches = sum(len(r) for r in results) / len(results)
+        print(f"  {n_agents:>8}{scan_us:>10.1f}{index_us:>10.1f}{scan_us / index_us:>8.0f}x"
+              f"{update_us:>11.1f}{matches:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
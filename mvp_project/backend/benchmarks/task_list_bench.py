@@ -0,0 +1,107 @@
+"""
+Task List Benchmark - 任务列表查询基准
+
+生成N个历史任务 (completed 85%, failed 8%, cancelled 4%, pending 2%, running 1%; 20个Agent),
+对比列出任务的两种做法 (每次查询的微秒数):
+  scan   原 list_tasks: 复制全部任务, 列表推导过滤 status/agent_id, 再按 created_at 全量排序
+  index  TaskStore.page: 直接取对应索引, 从新到旧取 limit 条
+查询模拟前端轮询: 首页50条, 按状态筛选 (running/pending 全部), 按Agent+状态的首页, 以及不分页列出全部
+(并检查按游标翻完所有页的结果与之一致);
+另报告状态更新 (reindex) 的维护开销.
+
+用法: python benchmarks/task_list_bench.py [--tasks 10000 50000] [--repeat 50]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.task import Task, TaskStatus
+from services.task_store import TaskStore
+
+STATUS_MIX = [(TaskStatus.COMPLETED, 0.85), (TaskStatus.FAILED, 0.08), (TaskStatus.CANCELLED, 0.04),
+              (TaskStatus.PENDING, 0.02), (TaskStatus.RUNNING, 0.01)]
+AGENTS = [f"agent-{i}" for i in range(20)]
+
+
+def make_tasks(n, rng):
+    statuses, weights = zip(*STATUS_MIX)
+    start = datetime(2026, 1, 1)
+    return [Task(id=f"task-{i:07d}", title=f"task {i}", created_at=start + timedelta(seconds=i),
+                 status=rng.choices(statuses, weights)[0], agent_id=rng.choice(AGENTS))
+            for i in range(n)]
+
+
+def scan_list(tasks, status=None, agent_id=None, limit=None):
+    """原 list_tasks 的做法; 分页只能在排序后切片"""
+    result = list(tasks.values())
+    if status:
+        result = [t for t in result if t.status == status]
+    if agent_id:
+        result = [t for t in result if t.agent_id == agent_id]
+    result.sort(key=lambda t: t.created_at, reverse=True)
+    return result[:limit] if limit else result
+
+
+def index_all_pages(store, status=None, agent_id=None, limit=50):
+    tasks, cursor = store.page(status, agent_id, limit)
+    while cursor:
+        page, cursor = store.page(status, agent_id, limit, cursor)
+        tasks.extend(page)
+    return tasks
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1e6, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="任务列表查询基准")
+    parser.add_argument("--tasks", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    queries = [
+        ("first page (50)", dict(limit=50)),
+        ("status=running", dict(status=TaskStatus.RUNNING)),
+        ("status=pending", dict(status=TaskStatus.PENDING)),
+        ("agent+completed p1", dict(status=TaskStatus.COMPLETED, agent_id="agent-3", limit=50)),
+    ]
+    for n in args.tasks:
+        rng = random.Random(n)
+        tasks = make_tasks(n, rng)
+        by_id = {t.id: t for t in tasks}
+        store = TaskStore()
+        for task in tasks:
+            store.add(task)
+
+        print(f"\n{n} tasks")
+        print(f"  {'query':<22}{'scan us':>11}{'index us':>11}{'speedup':>9}{'rows':>7}")
+        for name, query in queries:
+            scan_us, expected = timed(lambda: scan_list(by_id, **query), args.repeat)
+            index_us, (result, _) = timed(lambda: store.page(**query), args.repeat)
+            assert [t.id for t in result] == [t.id for t in expected]
+            print(f"  {name:<22}{scan_us:>11.1f}{index_us:>11.1f}{scan_us / index_us:>8.0f}x{len(result):>7}")
+
+        scan_us, expected = timed(lambda: scan_list(by_id), max(1, args.repeat // 10))
+        index_us, (result, _) = timed(lambda: store.page(), max(1, args.repeat // 10))
+        assert [t.id for t in result] == [t.id for t in expected] == [t.id for t in index_all_pages(store)]
+        print(f"  {'everything':<22}{scan_us:>11.1f}{index_us:>11.1f}{scan_us / index_us:>8.1f}x{len(result):>7}")
+
+        sample = rng.sample(tasks, 2000)
+        start = time.perf_counter()
+        for task in sample:
+            task.status = rng.choice([TaskStatus.RUNNING, TaskStatus.COMPLETED, TaskStatus.FAILED])
+            store.reindex(task)
+        print(f"  reindex after status change: {(time.perf_counter() - start) / len(sample) * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from api.agents import router as agents_router
 from api.tasks import router as tasks_router
 from api.benchmarks import router as benchmarks_router
+from services.task_service import task_service
 
 app = FastAPI(
     title="野码AI Agent Platform",
@@ -21,6 +22,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # 任务列表分页游标
 )
 
 # Include routers
@@ -29,6 +31,12 @@ app.include_router(tasks_router)
 app.include_router(benchmarks_router)
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    # 停止任务执行池的worker
+    await task_service.executor.shutdown()
+
+
 @app.get("/")
 async def root():
     return {
@@ -34,7 +34,11 @@ class Task(BaseModel):
     agent_id: Optional[str] = Field(None, description="分配的Agent ID")
     assigned_agent: Optional[str] = Field(None, description="分配的Agent名称")
     skill_requirements: List[str] = Field(default_factory=list, description="需要的技能列表")
+    skill_match: Literal["all", "any"] = Field(default="all", description="技能要求匹配方式: 全部具备/具备任一")
     context: dict = Field(default_factory=dict, description="任务上下文")
+    timeout_seconds: Optional[float] = Field(None, description="单次执行超时（秒），为空使用执行池默认值")
+    max_retries: Optional[int] = Field(None, description="失败或超时后的最多重试次数，为空使用执行池默认值")
+    attempts: int = Field(default=0, description="已执行次数")
     result: Optional[dict] = Field(None, description="执行结果")
     error: Optional[str] = Field(None, description="错误信息")
     created_at: datetime = Field(default_factory=datetime.utcnow, description="创建时间")
@@ -49,7 +53,10 @@ class TaskCreate(BaseModel):
     description: Optional[str] = None
     priority: TaskPriority = TaskPriority.MEDIUM
     skill_requirements: List[str] = Field(default_factory=list)
+    skill_match: Literal["all", "any"] = "all"
     context: dict = Field(default_factory=dict)
+    timeout_seconds: Optional[float] = Field(None, gt=0)
+    max_retries: Optional[int] = Field(None, ge=0)
     preferred_agent_id: Optional[str] = None
 
 
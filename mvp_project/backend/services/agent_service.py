@@ -4,6 +4,7 @@ Agent Service - Agent业务逻辑
 from typing import List, Optional
 from datetime import datetime
 from models.agent import Agent, AgentRegister, AgentUpdate, AgentStatus, AgentType, Skill
+from services.skill_index import SkillIndex
 
 
 class AgentService:
@@ -12,6 +13,8 @@ class AgentService:
     def __init__(self):
         # 临时使用内存存储，后期迁移到数据库
         self.agents: dict[str, Agent] = {}
+        self.skills: dict[str, Skill] = {}  # 已知技能, 注册/更新时按 skill_ids 关联
+        self.skill_index = SkillIndex()     # 技能 → active Agents, 供任务分配使用
         self._init_default_agents()
 
     def _init_default_agents(self):
@@ -56,6 +59,18 @@ class AgentService:
         ]
         for agent in default_agents:
             self.agents[agent.id] = agent
+            for skill in agent.skills:
+                self.skills[skill.id] = skill
+            self.skill_index.add(agent)
+
+    def _resolve_skills(self, skill_ids: List[str]) -> List[Skill]:
+        """技能ID → 技能; 未知的ID登记为 custom 类别的新技能"""
+        skills = []
+        for skill_id in dict.fromkeys(skill_ids):
+            if skill_id not in self.skills:
+                self.skills[skill_id] = Skill(id=skill_id, name=skill_id, category="custom")
+            skills.append(self.skills[skill_id])
+        return skills
 
     async def list_agents(self, status: Optional[AgentStatus] = None) -> List[Agent]:
         """列出所有Agents"""
@@ -77,10 +92,12 @@ class AgentService:
             id=register_data.id,
             name=register_data.name,
             type=register_data.type,
-            api_key=register_data.api_key
+            api_key=register_data.api_key,
+            skills=self._resolve_skills(register_data.skill_ids)
         )
 
         self.agents[agent.id] = agent
+        self.skill_index.add(agent)
         return agent
 
     async def update_agent(self, agent_id: str, update_data: AgentUpdate) -> Optional[Agent]:
@@ -95,6 +112,10 @@ class AgentService:
             agent.status = update_data.status
         if update_data.api_key:
             agent.api_key = update_data.api_key
+        if update_data.skill_ids is not None:
+            agent.skills = self._resolve_skills(update_data.skill_ids)
+        if update_data.status or update_data.skill_ids is not None:
+            self.skill_index.add(agent)
 
         agent.last_active = datetime.utcnow()
         return agent
@@ -103,6 +124,7 @@ class AgentService:
         """删除Agent"""
         if agent_id in self.agents:
             del self.agents[agent_id]
+            self.skill_index.remove(agent_id)
             return True
         return False
 
@@ -111,9 +133,12 @@ class AgentService:
         agent = self.agents.get(agent_id)
         if not agent:
             raise ValueError(f"Agent {agent_id} not found")
+        return await self.invoke(agent, task, context)
 
+    async def invoke(self, agent: Agent, task: str, context: dict = None) -> dict:
+        """调用给定的Agent; 队列worker用任务载荷中的Agent快照调用, 不要求在本进程注册"""
         if agent.status != AgentStatus.ACTIVE:
-            raise ValueError(f"Agent {agent_id} is not active")
+            raise ValueError(f"Agent {agent.id} is not active")
 
         # 更新最后活跃时间
         agent.last_active = datetime.utcnow()
@@ -121,7 +146,7 @@ class AgentService:
         # TODO: 实现实际的Agent调用逻辑
         # 这里返回模拟结果
         return {
-            "agent_id": agent_id,
+            "agent_id": agent.id,
             "agent_name": agent.name,
             "task": task,
             "status": "completed",
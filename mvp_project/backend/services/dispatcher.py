@@ -0,0 +1,293 @@
+"""
+Task Dispatcher - 优先级队列 + 最小负载分配
+
+- 任务按优先级分四个队列 (URGENT > HIGH > MEDIUM > LOW), 队列内先进先出;
+  等待每满 aging_seconds 秒提升一级, 低优先级任务不会被持续到来的高优先级任务饿死
+- 每个Agent记录在途任务数; 在有空闲容量的Agent中选 在途数/权重 最小的,
+  相同时选最久未分配的 (即加权轮询). 默认派发即占用容量; reserve=False 时派发只选定Agent,
+  由调用方在任务真正开始执行时 acquire, 结束时 complete
+- 有技能要求的任务只派给技能索引 (services/skill_index.py) 匹配到的Agent; 没有任何active Agent
+  具备所需技能时不作限制. 匹配的Agent都没有空闲时跳过该任务, 最多向后看 lookahead 个任务
+- 入队, 派发, 完成都是 O(log n): 四个队列只比较队头, Agent按负载放在堆里 (失效条目惰性丢弃);
+  取堆顶时技能索引中已不是active的Agent (停用/删除, 尚未 sync_agents) 被移出派发范围, 不会再被选中;
+  每种技能要求 (技能集合+匹配方式) 另有一个只含匹配Agent的负载堆, 按需建立, 最多保留 max_skill_groups 个,
+  技能索引变更时全部重建. Agent负载变化时更新它所在的每个堆, 代价与它所属的技能要求种数成正比
+"""
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from models.task import TaskPriority
+from services.skill_index import SkillIndex
+
+# 从高到低
+PRIORITY_ORDER = [TaskPriority.URGENT, TaskPriority.HIGH, TaskPriority.MEDIUM, TaskPriority.LOW]
+
+
+class TaskDispatcher:
+    """任务派发器, 单线程使用 (在事件循环中调用)"""
+
+    def __init__(self, aging_seconds: float = 30.0, clock: Callable[[], float] = time.monotonic,
+                 skill_index: Optional[SkillIndex] = None, lookahead: int = 64, max_skill_groups: int = 256,
+                 reserve: bool = True):
+        self.aging_seconds = aging_seconds
+        self.clock = clock
+        self.skill_index = skill_index
+        self.lookahead = lookahead
+        self.max_skill_groups = max_skill_groups
+        self.reserve = reserve                   # 派发时是否计入在途
+        self._queues: Dict[TaskPriority, list] = {p: [] for p in PRIORITY_ORDER}   # (入队时间, 序号, task_id)
+        self._queued: Dict[str, tuple] = {}      # task_id -> (优先级, 首选Agent, 技能要求, 匹配方式)
+        self._agents: Dict[str, dict] = {}       # agent_id -> {weight, capacity, active, inflight, last, version}
+        self._agent_heap: list = []              # (负载, 上次分配序号, agent_id, version)
+        self._skill_groups: OrderedDict = OrderedDict()  # (技能要求, 匹配方式) -> (匹配的agent_id集合, 负载堆)
+        self._agent_groups: Dict[str, Set[tuple]] = {}   # agent_id -> 它所在的技能要求
+        self._groups_version = None              # 建立技能分组时技能索引的 version
+        self._seq = itertools.count()
+        self.stats = {"submitted": 0, "dispatched": 0, "completed": 0, "cancelled": 0}
+
+    # ---------- Agents ----------
+    def register_agent(self, agent_id: str, weight: float = 1.0, capacity: Optional[int] = None):
+        """加入或更新Agent; capacity 为同时执行的任务上限 (None 不限)"""
+        state = self._agents.get(agent_id)
+        if state is None:
+            state = self._agents[agent_id] = {"inflight": 0, "version": 0, "last": next(self._seq)}
+        state.update(weight=weight, capacity=capacity, active=True)
+        self._push_agent(agent_id)
+
+    def remove_agent(self, agent_id: str):
+        """移出派发范围 (下线/停用); 在途计数保留, 已派出的任务仍可 complete"""
+        state = self._agents.get(agent_id)
+        if state is not None:
+            state["active"] = False
+            state["version"] += 1
+
+    def sync_agents(self, agent_ids: List[str], capacity: Optional[Callable[[str], Optional[int]]] = None):
+        """以给定的可用Agent列表为准: 新增或恢复的加入, 不在列表中的移出; capacity(agent_id) 给出容量"""
+        wanted = set(agent_ids)
+        for agent_id, state in self._agents.items():
+            if state["active"] and agent_id not in wanted:
+                self.remove_agent(agent_id)
+        for agent_id in agent_ids:
+            state = self._agents.get(agent_id)
+            if state is None or not state["active"]:
+                self.register_agent(agent_id, capacity=capacity(agent_id) if capacity else None)
+
+    def set_capacity(self, agent_id: str, capacity: Optional[int]):
+        """调整已登记Agent的容量"""
+        state = self._agents.get(agent_id)
+        if state is not None:
+            state["capacity"] = capacity
+            self._push_agent(agent_id)
+
+    def inflight(self, agent_id: str) -> int:
+        state = self._agents.get(agent_id)
+        return state["inflight"] if state else 0
+
+    def _has_capacity(self, state: dict) -> bool:
+        return state["capacity"] is None or state["inflight"] < state["capacity"]
+
+    def _push_agent(self, agent_id: str):
+        state = self._agents[agent_id]
+        state["version"] += 1
+        if not (state["active"] and self._has_capacity(state)):
+            return
+        entry = (state["inflight"] / state["weight"], state["last"], agent_id, state["version"])
+        self._agent_heap = self._push(self._agent_heap, entry, len(self._agents))
+        for key in self._agent_groups.get(agent_id, ()):
+            members, heap = self._skill_groups[key]
+            self._skill_groups[key] = (members, self._push(heap, entry, len(members)))
+
+    def _push(self, heap: list, entry: tuple, size: int) -> list:
+        if len(heap) > 4 * size + 64:           # 失效条目过多时重建
+            heap = [item for item in heap if self._valid(item)]
+            heapq.heapify(heap)
+        heapq.heappush(heap, entry)
+        return heap
+
+    def _valid(self, entry: tuple) -> bool:
+        return self._agents.get(entry[2], {}).get("version") == entry[3]
+
+    def _available(self, agent_id: str) -> bool:
+        """在派发范围内且有空闲容量; 已不在技能索引中的Agent就此移出派发范围, 之后 sync_agents 恢复"""
+        state = self._agents.get(agent_id)
+        if state is None or not state["active"]:
+            return False
+        if self.skill_index is not None and agent_id not in self.skill_index.agents:
+            self.remove_agent(agent_id)
+            return False
+        return self._has_capacity(state)
+
+    def _peek(self, heap: list) -> Optional[str]:
+        while heap:
+            if self._valid(heap[0]) and self._available(heap[0][2]):
+                return heap[0][2]
+            heapq.heappop(heap)
+        return None
+
+    def least_loaded(self, eligible: Optional[Set[str]] = None) -> Optional[str]:
+        """负载最小且有空闲容量的Agent (不弹出); eligible 限定候选范围 (逐个比较, 技能要求请用 least_loaded_for)"""
+        if eligible is None:
+            return self._peek(self._agent_heap)
+        best, best_key = None, None
+        for agent_id in eligible:
+            if not self._available(agent_id):
+                continue
+            state = self._agents[agent_id]
+            key = (state["inflight"] / state["weight"], state["last"])
+            if best_key is None or key < best_key:
+                best, best_key = agent_id, key
+        return best
+
+    def least_loaded_for(self, requirements: Iterable[str], mode: str = "all") -> Optional[str]:
+        """满足技能要求的Agent中负载最小的; 没有技能要求或没有Agent具备所需技能时不作限制"""
+        requirements = tuple(requirements)
+        if not self.skill_index or not requirements:
+            return self._peek(self._agent_heap)
+        group = self._skill_group(requirements, mode)
+        return self._peek(group[1]) if group[0] else self._peek(self._agent_heap)
+
+    def _skill_group(self, requirements: Tuple[str, ...], mode: str) -> tuple:
+        if self._groups_version != self.skill_index.version:
+            self._skill_groups.clear()
+            self._agent_groups.clear()
+            self._groups_version = self.skill_index.version
+        key = (tuple(sorted(set(requirements))), mode)
+        group = self._skill_groups.get(key)
+        if group is not None:
+            self._skill_groups.move_to_end(key)
+            return group
+        members = set(self.skill_index.match(requirements, mode) or ())
+        heap = []
+        for agent_id in members:
+            state = self._agents.get(agent_id)
+            if state is not None and state["active"] and self._has_capacity(state):
+                heap.append((state["inflight"] / state["weight"], state["last"], agent_id, state["version"]))
+            self._agent_groups.setdefault(agent_id, set()).add(key)
+        heapq.heapify(heap)
+        group = self._skill_groups[key] = (members, heap)
+        if len(self._skill_groups) > self.max_skill_groups:
+            old_key, (old_members, _) = self._skill_groups.popitem(last=False)
+            for agent_id in old_members:
+                self._agent_groups[agent_id].discard(old_key)
+        return group
+
+    # ---------- 任务 ----------
+    def submit(self, task_id: str, priority: TaskPriority = TaskPriority.MEDIUM,
+               preferred_agent_id: Optional[str] = None, skill_requirements: Tuple[str, ...] = (),
+               skill_match: str = "all"):
+        """任务入队"""
+        heapq.heappush(self._queues[TaskPriority(priority)], (self.clock(), next(self._seq), task_id))
+        self._queued[task_id] = (TaskPriority(priority), preferred_agent_id, tuple(skill_requirements), skill_match)
+        self.stats["submitted"] += 1
+
+    def cancel(self, task_id: str) -> bool:
+        """取消排队中的任务 (队列条目惰性丢弃)"""
+        if self._queued.pop(task_id, None) is None:
+            return False
+        self.stats["cancelled"] += 1
+        return True
+
+    def queued(self) -> int:
+        return len(self._queued)
+
+    def _head(self, priority: TaskPriority):
+        queue = self._queues[priority]
+        while queue and queue[0][2] not in self._queued:
+            heapq.heappop(queue)
+        return queue[0] if queue else None
+
+    def _next_priority(self) -> Optional[TaskPriority]:
+        """各队头按 (老化后的级别, 入队时间) 比较, 返回应先派发的队列"""
+        now = self.clock()
+        best, best_key = None, None
+        for level, priority in enumerate(PRIORITY_ORDER):
+            head = self._head(priority)
+            if head is None:
+                continue
+            boost = int((now - head[0]) // self.aging_seconds) if self.aging_seconds else 0
+            key = (max(0, level - boost), head[0], head[1])
+            if best_key is None or key < best_key:
+                best, best_key = priority, key
+        return best
+
+    def _choose_agent(self, task_id: str) -> Optional[str]:
+        _, preferred, requirements, mode = self._queued[task_id]
+        if preferred and self._available(preferred):
+            return preferred
+        return self.least_loaded_for(requirements, mode)
+
+    def dispatch(self) -> Optional[Tuple[str, str, float]]:
+        """派发一个任务: (task_id, agent_id, 排队秒数); 队列为空或没有可派发的任务时为 None"""
+        skipped = []                             # 匹配的Agent都在忙, 暂时移出队列的条目
+        try:
+            while len(skipped) <= self.lookahead:
+                priority = self._next_priority()
+                if priority is None or self.least_loaded() is None:
+                    return None
+                entry = heapq.heappop(self._queues[priority])
+                agent_id = self._choose_agent(entry[2])
+                if agent_id is not None:
+                    break
+                skipped.append((priority, entry))
+            else:
+                return None
+        finally:
+            for priority, item in skipped:
+                heapq.heappush(self._queues[priority], item)
+
+        enqueued, _, task_id = entry
+        del self._queued[task_id]
+        self._take(agent_id, self.reserve)
+        self.stats["dispatched"] += 1
+        return task_id, agent_id, self.clock() - enqueued
+
+    def dispatch_all(self) -> List[Tuple[str, str, float]]:
+        """派发到队列为空或没有空闲Agent为止"""
+        assigned = []
+        while True:
+            item = self.dispatch()
+            if item is None:
+                return assigned
+            assigned.append(item)
+
+    def assign(self, task_id: str, agent_id: str, previous_agent_id: Optional[str] = None):
+        """
+        手动把任务交给指定Agent (不检查容量)
+
+        排队中的任务出队; reserve=True 时已派发的任务释放 previous_agent_id 的容量,
+        新Agent计入在途, 之后照常 complete
+        """
+        if self._queued.pop(task_id, None) is not None:
+            self.stats["dispatched"] += 1
+        elif previous_agent_id and self.reserve:
+            self._release_slot(previous_agent_id)
+        if agent_id in self._agents:
+            self._take(agent_id, self.reserve)
+
+    def acquire(self, agent_id: str):
+        """reserve=False 时: 任务开始执行 (含在执行池中等待该Agent的空位), 计入在途; 结束时 complete"""
+        if agent_id in self._agents:
+            self._take(agent_id, True)
+
+    def _take(self, agent_id: str, inflight: bool):
+        state = self._agents[agent_id]
+        if inflight:
+            state["inflight"] += 1
+        state["last"] = next(self._seq)
+        self._push_agent(agent_id)
+
+    def complete(self, agent_id: str):
+        """Agent完成 (或失败/取消) 一个已派发的任务, 释放容量"""
+        if self._release_slot(agent_id):
+            self.stats["completed"] += 1
+
+    def _release_slot(self, agent_id: str) -> bool:
+        state = self._agents.get(agent_id)
+        if state is None or state["inflight"] == 0:
+            return False
+        state["inflight"] -= 1
+        self._push_agent(agent_id)
+        return True
@@ -0,0 +1,238 @@
+"""
+Task Executor - 异步任务执行池
+
+- 有界队列: 排队中 (含等待Agent空位, 等待重试) 的任务数达到 queue_size 时拒绝提交 (ExecutorFull)
+- 固定数量的worker协程从队列取任务; 每个Agent同时执行的任务数不超过其上限,
+  超出的暂存在该Agent的等待队列, 由完成该Agent任务的worker接着执行, 不占住其它worker
+- 每次执行有超时; 失败或超时按指数退避 (带抖动) 重试, 等待重试期间不占用worker
+- 取消: 排队中的直接出队, 执行中的取消其协程 (在下一个await处停止)
+- 指标: 队列深度, 活跃worker数, 各Agent执行数, 排队/执行/端到端耗时分位数
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+from models.task import TaskExecutionResult, TaskStatus
+
+Runner = Callable[[str, str], Awaitable[dict]]      # (task_id, agent_id) -> 执行结果
+
+
+class ExecutorFull(Exception):
+    """执行队列已满"""
+
+
+class TaskExecutor:
+    """任务执行池, 单个事件循环内使用; worker在第一次提交时启动"""
+
+    def __init__(self, runner: Runner, workers: int = 8, queue_size: int = 1000,
+                 agent_limit: int = 2, agent_limits: Optional[Dict[str, int]] = None,
+                 timeout: float = 300.0, max_retries: int = 2, backoff: float = 1.0, backoff_max: float = 30.0,
+                 on_start: Optional[Callable[[str, str, int], Awaitable[None]]] = None,
+                 on_finish: Optional[Callable[[TaskExecutionResult], Awaitable[None]]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.runner = runner
+        self.workers = workers
+        self.queue_size = queue_size
+        self.agent_limit = agent_limit              # 每个Agent默认的并发上限
+        self.agent_limits = dict(agent_limits or {})
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.on_start = on_start                    # 每次开始执行前 (task_id, agent_id, 第几次)
+        self.on_finish = on_finish                  # 最终结果 (完成/失败/取消)
+        self.clock = clock
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: list = []
+        self._jobs: Dict[str, dict] = {}            # task_id -> job, 提交后到结束前
+        self._waiting: Dict[str, deque] = {}        # agent_id -> 等待空位的job
+        self._running: Dict[str, int] = {}          # agent_id -> 执行中数量
+        self._active = 0
+        self._latency = {name: deque(maxlen=1024) for name in ("queue_wait", "run", "total")}
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0,
+                      "timed_out": 0, "retried": 0, "rejected": 0}
+
+    # ---------- 配置 ----------
+    def limit_for(self, agent_id: str) -> int:
+        return self.agent_limits.get(agent_id, self.agent_limit)
+
+    def set_agent_limit(self, agent_id: str, limit: int):
+        """调整Agent并发上限; 等待空位的任务放回队列重新判断"""
+        self.agent_limits[agent_id] = limit
+        for job in self._waiting.pop(agent_id, ()):
+            if not job["cancelled"]:
+                self._queue.put_nowait(job)
+
+    # ---------- 提交/取消 ----------
+    def queue_depth(self) -> int:
+        """已提交但未在执行的任务数"""
+        return len(self._jobs) - self._active
+
+    def is_tracked(self, task_id: str) -> bool:
+        return task_id in self._jobs
+
+    def submit(self, task_id: str, agent_id: str, timeout: Optional[float] = None,
+               max_retries: Optional[int] = None) -> asyncio.Future:
+        """提交执行, 返回最终 TaskExecutionResult 的 Future"""
+        if task_id in self._jobs:
+            raise ValueError(f"Task {task_id} is already executing")
+        if self.queue_depth() >= self.queue_size:
+            self.stats["rejected"] += 1
+            raise ExecutorFull(f"Execution queue is full ({self.queue_size} tasks)")
+        self._start()
+        now = self.clock()
+        job = {"task_id": task_id, "agent_id": agent_id, "attempt": 0, "submitted": now,
+               "timeout": timeout or self.timeout,
+               "retries": self.max_retries if max_retries is None else max_retries,
+               "future": asyncio.get_running_loop().create_future(),
+               "executing": False, "run": None, "retry_handle": None, "cancelled": False}
+        self._jobs[task_id] = job
+        self._queue.put_nowait(job)
+        self.stats["submitted"] += 1
+        return job["future"]
+
+    async def cancel(self, task_id: str) -> bool:
+        """取消任务; 执行中的由其worker收尾, 其余立即结束"""
+        job = self._jobs.get(task_id)
+        if job is None or job["cancelled"]:
+            return False
+        job["cancelled"] = True
+        if job["executing"]:
+            run = job["run"]
+            if run is not None and not run.cancel() and run.exception() is None:
+                job["cancelled"] = False            # 已经执行成功, 取消不生效
+                return False
+            return True
+        if job["retry_handle"] is not None:
+            job["retry_handle"].cancel()
+        await self._finish(job, TaskStatus.CANCELLED, error="Cancelled", duration=0.0)
+        return True
+
+    # ---------- worker ----------
+    def _start(self):
+        if self._worker_tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._worker_tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            while job is not None and not job["cancelled"]:
+                agent_id = job["agent_id"]
+                if self._running.get(agent_id, 0) >= self.limit_for(agent_id):
+                    self._waiting.setdefault(agent_id, deque()).append(job)
+                    break
+                await self._execute(job)
+                job = self._next_waiting(agent_id)
+
+    def _next_waiting(self, agent_id: str) -> Optional[dict]:
+        waiting = self._waiting.get(agent_id)
+        while waiting:
+            job = waiting.popleft()
+            if not job["cancelled"]:
+                return job
+        self._waiting.pop(agent_id, None)
+        return None
+
+    async def _execute(self, job: dict):
+        """执行一次; 失败时安排重试或结束"""
+        task_id, agent_id = job["task_id"], job["agent_id"]
+        self._running[agent_id] = self._running.get(agent_id, 0) + 1
+        self._active += 1
+        job["executing"] = True
+        job["attempt"] += 1
+        started = self.clock()
+        if job["attempt"] == 1:
+            self._latency["queue_wait"].append(started - job["submitted"])
+        result, error, status = None, None, TaskStatus.FAILED
+        try:
+            if self.on_start:
+                await self.on_start(task_id, agent_id, job["attempt"])
+            if job["cancelled"]:
+                raise asyncio.CancelledError
+            job["run"] = asyncio.ensure_future(asyncio.wait_for(self.runner(task_id, agent_id), job["timeout"]))
+            result = await job["run"]
+            status = TaskStatus.COMPLETED
+        except asyncio.CancelledError:
+            if not job["cancelled"]:                # worker本身被取消 (shutdown)
+                raise
+            status, error = TaskStatus.CANCELLED, "Cancelled"
+        except asyncio.TimeoutError:
+            self.stats["timed_out"] += 1
+            error = f"Timed out after {job['timeout']}s"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            job["executing"], job["run"] = False, None
+            self._running[agent_id] -= 1
+            self._active -= 1
+        duration = self.clock() - started
+        self._latency["run"].append(duration)
+        if job["cancelled"] and status == TaskStatus.FAILED:
+            status, error = TaskStatus.CANCELLED, "Cancelled"
+
+        if status == TaskStatus.FAILED and job["attempt"] <= job["retries"]:
+            delay = min(self.backoff_max, self.backoff * 2 ** (job["attempt"] - 1)) * random.uniform(0.5, 1.0)
+            job["retry_handle"] = asyncio.get_running_loop().call_later(delay, self._retry, job)
+            self.stats["retried"] += 1
+            return
+        await self._finish(job, status, result, error, duration)
+
+    def _retry(self, job: dict):
+        job["retry_handle"] = None
+        if not job["cancelled"]:
+            self._queue.put_nowait(job)
+
+    async def _finish(self, job: dict, status: TaskStatus, result: Optional[dict] = None,
+                      error: Optional[str] = None, duration: float = 0.0):
+        self._jobs.pop(job["task_id"], None)
+        self._latency["total"].append(self.clock() - job["submitted"])
+        self.stats[{TaskStatus.COMPLETED: "completed", TaskStatus.CANCELLED: "cancelled"}.get(status, "failed")] += 1
+        outcome = TaskExecutionResult(task_id=job["task_id"], agent_id=job["agent_id"], status=status,
+                                      result=result, error=error, duration_seconds=duration,
+                                      timestamp=datetime.utcnow())
+        try:
+            if self.on_finish:
+                await self.on_finish(outcome)
+        finally:
+            if not job["future"].done():
+                job["future"].set_result(outcome)
+
+    async def shutdown(self):
+        """停止worker; 未完成的任务Future被取消"""
+        for job in list(self._jobs.values()):
+            if job["retry_handle"] is not None:
+                job["retry_handle"].cancel()
+            job["future"].cancel()
+        for worker in self._worker_tasks:
+            worker.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._jobs.clear()
+        self._waiting.clear()
+        self._running.clear()
+        self._active = 0
+
+    # ---------- 指标 ----------
+    def metrics(self) -> dict:
+        latency = {}
+        for name, samples in self._latency.items():
+            values = sorted(samples)
+            pick = (lambda q: values[min(len(values) - 1, int(q * len(values)))]) if values else (lambda q: None)
+            latency[name] = {"count": len(values), "mean": sum(values) / len(values) if values else None,
+                             "p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99)}
+        return {
+            "workers": self.workers,
+            "active_workers": self._active,
+            "queue_depth": self.queue_depth(),
+            "queue_size": self.queue_size,
+            "waiting_for_agent": sum(not job["cancelled"] for w in self._waiting.values() for job in w),
+            "retry_scheduled": sum(1 for job in self._jobs.values() if job["retry_handle"] is not None),
+            "running_by_agent": {a: n for a, n in self._running.items() if n},
+            **self.stats,
+            "latency_seconds": latency,
+        }
@@ -0,0 +1,309 @@
+"""
+Queue Backend - 任务执行队列后端
+
+API进程把要执行的任务放入队列, worker进程 (services/queue_worker.py) 认领, 执行, 上报状态后确认.
+认领后超过 visibility_timeout 仍未确认 (worker崩溃或失联) 的消息会被其它worker重新认领,
+投递超过 max_deliveries 次的进入死信并上报失败. 语义为至少执行一次.
+
+- MemoryQueueBackend: 进程内实现, 单进程部署和基准使用
+- RedisStreamBackend: Redis Streams + 消费组 (XADD / XREADGROUP / XAUTOCLAIM / XACK),
+  任意多个worker进程共用一个执行队列; 状态上报放在hash, 取消请求放在set
+
+范围: 共享的只是执行, 任意多个worker进程共用一个执行队列. 任务载荷带有Agent记录的快照,
+worker不需要知道API进程中注册的Agent.
+未实现: 多个API进程共用任务池. 任务记录和状态 (TaskStore), 优先级派发 (TaskDispatcher) 和
+Agent注册表 (AgentService) 仍在API进程的内存中, 状态上报也只由放入任务的API进程读取,
+因此API只能以单进程运行 (uvicorn 不加 --workers). 要支持多个API进程, 这三者都需移到Redis/Postgres.
+
+TASK_QUEUE_BACKEND=redis 时 TaskService 使用 RedisStreamBackend (database.redis_client),
+默认不使用队列后端, 由进程内的 TaskExecutor 直接执行.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+Message = Tuple[str, dict]      # (消息ID, 任务载荷)
+
+
+class QueueBackend(ABC):
+    """队列后端接口"""
+
+    visibility_timeout: float
+    max_deliveries: int
+
+    @abstractmethod
+    def enqueue(self, payload: dict) -> str:
+        """放入队列, 返回消息ID"""
+
+    @abstractmethod
+    def claim(self, consumer: str, count: int = 1, block_ms: int = 0) -> List[Message]:
+        """认领最多 count 条消息: 先取可见超时已过的, 再取新的; block_ms 为没有消息时的最长等待"""
+
+    @abstractmethod
+    def ack(self, message_id: str):
+        """确认处理完成, 消息删除"""
+
+    @abstractmethod
+    def extend(self, message_ids: List[str], consumer: str):
+        """续期: 正在执行的消息重新计算可见超时"""
+
+    @abstractmethod
+    def depth(self) -> int:
+        """未确认的消息数 (排队中 + 已认领)"""
+
+    @abstractmethod
+    def report_status(self, task_id: str, record: dict):
+        """worker上报任务状态 (running / 最终结果)"""
+
+    @abstractmethod
+    def poll_status(self, task_ids: List[str]) -> Dict[str, dict]:
+        """读取任务的最新上报, 没有上报的不返回"""
+
+    @abstractmethod
+    def discard_status(self, task_ids: Iterable[str]):
+        """删除已处理的状态上报"""
+
+    @abstractmethod
+    def request_cancel(self, task_id: str):
+        """请求取消; 认领到或正在执行该任务的worker会停止它"""
+
+    @abstractmethod
+    def cancelled(self, task_ids: List[str]) -> Set[str]:
+        """给定任务中已请求取消的"""
+
+    @abstractmethod
+    def clear_cancel(self, task_id: str):
+        """取消已处理, 删除取消请求"""
+
+    def _dead_letter_record(self, deliveries: int) -> dict:
+        return {"status": "failed", "error": f"Gave up after {deliveries} deliveries without acknowledgement",
+                "duration_seconds": 0.0}
+
+
+class MemoryQueueBackend(QueueBackend):
+    """进程内队列后端, 线程安全"""
+
+    def __init__(self, visibility_timeout: float = 60.0, max_deliveries: int = 5,
+                 clock: Callable[[], float] = time.monotonic):
+        self.visibility_timeout = visibility_timeout
+        self.max_deliveries = max_deliveries
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._messages: Dict[str, dict] = {}                # 消息ID -> 载荷
+        self._ready: deque = deque()                        # 未认领的消息ID
+        self._pending: OrderedDict = OrderedDict()          # 消息ID -> (consumer, 认领时间), 按认领时间排列
+        self._deliveries: Dict[str, int] = {}               # 消息ID -> 投递次数
+        self._status: Dict[str, dict] = {}
+        self._cancelled: Set[str] = set()
+        self.dead: List[dict] = []                          # 死信载荷
+
+    def enqueue(self, payload: dict) -> str:
+        with self._cond:
+            message_id = f"{int(time.time() * 1000)}-{next(self._seq)}"
+            self._messages[message_id] = payload
+            self._ready.append(message_id)
+            self._cond.notify()
+        return message_id
+
+    def claim(self, consumer: str, count: int = 1, block_ms: int = 0) -> List[Message]:
+        deadline = self.clock() + block_ms / 1000
+        with self._cond:
+            while True:
+                claimed = self._claim_expired(consumer, count)
+                while self._ready and len(claimed) < count:
+                    message_id = self._ready.popleft()
+                    self._mark_claimed(message_id, consumer)
+                    claimed.append((message_id, self._messages[message_id]))
+                remaining = deadline - self.clock()
+                if claimed or remaining <= 0:
+                    return claimed
+                self._cond.wait(min(remaining, self.visibility_timeout))
+
+    def _claim_expired(self, consumer: str, count: int) -> List[Message]:
+        claimed = []
+        expire_before = self.clock() - self.visibility_timeout
+        while self._pending and len(claimed) < count:
+            message_id, (_, claimed_at) = next(iter(self._pending.items()))
+            if claimed_at > expire_before:
+                break
+            if self._deliveries[message_id] >= self.max_deliveries:
+                self._bury(message_id)
+                continue
+            self._mark_claimed(message_id, consumer)
+            claimed.append((message_id, self._messages[message_id]))
+        return claimed
+
+    def _mark_claimed(self, message_id: str, consumer: str):
+        self._pending.pop(message_id, None)
+        self._pending[message_id] = (consumer, self.clock())
+        self._deliveries[message_id] = self._deliveries.get(message_id, 0) + 1
+
+    def _bury(self, message_id: str):
+        payload = self._messages[message_id]
+        self.dead.append(payload)
+        self._status[payload["task_id"]] = self._dead_letter_record(self._deliveries[message_id])
+        self._remove(message_id)
+
+    def _remove(self, message_id: str):
+        self._pending.pop(message_id, None)
+        self._deliveries.pop(message_id, None)
+        self._messages.pop(message_id, None)
+
+    def ack(self, message_id: str):
+        with self._cond:
+            self._remove(message_id)
+
+    def extend(self, message_ids: List[str], consumer: str):
+        with self._cond:
+            now = self.clock()
+            for message_id in message_ids:
+                if message_id in self._pending:
+                    self._pending.move_to_end(message_id)
+                    self._pending[message_id] = (consumer, now)
+
+    def depth(self) -> int:
+        return len(self._messages)
+
+    def report_status(self, task_id: str, record: dict):
+        with self._cond:
+            self._status[task_id] = dict(record)
+
+    def poll_status(self, task_ids: List[str]) -> Dict[str, dict]:
+        with self._cond:
+            return {task_id: dict(self._status[task_id]) for task_id in task_ids if task_id in self._status}
+
+    def discard_status(self, task_ids: Iterable[str]):
+        with self._cond:
+            for task_id in task_ids:
+                self._status.pop(task_id, None)
+
+    def request_cancel(self, task_id: str):
+        with self._cond:
+            self._cancelled.add(task_id)
+
+    def cancelled(self, task_ids: List[str]) -> Set[str]:
+        with self._cond:
+            return self._cancelled.intersection(task_ids)
+
+    def clear_cancel(self, task_id: str):
+        with self._cond:
+            self._cancelled.discard(task_id)
+
+
+class RedisStreamBackend(QueueBackend):
+    """
+    Redis Streams 队列后端
+
+    键: {prefix}:queue (stream, 消费组 {group}), {prefix}:queue:dead (死信stream),
+        {prefix}:status (hash, task_id -> 状态JSON), {prefix}:cancelled (set)
+    redis 客户端需 decode_responses=True (见 database.py)
+    """
+
+    def __init__(self, redis, prefix: str = "tasks", group: str = "workers",
+                 visibility_timeout: float = 60.0, max_deliveries: int = 5):
+        self.redis = redis
+        self.stream = f"{prefix}:queue"
+        self.dead_stream = f"{prefix}:queue:dead"
+        self.status_key = f"{prefix}:status"
+        self.cancel_key = f"{prefix}:cancelled"
+        self.group = group
+        self.visibility_timeout = visibility_timeout
+        self.max_deliveries = max_deliveries
+        self._group_ready = False
+
+    def _ensure_group(self):
+        if self._group_ready:
+            return
+        try:
+            self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as e:                      # 消费组已存在
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    def enqueue(self, payload: dict) -> str:
+        self._ensure_group()
+        return self.redis.xadd(self.stream, {"payload": json.dumps(payload)})
+
+    def claim(self, consumer: str, count: int = 1, block_ms: int = 0) -> List[Message]:
+        self._ensure_group()
+        claimed = []
+        expired = self.redis.xautoclaim(self.stream, self.group, consumer,
+                                        int(self.visibility_timeout * 1000), "0-0", count=count)
+        for message_id, fields in expired[1]:
+            if not fields:                          # 已被删除
+                continue
+            deliveries = self._deliveries(message_id)
+            if deliveries > self.max_deliveries:
+                self._bury(message_id, fields, deliveries - 1)
+                continue
+            claimed.append((message_id, json.loads(fields["payload"])))
+        if len(claimed) < count:
+            # block=0 在Redis中表示一直等待, 这里只在没有任何消息时按 block_ms 等待
+            block = block_ms if block_ms and not claimed else None
+            response = self.redis.xreadgroup(self.group, consumer, {self.stream: ">"},
+                                             count=count - len(claimed), block=block)
+            for _, entries in response or []:
+                claimed.extend((message_id, json.loads(fields["payload"])) for message_id, fields in entries)
+        return claimed
+
+    def _deliveries(self, message_id: str) -> int:
+        entries = self.redis.xpending_range(self.stream, self.group, min=message_id, max=message_id, count=1)
+        return entries[0]["times_delivered"] if entries else 1
+
+    def _bury(self, message_id: str, fields: dict, deliveries: int):
+        payload = json.loads(fields["payload"])
+        self.redis.xadd(self.dead_stream, fields)
+        self.redis.hset(self.status_key, payload["task_id"], json.dumps(self._dead_letter_record(deliveries)))
+        self.ack(message_id)
+
+    def ack(self, message_id: str):
+        self.redis.xack(self.stream, self.group, message_id)
+        self.redis.xdel(self.stream, message_id)
+
+    def extend(self, message_ids: List[str], consumer: str):
+        if message_ids:
+            self.redis.xclaim(self.stream, self.group, consumer, 0, message_ids, justid=True)
+
+    def depth(self) -> int:
+        return self.redis.xlen(self.stream)
+
+    def report_status(self, task_id: str, record: dict):
+        self.redis.hset(self.status_key, task_id, json.dumps(record))
+
+    def poll_status(self, task_ids: List[str]) -> Dict[str, dict]:
+        if not task_ids:
+            return {}
+        values = self.redis.hmget(self.status_key, task_ids)
+        return {task_id: json.loads(value) for task_id, value in zip(task_ids, values) if value}
+
+    def discard_status(self, task_ids: Iterable[str]):
+        task_ids = list(task_ids)
+        if task_ids:
+            self.redis.hdel(self.status_key, *task_ids)
+
+    def request_cancel(self, task_id: str):
+        self.redis.sadd(self.cancel_key, task_id)
+
+    def cancelled(self, task_ids: List[str]) -> Set[str]:
+        if not task_ids:
+            return set()
+        flags = self.redis.smismember(self.cancel_key, task_ids)
+        return {task_id for task_id, flag in zip(task_ids, flags) if flag}
+
+    def clear_cancel(self, task_id: str):
+        self.redis.srem(self.cancel_key, task_id)
+
+
+def queue_backend_from_env() -> Optional[QueueBackend]:
+    """TASK_QUEUE_BACKEND=redis 时返回 RedisStreamBackend, 否则 None (进程内执行)"""
+    if os.getenv("TASK_QUEUE_BACKEND", "").lower() != "redis":
+        return None
+    from database import get_redis
+    return RedisStreamBackend(get_redis(), visibility_timeout=float(os.getenv("TASK_QUEUE_VISIBILITY_TIMEOUT", "60")))
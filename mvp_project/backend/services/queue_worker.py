@@ -0,0 +1,147 @@
+"""
+Queue Worker - 队列消费进程
+
+从队列后端 (services/queue_backend.py) 认领任务, 交给本进程的 TaskExecutor 执行
+(超时, 重试, 每个Agent并发上限同 services/executor.py), 上报状态后确认消息.
+- 同时持有的消息数不超过 concurrency, 有空位时才认领
+- 每 visibility_timeout/3 秒为执行中的消息续期, 并检查取消请求; 进程退出或崩溃时
+  未确认的消息在可见超时后由其它worker重新认领
+- 先上报最终状态再确认, 保证结果不丢 (至少执行一次)
+
+用法: TASK_QUEUE_BACKEND=redis python -m services.queue_worker [--name worker-1] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from models.task import TaskExecutionResult, TaskStatus
+from services.executor import TaskExecutor
+from services.queue_backend import QueueBackend
+
+PayloadRunner = Callable[[dict], Awaitable[dict]]       # 任务载荷 -> 执行结果
+
+
+class QueueWorker:
+    """队列消费者, 在事件循环中运行 run()"""
+
+    def __init__(self, backend: QueueBackend, runner: PayloadRunner, name: Optional[str] = None,
+                 concurrency: int = 8, poll_ms: int = 1000, **executor_options):
+        self.backend = backend
+        self.runner = runner
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.concurrency = concurrency
+        self.poll_ms = poll_ms
+        self.executor = TaskExecutor(self._run, workers=concurrency, queue_size=concurrency,
+                                     on_start=self._on_start, **executor_options)
+        self._inflight: Dict[str, tuple] = {}       # task_id -> (消息ID, 载荷)
+        self._cancelling: set = set()                # 收到取消请求的task_id
+        self._attempts: Dict[str, int] = {}          # task_id -> 已执行次数
+        self._slot_free: Optional[asyncio.Event] = None
+        self._last_heartbeat = 0.0
+        self.stats = {"claimed": 0, "acked": 0, "cancelled": 0}
+
+    async def run(self, stop: Optional[asyncio.Event] = None):
+        """认领-执行循环, 直到 stop 被设置; 退出时未完成的消息不确认"""
+        stop = stop or asyncio.Event()
+        self._slot_free = asyncio.Event()
+        try:
+            while not stop.is_set():
+                free = self.concurrency - len(self._inflight)
+                if free > 0:
+                    messages = await asyncio.to_thread(self.backend.claim, self.name, free, self.poll_ms)
+                    self._accept(messages)
+                else:
+                    self._slot_free.clear()
+                    try:
+                        await asyncio.wait_for(self._slot_free.wait(), self.backend.visibility_timeout / 3)
+                    except asyncio.TimeoutError:
+                        pass
+                self._heartbeat()
+        finally:
+            await self.executor.shutdown()
+
+    def _accept(self, messages):
+        if not messages:
+            return
+        self.stats["claimed"] += len(messages)
+        cancelled = self.backend.cancelled([payload["task_id"] for _, payload in messages])
+        for message_id, payload in messages:
+            task_id = payload["task_id"]
+            if task_id in cancelled:
+                self._drop_cancelled(task_id, message_id)
+                continue
+            if task_id in self._inflight:           # 本worker仍在执行 (续期不及时被重新投递)
+                continue
+            self._inflight[task_id] = (message_id, payload)
+            future = self.executor.submit(task_id, payload["agent_id"], payload.get("timeout_seconds"),
+                                          payload.get("max_retries"))
+            future.add_done_callback(lambda f, task_id=task_id: self._finished(task_id, f))
+
+    def _heartbeat(self):
+        now = time.monotonic()
+        if not self._inflight or now - self._last_heartbeat < self.backend.visibility_timeout / 3:
+            return
+        self._last_heartbeat = now
+        self.backend.extend([message_id for message_id, _ in self._inflight.values()], self.name)
+        for task_id in self.backend.cancelled(list(self._inflight)) - self._cancelling:
+            self._cancelling.add(task_id)
+            asyncio.ensure_future(self.executor.cancel(task_id))
+
+    async def _run(self, task_id: str, agent_id: str) -> dict:
+        return await self.runner(self._inflight[task_id][1])
+
+    async def _on_start(self, task_id: str, agent_id: str, attempt: int):
+        self._attempts[task_id] = attempt
+        self.backend.report_status(task_id, {"status": TaskStatus.RUNNING.value, "attempts": attempt})
+
+    def _finished(self, task_id: str, future: asyncio.Future):
+        message_id, _ = self._inflight.pop(task_id)
+        attempts = self._attempts.pop(task_id, 0)
+        self._slot_free.set()
+        if future.cancelled():                      # 进程退出, 留给其它worker
+            return
+        if task_id in self._cancelling or self.backend.cancelled([task_id]):
+            self._cancelling.discard(task_id)
+            self._drop_cancelled(task_id, message_id)
+            return
+        outcome: TaskExecutionResult = future.result()
+        self.backend.report_status(task_id, {
+            "status": outcome.status.value,
+            "result": outcome.result,
+            "error": outcome.error,
+            "duration_seconds": outcome.duration_seconds,
+            "attempts": attempts,
+        })
+        self.backend.ack(message_id)
+        self.stats["acked"] += 1
+
+    def _drop_cancelled(self, task_id: str, message_id: str):
+        """已取消的任务: 不上报结果 (API进程已标记取消), 清理后确认"""
+        self.backend.discard_status([task_id])
+        self.backend.clear_cancel(task_id)
+        self.backend.ack(message_id)
+        self.stats["cancelled"] += 1
+
+
+def main():
+    from services.queue_backend import queue_backend_from_env
+    from services.task_service import run_payload
+
+    parser = argparse.ArgumentParser(description="任务队列worker")
+    parser.add_argument("--name", default=None, help="消费者名称, 默认 主机名-进程号")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    backend = queue_backend_from_env()
+    if backend is None:
+        raise SystemExit("TASK_QUEUE_BACKEND=redis is required for a standalone worker")
+    worker = QueueWorker(backend, run_payload, args.name, args.concurrency)
+    print(f"worker {worker.name} consuming {backend.stream} (concurrency {args.concurrency})")
+    asyncio.run(worker.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Skill Index - 技能倒排索引
+
+技能ID和技能类别 → 具备该技能的active Agent集合, 随Agent的注册/更新/删除增量维护.
+按技能要求匹配时只做集合运算: all-of 从最小的集合开始依次求交, any-of 求并,
+与已注册的Agent总数无关.
+"""
+from typing import Dict, Iterable, Optional, Set
+
+from models.agent import Agent, AgentStatus
+
+
+class SkillIndex:
+    """技能倒排索引, 只收录active的Agent"""
+
+    def __init__(self):
+        self.agents: Dict[str, Agent] = {}                  # agent_id -> Agent (active)
+        self._agents_by_key: Dict[str, Set[str]] = {}       # 技能ID或类别 -> agent_id集合
+        self._keys: Dict[str, Set[str]] = {}                # agent_id -> 技能ID和类别
+        self.version = 0                                    # 每次变更加一, 供派发器判断是否需要同步
+
+    @staticmethod
+    def skill_keys(agent: Agent) -> Set[str]:
+        """Agent可以匹配的键: 每个技能的ID和类别"""
+        return {skill.id for skill in agent.skills} | {skill.category for skill in agent.skills}
+
+    def add(self, agent: Agent):
+        """加入或重建一个Agent的索引; 非active的Agent只会被移出"""
+        self._discard(agent.id)
+        if agent.status == AgentStatus.ACTIVE:
+            keys = self.skill_keys(agent)
+            for key in keys:
+                self._agents_by_key.setdefault(key, set()).add(agent.id)
+            self._keys[agent.id] = keys
+            self.agents[agent.id] = agent
+        self.version += 1
+
+    def remove(self, agent_id: str):
+        self._discard(agent_id)
+        self.version += 1
+
+    def _discard(self, agent_id: str):
+        for key in self._keys.pop(agent_id, ()):
+            agents = self._agents_by_key[key]
+            agents.discard(agent_id)
+            if not agents:
+                del self._agents_by_key[key]
+        self.agents.pop(agent_id, None)
+
+    def match(self, requirements: Iterable[str], mode: str = "all") -> Optional[Set[str]]:
+        """
+        满足技能要求的active Agent ID集合
+
+        - mode="all": 具备全部技能 (按集合大小从小到大求交, 结果为空即停止)
+        - mode="any": 具备任一技能
+        没有技能要求时返回 None, 表示任意active Agent都可以
+        """
+        keys = list(dict.fromkeys(requirements))
+        if not keys:
+            return None
+        sets = [self._agents_by_key.get(key, set()) for key in keys]
+        if mode == "any":
+            return set().union(*sets)
+        sets.sort(key=len)
+        result = set(sets[0])
+        for agents in sets[1:]:
+            if not result:
+                break
+            result &= agents
+        return result
@@ -1,77 +1,107 @@
 """
 Task Service - 任务调度和执行逻辑
 """
-from typing import List, Optional
+import asyncio
+from typing import Callable, List, Optional, Tuple
 from datetime import datetime
 from models.task import Task, TaskCreate, TaskUpdate, TaskStatus, TaskPriority, TaskExecutionResult
 from models.agent import Agent, AgentStatus
+from services.agent_service import agent_service
+from services.dispatcher import TaskDispatcher
+from services.executor import TaskExecutor
+from services.queue_backend import QueueBackend, queue_backend_from_env
+from services.skill_index import SkillIndex
+from services.task_store import TaskStore
 import uuid
 
+TERMINAL_STATUSES = [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED]
+
 
 class TaskScheduler:
-    """智能任务调度器"""
+    """智能任务调度器: 按技能索引匹配, 按优先级排队, 派给负载最低的Agent (见 services/dispatcher.py)"""
+
+    def __init__(self, skill_index: Optional[SkillIndex] = None,
+                 capacity: Optional[Callable[[str], Optional[int]]] = None):
+        self.skill_index = skill_index or SkillIndex()
+        # 派发只选定Agent, 任务开始执行时才占用容量 (TaskService.submit_execution)
+        self.dispatcher = TaskDispatcher(skill_index=self.skill_index, reserve=False)
+        self.capacity = capacity        # agent_id -> 同时执行的任务上限 (None 不限)
+        self._synced_version = None
+
+    @property
+    def agents_available(self) -> dict:
+        """agent_id -> Agent (active)"""
+        return self.skill_index.agents
 
-    def __init__(self):
-        self.agents_available = {}  # agent_id -> Agent
+    def sync(self):
+        """技能索引有变更时, 让派发器的可用Agent与之一致"""
+        if self._synced_version != self.skill_index.version:
+            self.dispatcher.sync_agents(list(self.skill_index.agents), self.capacity)
+            self._synced_version = self.skill_index.version
 
     def update_agent_status(self, agent: Agent):
         """更新Agent状态"""
-        self.agents_available[agent.id] = agent
+        self.skill_index.add(agent)
+        self.sync()
 
-    def find_best_agent(self, task: Task, agents: List[Agent]) -> Optional[Agent]:
+    def sync_agents(self, agents: List[Agent]):
+        """把调用方给出的Agent并入技能索引 (索引中已是最新的跳过)"""
+        for agent in agents:
+            active = agent.status == AgentStatus.ACTIVE
+            if (self.skill_index.agents.get(agent.id) is not agent) if active else agent.id in self.skill_index.agents:
+                self.skill_index.add(agent)
+        self.sync()
+
+    def find_best_agent(self, task: Task, agents: Optional[List[Agent]] = None) -> Optional[Agent]:
         """
-        为任务找到最合适的Agent
+        为任务找到最合适的Agent (不入队)
 
         策略:
-        1. 优先级匹配任务技能要求
-        2. 检查Agent状态（必须是active）
-        3. 如果有指定preferred_agent_id，优先使用
-        4. 选择负载最低的Agent
+        1. 只考虑active的Agent
+        2. 按技能索引匹配 skill_requirements (全部具备/具备任一); 没有Agent具备时不作限制
+        3. 在匹配的Agent中选在途任务最少的, 相同时轮流
         """
-        # 如果有首选Agent，优先使用
-        if task.skill_requirements:
-            for agent in agents:
-                if agent.id == task.skill_requirements[0] and agent.status == AgentStatus.ACTIVE:
-                    return agent
-
-        # 找到所有active的agents
-        active_agents = [a for a in agents if a.status == AgentStatus.ACTIVE]
-        if not active_agents:
-            return None
-
-        # 简单策略：随机选择一个active agent
-        # TODO: 实现更智能的调度策略（负载均衡、技能匹配等）
-        return active_agents[0]
+        self.sync_agents(agents or [])
+        agent_id = self.dispatcher.least_loaded_for(task.skill_requirements, task.skill_match)
+        return self.agents_available.get(agent_id) if agent_id else None
 
 
 class TaskService:
     """任务服务类"""
 
-    def __init__(self):
-        # 临时使用内存存储
-        self.tasks: dict[str, Task] = {}
-        self.scheduler = TaskScheduler()
+    def __init__(self, skill_index: Optional[SkillIndex] = None, queue: Optional[QueueBackend] = None):
+        # 临时使用内存存储, 按状态/Agent/创建时间建索引
+        self.tasks = TaskStore()
+        # 执行池: 有界队列, 每个Agent并发上限, 超时, 重试, 取消 (见 services/executor.py)
+        self.executor = TaskExecutor(self._run, on_start=self._on_start, on_finish=self._on_finish)
+        # 创建时即分配给 执行中任务数/权重 最少的Agent; 匹配的Agent执行中的任务都达到执行池的并发上限时,
+        # 新任务不分配, 在派发器中按优先级排队, 有Agent空出时再分配. 只创建不执行的任务不占容量
+        self.scheduler = TaskScheduler(skill_index, capacity=self.executor.limit_for)
+        self._holding: set = set()      # 已开始执行 (占用Agent容量) 且尚未结束的task_id
+        # 设置队列后端时, 执行交给worker进程 (见 services/queue_worker.py), 本进程只读取状态上报
+        self.queue = queue
+        self._remote: set = set()       # 已放入队列后端, 还没有最终结果的task_id
 
     async def list_tasks(self, status: Optional[TaskStatus] = None, 
                         agent_id: Optional[str] = None) -> List[Task]:
         """列出所有任务"""
-        tasks = list(self.tasks.values())
-        
-        if status:
-            tasks = [t for t in tasks if t.status == status]
-        
-        if agent_id:
-            tasks = [t for t in tasks if t.agent_id == agent_id]
-        
-        # 按创建时间倒序排序
-        tasks.sort(key=lambda t: t.created_at, reverse=True)
+        tasks, _ = await self.list_tasks_page(status, agent_id)
         return tasks
 
+    async def list_tasks_page(self, status: Optional[TaskStatus] = None, agent_id: Optional[str] = None,
+                              limit: Optional[int] = None,
+                              cursor: Optional[str] = None) -> Tuple[List[Task], Optional[str]]:
+        """按创建时间倒序分页列出任务, 返回 (任务列表, 下一页游标); 直接取索引, 不扫描全部任务"""
+        await self._sync_remote()
+        return self.tasks.page(status, agent_id, limit, cursor)
+
     async def get_task(self, task_id: str) -> Optional[Task]:
         """获取指定任务"""
+        if task_id in self._remote:
+            await self._sync_remote()
         return self.tasks.get(task_id)
 
-    async def create_task(self, task_data: TaskCreate, agents: List[Agent]) -> Task:
+    async def create_task(self, task_data: TaskCreate, agents: Optional[List[Agent]] = None) -> Task:
         """创建新任务"""
         task_id = str(uuid.uuid4())
         
@@ -81,23 +111,55 @@ class TaskService:
             description=task_data.description,
             priority=task_data.priority,
             skill_requirements=task_data.skill_requirements,
-            context=task_data.context
+            skill_match=task_data.skill_match,
+            context=task_data.context,
+            timeout_seconds=task_data.timeout_seconds,
+            max_retries=task_data.max_retries
         )
 
-        # 智能分配Agent
-        best_agent = self.scheduler.find_best_agent(task, agents)
-        if best_agent:
-            task.agent_id = best_agent.id
-            task.assigned_agent = best_agent.name
+        self.tasks.add(task)
 
-        self.tasks[task_id] = task
+        # 按优先级入队, 有空闲的匹配Agent时立即派发
+        self.scheduler.sync_agents(agents or [])
+        self.scheduler.dispatcher.submit(task_id, task.priority, task_data.preferred_agent_id,
+                                         task.skill_requirements, task.skill_match)
+        self._assign_queued()
         return task
 
+    def _assign_queued(self):
+        """把排队中的任务派发给有空闲容量的Agent; 先同步可用Agent, 已停用或删除的不再分配"""
+        self.scheduler.sync()
+        for task_id, agent_id, _ in self.scheduler.dispatcher.dispatch_all():
+            task = self.tasks.get(task_id)
+            agent = self.scheduler.agents_available.get(agent_id)
+            if task:
+                task.agent_id = agent_id
+                task.assigned_agent = agent.name if agent else agent_id
+                self.tasks.reindex(task)
+
+    def _release(self, task: Task):
+        """任务结束或删除: 排队中的出队, 执行过的释放Agent容量并派发后续任务"""
+        if self.scheduler.dispatcher.cancel(task.id):
+            return
+        if task.id in self._holding:
+            self._holding.discard(task.id)
+            self.scheduler.dispatcher.complete(task.agent_id)
+            self._assign_queued()
+
+    def set_agent_limit(self, agent_id: str, limit: int):
+        """调整Agent的并发上限, 派发容量随之调整"""
+        self.executor.set_agent_limit(agent_id, limit)
+        self.scheduler.dispatcher.set_capacity(agent_id, limit)
+        self._assign_queued()
+
     async def update_task(self, task_id: str, update_data: TaskUpdate) -> Optional[Task]:
-        """更新任务信息"""
+        """更新任务信息; 执行中的任务不能改派Agent (ValueError)"""
         task = self.tasks.get(task_id)
         if not task:
             return None
+        reassign = bool(update_data.agent_id) and update_data.agent_id != task.agent_id
+        if reassign and (self.executor.is_tracked(task_id) or task_id in self._remote):
+            raise ValueError(f"Task {task_id} is executing; cancel it before changing its agent")
 
         if update_data.title:
             task.title = update_data.title
@@ -107,7 +169,9 @@ class TaskService:
             # 更新时间戳
             if update_data.status == TaskStatus.RUNNING and task.started_at is None:
                 task.started_at = datetime.utcnow()
-            if update_data.status in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED]:
+            if update_data.status in TERMINAL_STATUSES:
+                if task.status not in TERMINAL_STATUSES:
+                    self._release(task)
                 if task.completed_at is None:
                     task.completed_at = datetime.utcnow()
                     if task.started_at:
@@ -116,77 +180,202 @@ class TaskService:
             task.status = update_data.status
         if update_data.priority:
             task.priority = update_data.priority
-        if update_data.agent_id:
+        if reassign:
+            if task.status not in TERMINAL_STATUSES:       # 排队中的任务出队 (未执行的任务不占容量)
+                self.scheduler.dispatcher.assign(task_id, update_data.agent_id, task.agent_id)
+            agent = self.scheduler.agents_available.get(update_data.agent_id)
             task.agent_id = update_data.agent_id
+            task.assigned_agent = agent.name if agent else update_data.agent_id
         if update_data.result:
             task.result = update_data.result
         if update_data.error:
             task.error = update_data.error
 
+        self.tasks.reindex(task)
         return task
 
     async def delete_task(self, task_id: str) -> bool:
         """删除任务"""
         if task_id in self.tasks:
-            del self.tasks[task_id]
+            task = self.tasks.pop(task_id)
+            await self._cancel_execution(task_id)
+            if task.status not in TERMINAL_STATUSES:
+                self._release(task)
             return True
         return False
 
-    async def execute_task(self, task_id: str, agents: List[Agent]) -> TaskExecutionResult:
-        """执行任务"""
+    async def cancel_task(self, task_id: str) -> Optional[Task]:
+        """取消任务: 排队中的出队, 执行中的停止执行"""
+        if task_id not in self.tasks:
+            return None
+        await self._cancel_execution(task_id)
+        return await self.update_task(task_id, TaskUpdate(status=TaskStatus.CANCELLED))
+
+    async def _cancel_execution(self, task_id: str):
+        if task_id in self._remote:
+            self._remote.discard(task_id)
+            self.queue.request_cancel(task_id)
+            self.queue.discard_status([task_id])
+        else:
+            await self.executor.cancel(task_id)
+
+    async def submit_execution(self, task_id: str) -> Optional[asyncio.Future]:
+        """
+        把任务交给执行池, 返回最终 TaskExecutionResult 的 Future; 交给队列后端时返回 None
+
+        任务还在排队等待Agent时不能执行; 分配的Agent已不可用时任务直接失败
+        """
         task = await self.get_task(task_id)
         if not task:
             raise ValueError(f"Task {task_id} not found")
+        if task.status in TERMINAL_STATUSES:
+            raise ValueError(f"Task {task_id} is already {task.status.value}")
+        if not task.agent_id:
+            raise ValueError(f"Task {task_id} is waiting for an available agent")
+        if task_id in self._remote:
+            raise ValueError(f"Task {task_id} is already executing")
 
-        # 更新任务状态为运行中
-        await self.update_task(task_id, TaskUpdate(status=TaskStatus.RUNNING))
-
-        # 获取Agent
-        agent = next((a for a in agents if a.id == task.agent_id), None)
+        agent = agent_service.agents.get(task.agent_id)
         if not agent or agent.status != AgentStatus.ACTIVE:
             await self.update_task(
                 task_id, 
                 TaskUpdate(status=TaskStatus.FAILED, error="Agent not available")
             )
-            return TaskExecutionResult(
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(TaskExecutionResult(
                 task_id=task_id,
-                agent_id=task.agent_id or "unknown",
+                agent_id=task.agent_id,
                 status=TaskStatus.FAILED,
                 error="Agent not available",
                 duration_seconds=0.0,
                 timestamp=datetime.utcnow()
-            )
+            ))
+            return future
+
+        if self.queue is not None:
+            self.queue.enqueue({
+                "task_id": task_id,
+                "agent_id": task.agent_id,
+                "agent": agent.model_dump(mode="json"),     # worker进程没有本进程注册的Agent
+                "title": task.title,
+                "context": task.context,
+                "timeout_seconds": task.timeout_seconds,
+                "max_retries": task.max_retries
+            })
+            self._remote.add(task_id)
+            self._hold(task)
+            return None
+        future = self.executor.submit(task_id, task.agent_id, task.timeout_seconds, task.max_retries)
+        self._hold(task)
+        return future
+
+    def _hold(self, task: Task):
+        """任务开始执行 (含等待Agent空位): 占用Agent容量, 结束时在 _release 中释放"""
+        if task.id not in self._holding:
+            self._holding.add(task.id)
+            self.scheduler.dispatcher.acquire(task.agent_id)
+
+    async def execute_task(self, task_id: str, poll_seconds: float = 0.5) -> TaskExecutionResult:
+        """执行任务并等待结果"""
+        future = await self.submit_execution(task_id)
+        if future is not None:
+            return await future
+        while task_id in self._remote:
+            await asyncio.sleep(poll_seconds)
+            await self._sync_remote()
+        task = self.tasks.get(task_id)
+        return TaskExecutionResult(
+            task_id=task_id,
+            agent_id=task.agent_id if task else "unknown",
+            status=task.status if task else TaskStatus.CANCELLED,
+            result=task.result if task else None,
+            error=task.error if task else None,
+            duration_seconds=(task.duration_seconds or 0.0) if task else 0.0,
+            timestamp=datetime.utcnow()
+        )
+
+    def execution_metrics(self) -> dict:
+        """执行池指标; 使用队列后端时附带队列深度和等待结果的任务数"""
+        metrics = self.executor.metrics()
+        if self.queue is not None:
+            metrics["queue_backend"] = {
+                "backend": type(self.queue).__name__,
+                "depth": self.queue.depth(),
+                "awaiting_result": len(self._remote)
+            }
+        return metrics
 
-        # TODO: 实现实际的任务执行逻辑
-        # 这里模拟执行
-        start_time = datetime.utcnow()
+    def queue_depth(self) -> int:
+        return self.queue.depth() if self.queue is not None else self.executor.queue_depth()
 
-        # 模拟任务执行
-        result = {
-            "task": task.title,
-            "agent": agent.name,
-            "output": f"Task '{task.title}' executed successfully by {agent.name}",
-            "context": task.context
-        }
+    async def _sync_remote(self):
+        """读取队列后端上报的状态: running 更新执行次数, 最终结果按执行池结果处理"""
+        if not self._remote:
+            return
+        finished = []
+        for task_id, record in self.queue.poll_status(list(self._remote)).items():
+            task = self.tasks[task_id]
+            status = TaskStatus(record["status"])
+            if status == TaskStatus.RUNNING:
+                await self._on_start(task_id, task.agent_id, record["attempts"])
+                continue
+            finished.append(task_id)
+            self._remote.discard(task_id)
+            task.attempts = record.get("attempts", task.attempts)
+            await self._on_finish(TaskExecutionResult(
+                task_id=task_id,
+                agent_id=task.agent_id,
+                status=status,
+                result=record.get("result"),
+                error=record.get("error"),
+                duration_seconds=record.get("duration_seconds", 0.0),
+                timestamp=datetime.utcnow()
+            ))
+        self.queue.discard_status(finished)
 
-        end_time = datetime.utcnow()
-        duration = (end_time - start_time).total_seconds()
+    async def _run(self, task_id: str, agent_id: str) -> dict:
+        """在Agent上执行一次任务 (由执行池调用, 可被取消)"""
+        task = self.tasks[task_id]
+        return await run_on_agent(agent_id, task.title, task.context)
 
-        # 更新任务状态为完成
+    async def _on_start(self, task_id: str, agent_id: str, attempt: int):
+        task = self.tasks.get(task_id)
+        if task:
+            task.attempts = attempt
+            await self.update_task(task_id, TaskUpdate(status=TaskStatus.RUNNING))
+
+    async def _on_finish(self, outcome: TaskExecutionResult):
+        """执行池给出最终结果; 已被取消或删除的任务不再改写"""
+        task = self.tasks.get(outcome.task_id)
+        if not task or task.status in TERMINAL_STATUSES:
+            return
         await self.update_task(
-            task_id,
-            TaskUpdate(status=TaskStatus.COMPLETED, result=result)
+            outcome.task_id,
+            TaskUpdate(status=outcome.status, result=outcome.result, error=outcome.error)
         )
 
-        return TaskExecutionResult(
-            task_id=task_id,
-            agent_id=agent.id,
-            status=TaskStatus.COMPLETED,
-            result=result,
-            duration_seconds=duration,
-            timestamp=end_time
-        )
+
+async def run_on_agent(agent_id: str, title: str, context: dict, agent: Optional[Agent] = None) -> dict:
+    """调用Agent执行一次任务; 给出 agent 时直接使用该记录, 否则按ID在本进程的注册表中查找"""
+    if agent is not None:
+        response = await agent_service.invoke(agent, title, context)
+    else:
+        response = await agent_service.call_agent(agent_id, title, context)
+    return {
+        "task": title,
+        "agent": response["agent_name"],
+        "output": response["result"],
+        "context": context
+    }
+
+
+async def run_payload(payload: dict) -> dict:
+    """队列worker的执行入口 (见 services/queue_worker.py); 使用载荷中的Agent快照"""
+    agent = Agent(**payload["agent"]) if payload.get("agent") else None
+    return await run_on_agent(payload["agent_id"], payload["title"], payload["context"], agent)
 
 
-# 全局任务服务实例
-task_service = TaskService()
+# 全局任务服务实例, 与Agent服务共用技能索引; TASK_QUEUE_BACKEND=redis 时执行交给队列worker.
+# 任务记录, 派发队列和Agent注册表都在本进程内存中, API只能以单进程运行; 多API进程共用任务池尚未实现
+# (见 services/queue_backend.py)
+task_service = TaskService(agent_service.skill_index, queue_backend_from_env())
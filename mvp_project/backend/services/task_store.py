@@ -0,0 +1,137 @@
+"""
+Task Store - 任务内存存储 + 二级索引
+
+- 按创建时间排序的键列表 (created_at, task_id), 另按 status / agent_id / (status, agent_id) 各维护一份,
+  创建/更新/删除时增量维护 (bisect 定位); 新任务的键总在末尾, 插入是追加
+- 列表查询直接取对应索引, 从新到旧取 limit 条: O(log n + k), 不复制, 不过滤, 不排序
+- 游标为上一页最后一条的键 (不透明字符串), 下一页从它之前开始; 翻页期间有新任务也不会重复或遗漏
+"""
+import base64
+import bisect
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from models.task import Task, TaskStatus
+
+Key = Tuple[datetime, str]      # (created_at, task_id)
+
+
+def encode_cursor(key: Key) -> str:
+    raw = f"{key[0].isoformat()}|{key[1]}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Key:
+    """encode_cursor 的逆; 格式不对或带时区 (创建时间都是naive UTC, 无法比较) 时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, task_id = raw.split("|", 1)
+        key = datetime.fromisoformat(created_at), task_id
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if key[0].tzinfo is not None:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return key
+
+
+class TaskStore:
+    """task_id -> Task, 以及按创建时间排序的二级索引; 修改 status/agent_id 后调用 reindex"""
+
+    def __init__(self):
+        self._tasks: Dict[str, Task] = {}
+        self._indexed: Dict[str, tuple] = {}        # task_id -> (key, status, agent_id), 即当前所在的索引
+        self._all: List[Key] = []
+        self._by_status: Dict[TaskStatus, List[Key]] = {}
+        self._by_agent: Dict[str, List[Key]] = {}
+        self._by_status_agent: Dict[tuple, List[Key]] = {}
+
+    # ---------- dict 接口 ----------
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._tasks
+
+    def __getitem__(self, task_id: str) -> Task:
+        return self._tasks[task_id]
+
+    def get(self, task_id: str) -> Optional[Task]:
+        return self._tasks.get(task_id)
+
+    def values(self):
+        return self._tasks.values()
+
+    def add(self, task: Task):
+        if task.id in self._tasks:
+            self.pop(task.id)
+        self._tasks[task.id] = task
+        key = (task.created_at, task.id)
+        _insert(self._all, key)
+        self._index(key, task.status, task.agent_id)
+
+    def pop(self, task_id: str) -> Task:
+        task = self._tasks.pop(task_id)
+        key, status, agent_id = self._indexed.pop(task_id)
+        _remove(self._all, key)
+        self._unindex(key, status, agent_id)
+        return task
+
+    def reindex(self, task: Task):
+        """任务的 status 或 agent_id 变化后更新索引 (未变化时不做事)"""
+        key, status, agent_id = self._indexed[task.id]
+        if (status, agent_id) != (task.status, task.agent_id):
+            self._unindex(key, status, agent_id)
+            self._index(key, task.status, task.agent_id)
+
+    def _index(self, key: Key, status: TaskStatus, agent_id: Optional[str]):
+        self._indexed[key[1]] = (key, status, agent_id)
+        _insert(self._by_status.setdefault(status, []), key)
+        if agent_id is not None:
+            _insert(self._by_agent.setdefault(agent_id, []), key)
+            _insert(self._by_status_agent.setdefault((status, agent_id), []), key)
+
+    def _unindex(self, key: Key, status: TaskStatus, agent_id: Optional[str]):
+        _remove(self._by_status[status], key)
+        if agent_id is not None:
+            _remove(self._by_agent[agent_id], key)
+            keys = self._by_status_agent[status, agent_id]
+            _remove(keys, key)
+            if not keys:
+                del self._by_status_agent[status, agent_id]
+
+    # ---------- 查询 ----------
+    def _keys(self, status: Optional[TaskStatus], agent_id: Optional[str]) -> List[Key]:
+        if status and agent_id:
+            return self._by_status_agent.get((status, agent_id), [])
+        if status:
+            return self._by_status.get(status, [])
+        if agent_id:
+            return self._by_agent.get(agent_id, [])
+        return self._all
+
+    def page(self, status: Optional[TaskStatus] = None, agent_id: Optional[str] = None,
+             limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[Task], Optional[str]]:
+        """
+        按创建时间从新到旧列出任务
+
+        返回 (任务列表, 下一页游标); 没有更多任务时游标为 None
+        """
+        keys = self._keys(status, agent_id)
+        end = bisect.bisect_left(keys, decode_cursor(cursor)) if cursor else len(keys)
+        start = 0 if limit is None else max(0, end - limit)
+        tasks = [self._tasks[task_id] for _, task_id in reversed(keys[start:end])]
+        next_cursor = encode_cursor(keys[start]) if start > 0 else None
+        return tasks, next_cursor
+
+
+def _insert(keys: List[Key], key: Key):
+    if not keys or keys[-1] < key:
+        keys.append(key)
+    else:
+        bisect.insort(keys, key)
+
+
+def _remove(keys: List[Key], key: Key):
+    i = bisect.bisect_left(keys, key)
+    if i < len(keys) and keys[i] == key:
+        del keys[i]
@@ -0,0 +1,239 @@
+"""
+任务派发测试 - services/dispatcher.py, TaskService 的派发容量和改派
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from models.agent import Agent, AgentStatus
+from models.task import TaskCreate, TaskPriority, TaskStatus, TaskUpdate
+from services import task_service as task_service_module
+from services.agent_service import agent_service
+from services.dispatcher import TaskDispatcher
+from services.skill_index import SkillIndex
+from services.task_service import TaskService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_service(monkeypatch, agents, agent_limit=1):
+    """TaskService + 在Agent上阻塞到 gates[标题] 被设置的执行函数"""
+    gates = {}
+
+    async def run_on_agent(agent_id, title, context, agent=None):
+        await gates.setdefault(title, asyncio.Event()).wait()
+        return {"title": title}
+
+    monkeypatch.setattr(task_service_module, "run_on_agent", run_on_agent)
+    for agent in agents:
+        monkeypatch.setitem(agent_service.agents, agent.id, agent)
+    service = TaskService(SkillIndex())
+    service.executor.agent_limit = agent_limit
+    return service, gates
+
+
+async def finish(service, gates, task, future):
+    gates.setdefault(task.title, asyncio.Event()).set()
+    await future
+    assert task.status == TaskStatus.COMPLETED
+
+
+def test_priority_and_aging():
+    """高优先级先派发; 等待满 aging_seconds 的低优先级任务提升一级"""
+    clock = FakeClock()
+    dispatcher = TaskDispatcher(aging_seconds=10, clock=clock)
+    dispatcher.submit("low", TaskPriority.LOW)
+    dispatcher.submit("urgent", TaskPriority.URGENT)
+    dispatcher.register_agent("a", capacity=1)
+    assert dispatcher.dispatch()[0] == "urgent"
+    dispatcher.complete("a")
+    clock.now = 30                  # low 已等待30秒, 提升三级, 排在刚到的 medium 之前
+    dispatcher.submit("medium", TaskPriority.MEDIUM)
+    assert dispatcher.dispatch()[0] == "low"
+    assert dispatcher.dispatch() is None, "容量已满"
+    print("✅ test_priority_and_aging PASSED")
+
+
+def test_high_overtakes_queued_low(monkeypatch):
+    """Agent容量来自执行池的并发上限: 执行中的任务占满容量时排队, 空出后 HIGH 任务先于先到的 LOW 任务分配"""
+    agents = [Agent(id="agent-1", name="Agent 1")]
+
+    async def scenario():
+        service, gates = make_service(monkeypatch, agents)
+        first = await service.create_task(TaskCreate(title="first"), agents)
+        running = await service.submit_execution(first.id)
+        low = await service.create_task(TaskCreate(title="low", priority=TaskPriority.LOW), agents)
+        high = await service.create_task(TaskCreate(title="high", priority=TaskPriority.HIGH), agents)
+        assert first.agent_id == "agent-1"
+        assert low.agent_id is None and high.agent_id is None, "容量已满的任务应排队"
+        dispatch_all, order = service.scheduler.dispatcher.dispatch_all, []
+        service.scheduler.dispatcher.dispatch_all = lambda: order.extend(dispatch_all()) or order
+        await finish(service, gates, first, running)
+        assert [task_id for task_id, _, _ in order] == [high.id, low.id], "HIGH 应先于先到的 LOW 派发"
+        assert high.agent_id == low.agent_id == "agent-1"
+        await service.executor.shutdown()
+    asyncio.run(scenario())
+    print("✅ test_high_overtakes_queued_low PASSED")
+
+
+def test_unexecuted_tasks_hold_no_capacity(monkeypatch):
+    """只创建不执行的任务照常在创建时分配Agent, 不占容量; 开始执行才计入, 结束后释放"""
+    agents = [Agent(id="agent-1", name="Agent 1"), Agent(id="agent-2", name="Agent 2")]
+
+    async def scenario():
+        service, gates = make_service(monkeypatch, agents)
+        dispatcher = service.scheduler.dispatcher
+        tasks = [await service.create_task(TaskCreate(title=f"t{i}"), agents) for i in range(5)]
+        assert all(task.agent_id for task in tasks) and dispatcher.queued() == 0
+        assert {task.agent_id for task in tasks} == {"agent-1", "agent-2"}, "未执行的任务也应轮流分配"
+        assert dispatcher.inflight("agent-1") == dispatcher.inflight("agent-2") == 0
+        future = await service.submit_execution(tasks[0].id)
+        assert dispatcher.inflight(tasks[0].agent_id) == 1
+        await finish(service, gates, tasks[0], future)
+        assert dispatcher.inflight(tasks[0].agent_id) == 0
+        await service.update_task(tasks[1].id, TaskUpdate(status=TaskStatus.CANCELLED))
+        assert dispatcher.inflight("agent-1") == dispatcher.inflight("agent-2") == 0
+        await service.executor.shutdown()
+    asyncio.run(scenario())
+    print("✅ test_unexecuted_tasks_hold_no_capacity PASSED")
+
+
+def test_reassign(monkeypatch):
+    """改派未执行的任务不改变在途计数; 执行中的任务不能改派"""
+    agents = [Agent(id="agent-1", name="Agent 1"), Agent(id="agent-2", name="Agent 2")]
+
+    async def scenario():
+        service, gates = make_service(monkeypatch, agents, agent_limit=2)
+        dispatcher = service.scheduler.dispatcher
+        task = await service.create_task(TaskCreate(title="t", preferred_agent_id="agent-1"), agents)
+        await service.update_task(task.id, TaskUpdate(agent_id="agent-2"))
+        assert task.agent_id == "agent-2" and task.assigned_agent == "Agent 2"
+        future = await service.submit_execution(task.id)
+        assert (dispatcher.inflight("agent-1"), dispatcher.inflight("agent-2")) == (0, 1)
+        with pytest.raises(ValueError):
+            await service.update_task(task.id, TaskUpdate(agent_id="agent-1"))
+        await finish(service, gates, task, future)
+        assert (dispatcher.inflight("agent-1"), dispatcher.inflight("agent-2")) == (0, 0)
+        await service.executor.shutdown()
+    asyncio.run(scenario())
+    print("✅ test_reassign PASSED")
+
+
+def test_reassign_queued_task_leaves_queue(monkeypatch):
+    """排队中的任务被手动指定Agent后出队, 不会再被派发一次"""
+    agents = [Agent(id="agent-1", name="Agent 1"), Agent(id="agent-2", name="Agent 2")]
+
+    async def scenario():
+        service, gates = make_service(monkeypatch, agents)
+        dispatcher = service.scheduler.dispatcher
+        for title in ("a", "b"):
+            task = await service.create_task(TaskCreate(title=title), agents)
+            await service.submit_execution(task.id)
+        queued = await service.create_task(TaskCreate(title="c"), agents)
+        assert queued.agent_id is None and dispatcher.queued() == 1
+        await service.update_task(queued.id, TaskUpdate(agent_id="agent-1"))
+        assert dispatcher.queued() == 0 and queued.agent_id == "agent-1"
+        await service.executor.shutdown()
+    asyncio.run(scenario())
+    print("✅ test_reassign_queued_task_leaves_queue PASSED")
+
+
+def test_deactivated_agent_gets_no_queued_work(monkeypatch):
+    """Agent在注册后被停用/删除: 之后派发排队任务时先同步, 不再分配给它"""
+    agents = [Agent(id="agent-1", name="Agent 1"), Agent(id="agent-2", name="Agent 2")]
+
+    async def scenario():
+        service, gates = make_service(monkeypatch, agents)
+        running = {}
+        for title in ("a", "b"):
+            task = await service.create_task(TaskCreate(title=title), agents)
+            running[task.agent_id] = (task, await service.submit_execution(task.id))
+        queued = await service.create_task(TaskCreate(title="queued"), agents)
+        assert queued.agent_id is None
+
+        index = service.scheduler.skill_index                  # 直接改索引, 不经过 TaskScheduler
+        index.add(agents[1].model_copy(update={"status": AgentStatus.INACTIVE}))
+        await finish(service, gates, *running["agent-2"])
+        assert queued.agent_id is None, "停用的Agent不应收到排队任务"
+        index.remove("agent-1")
+        index.add(agents[0])
+        await finish(service, gates, *running["agent-1"])
+        assert queued.agent_id == "agent-1"
+        await service.executor.shutdown()
+    asyncio.run(scenario())
+    print("✅ test_deactivated_agent_gets_no_queued_work PASSED")
+
+
+def test_deactivated_agent_never_matches():
+    """Agent在技能索引中被停用后 (派发器尚未同步), 任何选择路径都不再返回它; 同步恢复后重新参与"""
+    from models.agent import Skill
+
+    skill = Skill(id="python", name="Python", category="dev")
+    agents = [Agent(id=f"a{i}", name=f"a{i}", skills=[skill]) for i in range(2)]
+    index = SkillIndex()
+    dispatcher = TaskDispatcher(skill_index=index)
+    for agent in agents:
+        index.add(agent)
+        dispatcher.register_agent(agent.id, capacity=2)
+    assert dispatcher.least_loaded_for(["python"]) == "a0"
+    dispatcher.assign("t0", "a1")                          # a1 负载更高, a0 在各个堆顶
+
+    index.add(agents[0].model_copy(update={"status": AgentStatus.INACTIVE}))
+    assert dispatcher.least_loaded() == "a1"
+    assert dispatcher.least_loaded_for(["python"]) == "a1"
+    assert dispatcher.least_loaded({"a0", "a1"}) == "a1"
+    dispatcher.submit("t1", preferred_agent_id="a0")
+    assert dispatcher.dispatch()[1] == "a1"
+    dispatcher.assign("t2", "a1")                          # a1 满载, 只剩停用的 a0
+    dispatcher.submit("t3")
+    assert dispatcher.dispatch() is None and dispatcher.least_loaded_for(["dev"]) is None
+
+    index.add(agents[0])
+    dispatcher.sync_agents(list(index.agents), lambda _: 2)
+    assert dispatcher.dispatch()[:2] == ("t3", "a0")
+    print("✅ test_deactivated_agent_never_matches PASSED")
+
+
+def test_skill_heap_matches_linear_scan():
+    """按技能要求的负载堆与逐个比较匹配Agent的结果一致 (随机派发/完成/上下线/技能变更)"""
+    import random
+    from models.agent import AgentStatus, Skill
+
+    rng = random.Random(7)
+    skills = [Skill(id=f"s{i}", name=f"s{i}", category=f"c{i % 3}") for i in range(8)]
+    index = SkillIndex()
+    dispatcher = TaskDispatcher(skill_index=index, max_skill_groups=4)
+    agents = [Agent(id=f"a{i}", name=f"a{i}", skills=rng.sample(skills, 3)) for i in range(20)]
+    for agent in agents:
+        index.add(agent)
+        dispatcher.register_agent(agent.id, weight=rng.choice([1, 2]), capacity=3)
+    queries = [(tuple(rng.sample([s.id for s in skills] + ["c0", "c1"], rng.randint(1, 2))), rng.choice(["all", "any"]))
+               for _ in range(10)]
+    for step in range(2000):
+        requirements, mode = rng.choice(queries)
+        eligible = index.match(requirements, mode)
+        expected = dispatcher.least_loaded(eligible or None)
+        assert dispatcher.least_loaded_for(requirements, mode) == expected, f"step {step}: {requirements} {mode}"
+        action = rng.random()
+        if action < 0.5 and expected:
+            dispatcher.assign(f"t{step}", expected)
+        elif action < 0.8:
+            dispatcher.complete(rng.choice(agents).id)
+        elif action < 0.9:
+            agent = rng.choice(agents)
+            agent.status = AgentStatus.INACTIVE if agent.status == AgentStatus.ACTIVE else AgentStatus.ACTIVE
+            index.add(agent)
+            dispatcher.sync_agents(list(index.agents), lambda _: 3)
+        else:
+            agent = rng.choice(agents)
+            agent.skills = rng.sample(skills, 3)
+            index.add(agent)
+    print("✅ test_skill_heap_matches_linear_scan PASSED")
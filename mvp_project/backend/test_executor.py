@@ -0,0 +1,181 @@
+"""
+任务执行池测试 - services/executor.py 的重试, 超时, 取消, Agent并发上限, 有界队列; TaskService.execute_task
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from models.agent import Agent
+from models.task import TaskCreate, TaskStatus
+from services import task_service as task_service_module
+from services.agent_service import agent_service
+from services.executor import ExecutorFull, TaskExecutor
+from services.skill_index import SkillIndex
+from services.task_service import TaskService
+
+
+def fast_executor(runner, **options):
+    options = {"backoff": 0.001, "backoff_max": 0.01, "timeout": 5.0, **options}
+    return TaskExecutor(runner, **options)
+
+
+def test_retry_until_success():
+    """失败后按退避重试, 第三次成功; on_start 收到每次的序号"""
+    attempts, started = {}, []
+
+    async def runner(task_id, agent_id):
+        attempts[task_id] = attempts.get(task_id, 0) + 1
+        if attempts[task_id] < 3:
+            raise RuntimeError("agent busy")
+        return {"ok": attempts[task_id]}
+
+    async def on_start(task_id, agent_id, attempt):
+        started.append(attempt)
+
+    async def scenario():
+        executor = fast_executor(runner, max_retries=2, on_start=on_start)
+        outcome = await executor.submit("t1", "agent-1")
+        await executor.shutdown()
+        return executor, outcome
+
+    executor, outcome = asyncio.run(scenario())
+    assert outcome.status == TaskStatus.COMPLETED and outcome.result == {"ok": 3}
+    assert started == [1, 2, 3]
+    assert executor.stats["retried"] == 2 and executor.stats["completed"] == 1
+    print("✅ test_retry_until_success PASSED")
+
+
+def test_retries_exhausted_and_timeout():
+    """超过重试次数后失败并带上最后的错误; 超时算一次失败"""
+    async def failing(task_id, agent_id):
+        raise RuntimeError("boom")
+
+    async def hanging(task_id, agent_id):
+        await asyncio.sleep(10)
+
+    async def scenario():
+        executor = fast_executor(failing, max_retries=1)
+        failed = await executor.submit("t1", "agent-1")
+        slow = fast_executor(hanging, timeout=0.05)
+        timed_out = await slow.submit("t2", "agent-1", max_retries=0)
+        await executor.shutdown()
+        await slow.shutdown()
+        return executor, failed, slow, timed_out
+
+    executor, failed, slow, timed_out = asyncio.run(scenario())
+    assert failed.status == TaskStatus.FAILED and failed.error == "RuntimeError: boom"
+    assert executor.stats["retried"] == 1 and executor.stats["failed"] == 1
+    assert timed_out.status == TaskStatus.FAILED and timed_out.error.startswith("Timed out after 0.05")
+    assert slow.stats["timed_out"] == 1 and timed_out.duration_seconds < 1
+    print("✅ test_retries_exhausted_and_timeout PASSED")
+
+
+def test_cancel_running_and_queued():
+    """取消执行中的任务停止其协程; 取消排队中的任务直接出队, 从不执行"""
+    ran, stopped = [], []
+
+    async def runner(task_id, agent_id):
+        ran.append(task_id)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            stopped.append(task_id)
+            raise
+
+    async def scenario():
+        executor = fast_executor(runner, agent_limit=1)
+        running = executor.submit("running", "agent-1")
+        queued = executor.submit("queued", "agent-1")           # 等待 agent-1 的空位
+        await asyncio.sleep(0.05)
+        assert await executor.cancel("queued") and await executor.cancel("running")
+        outcomes = await asyncio.gather(running, queued)
+        assert not await executor.cancel("running"), "已结束的任务不能再取消"
+        await executor.shutdown()
+        return executor, outcomes
+
+    executor, outcomes = asyncio.run(scenario())
+    assert [o.status for o in outcomes] == [TaskStatus.CANCELLED, TaskStatus.CANCELLED]
+    assert ran == ["running"] and stopped == ["running"]
+    assert executor.stats["cancelled"] == 2 and executor.stats["retried"] == 0
+    print("✅ test_cancel_running_and_queued PASSED")
+
+
+def test_agent_limit_does_not_block_other_agents():
+    """同一Agent同时执行的任务不超过上限, 超出的等待; 其它Agent的任务不受影响"""
+    running, peak, finished = {}, {}, []
+
+    async def runner(task_id, agent_id):
+        running[agent_id] = running.get(agent_id, 0) + 1
+        peak[agent_id] = max(peak.get(agent_id, 0), running[agent_id])
+        await asyncio.sleep(0.02)
+        running[agent_id] -= 1
+        finished.append(task_id)
+        return {}
+
+    async def scenario():
+        executor = fast_executor(runner, workers=4, agent_limit=2, agent_limits={"agent-fast": 4})
+        futures = [executor.submit(f"slow-{i}", "agent-slow") for i in range(6)]
+        futures += [executor.submit(f"fast-{i}", "agent-fast") for i in range(2)]
+        await asyncio.sleep(0.03)
+        early = list(finished)
+        await asyncio.gather(*futures)
+        await executor.shutdown()
+        return early
+
+    early = asyncio.run(scenario())
+    assert peak == {"agent-slow": 2, "agent-fast": 2}
+    assert {"fast-0", "fast-1"} <= set(early), "agent-fast 的任务不应排在 agent-slow 的等待队列之后"
+    print("✅ test_agent_limit_does_not_block_other_agents PASSED")
+
+
+def test_bounded_queue_rejects():
+    """排队中的任务达到 queue_size 时拒绝提交; 重复提交同一任务报错"""
+    async def runner(task_id, agent_id):
+        return {}
+
+    async def scenario():
+        executor = fast_executor(runner, queue_size=2)
+        futures = [executor.submit("t1", "a"), executor.submit("t2", "a")]
+        with pytest.raises(ValueError):
+            executor.submit("t1", "a")
+        with pytest.raises(ExecutorFull):
+            executor.submit("t3", "a")
+        await asyncio.gather(*futures)
+        executor.submit("t3", "a")                               # 队列有空位后可以提交
+        await executor.shutdown()
+        return executor
+
+    executor = asyncio.run(scenario())
+    assert executor.stats["rejected"] == 1
+    print("✅ test_bounded_queue_rejects PASSED")
+
+
+def test_execute_task_updates_task(monkeypatch):
+    """TaskService.execute_task: 经执行池在Agent上执行, 任务状态和执行次数随之更新"""
+    calls = []
+
+    async def fake_run_on_agent(agent_id, title, context, agent=None):
+        calls.append(agent_id)
+        if len(calls) == 1:
+            raise RuntimeError("flaky")
+        return {"title": title}
+
+    monkeypatch.setattr(task_service_module, "run_on_agent", fake_run_on_agent)
+    agent = Agent(id="exec-agent", name="Exec Agent")
+    monkeypatch.setitem(agent_service.agents, agent.id, agent)
+
+    async def scenario():
+        service = TaskService(SkillIndex())
+        service.executor.backoff = 0.001
+        task = await service.create_task(TaskCreate(title="report", max_retries=1), [agent])
+        outcome = await service.execute_task(task.id)
+        await service.executor.shutdown()
+        return task, outcome
+
+    task, outcome = asyncio.run(scenario())
+    assert outcome.status == TaskStatus.COMPLETED and outcome.result == {"title": "report"}
+    assert task.status == TaskStatus.COMPLETED and task.attempts == 2
+    assert calls == ["exec-agent", "exec-agent"]
+    print("✅ test_execute_task_updates_task PASSED")
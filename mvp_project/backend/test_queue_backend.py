@@ -0,0 +1,119 @@
+"""
+任务队列测试 - services/queue_backend.py (内存 / Redis Streams), services/queue_worker.py
+"""
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from benchmarks.queue_bench import FakeRedis
+from models.agent import Agent
+from services.queue_backend import MemoryQueueBackend, QueueBackend, RedisStreamBackend
+from services.queue_worker import QueueWorker
+from services.task_service import run_payload
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def payload(task_id, agent=None):
+    return {"task_id": task_id, "agent_id": "agent-x", "title": task_id, "context": {},
+            "timeout_seconds": None, "max_retries": None, **({"agent": agent} if agent else {})}
+
+
+def backends():
+    """(后端, 让可见超时过去的函数)"""
+    clock = FakeClock()
+    memory = MemoryQueueBackend(visibility_timeout=10, max_deliveries=2, clock=clock)
+    yield memory, lambda: setattr(clock, "now", clock.now + 11)
+    redis = RedisStreamBackend(FakeRedis(), visibility_timeout=0.05, max_deliveries=2)
+    yield redis, lambda: time.sleep(0.06)
+
+
+def test_backend_interface_is_abstract():
+    """后端必须实现全部接口方法, 缺少的在实例化时报错"""
+    class Partial(QueueBackend):
+        def enqueue(self, payload):
+            return "1-0"
+
+    with pytest.raises(TypeError):
+        Partial()
+    with pytest.raises(TypeError):
+        QueueBackend()
+    print("✅ test_backend_interface_is_abstract PASSED")
+
+
+def test_redelivery_after_visibility_timeout():
+    """认领后未确认的消息在可见超时后被其它worker重新认领; 确认后删除"""
+    for backend, expire in backends():
+        backend.enqueue(payload("t1"))
+        (message_id, first), = backend.claim("crashed", 1)
+        assert backend.claim("other", 1) == [], f"{type(backend).__name__}: 超时前不应重新投递"
+        expire()
+        claimed = backend.claim("other", 1)
+        assert [(m, p["task_id"]) for m, p in claimed] == [(message_id, "t1")], type(backend).__name__
+        backend.ack(message_id)
+        assert backend.depth() == 0
+    print("✅ test_redelivery_after_visibility_timeout PASSED")
+
+
+def test_extend_keeps_message():
+    """续期的消息不会被重新投递"""
+    for backend, expire in backends():
+        backend.enqueue(payload("t1"))
+        (message_id, _), = backend.claim("w1", 1)
+        if isinstance(backend, MemoryQueueBackend):
+            backend.clock.now += 6
+            backend.extend([message_id], "w1")
+            backend.clock.now += 6
+        else:
+            time.sleep(0.03)
+            backend.extend([message_id], "w1")
+            time.sleep(0.03)
+        assert backend.claim("w2", 1) == [], type(backend).__name__
+    print("✅ test_extend_keeps_message PASSED")
+
+
+def test_dead_letter_after_max_deliveries():
+    """投递达到上限仍未确认的消息进入死信, 并上报失败"""
+    for backend, expire in backends():
+        backend.enqueue(payload("t1"))
+        backend.claim("w1", 1)
+        expire()
+        assert len(backend.claim("w2", 1)) == 1
+        expire()
+        assert backend.claim("w3", 1) == [], type(backend).__name__
+        assert backend.depth() == 0
+        record = backend.poll_status(["t1"])["t1"]
+        assert record["status"] == "failed" and "2 deliveries" in record["error"], record
+    print("✅ test_dead_letter_after_max_deliveries PASSED")
+
+
+def test_worker_runs_agent_snapshot():
+    """worker用载荷中的Agent快照执行, 不要求Agent在worker进程注册; 上报结果后确认"""
+    async def scenario():
+        backend = MemoryQueueBackend()
+        agent = Agent(id="registered-elsewhere", name="Remote Agent").model_dump(mode="json")
+        backend.enqueue(payload("t1", agent))
+        worker = QueueWorker(backend, run_payload, "w1", concurrency=2, poll_ms=10)
+        stop = asyncio.Event()
+        runner = asyncio.ensure_future(worker.run(stop))
+        for _ in range(200):
+            if backend.depth() == 0:
+                break
+            await asyncio.sleep(0.01)
+        stop.set()
+        await runner
+        return backend.poll_status(["t1"])["t1"]
+
+    record = asyncio.run(scenario())
+    assert record["status"] == "completed", record
+    assert record["result"]["agent"] == "Remote Agent" and record["attempts"] == 1
+    print("✅ test_worker_runs_agent_snapshot PASSED")
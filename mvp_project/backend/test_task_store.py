@@ -0,0 +1,77 @@
+"""
+任务列表测试 - services/task_store.py 的索引和游标分页
+"""
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from models.task import Task, TaskStatus
+from services.task_store import TaskStore, encode_cursor
+
+
+def make_store(n=25):
+    store = TaskStore()
+    start = datetime(2026, 1, 1)
+    for i in range(n):
+        store.add(Task(id=f"task-{i:03d}", title=f"task {i}", created_at=start + timedelta(seconds=i // 2),
+                       status=TaskStatus.COMPLETED if i % 3 else TaskStatus.PENDING, agent_id=f"agent-{i % 2}"))
+    return store
+
+
+def all_pages(store, limit, **query):
+    tasks, cursor = store.page(limit=limit, **query)
+    while cursor:
+        page, cursor = store.page(limit=limit, cursor=cursor, **query)
+        tasks.extend(page)
+    return [t.id for t in tasks]
+
+
+def all_pages_from(store, cursor):
+    ids = []
+    while cursor:
+        page, cursor = store.page(limit=7, cursor=cursor)
+        ids.extend(t.id for t in page)
+    return ids
+
+
+def test_cursor_pages_match_full_scan():
+    """按游标翻完所有页 = 过滤后按创建时间倒序的全部任务 (创建时间相同时不重复不遗漏)"""
+    store = make_store()
+    for query in ({}, {"status": TaskStatus.PENDING}, {"agent_id": "agent-1"},
+                  {"status": TaskStatus.COMPLETED, "agent_id": "agent-0"}):
+        expected = sorted((t for t in store.values()
+                           if all(getattr(t, field) == value for field, value in query.items())),
+                          key=lambda t: (t.created_at, t.id), reverse=True)
+        assert all_pages(store, 4, **query) == [t.id for t in expected], query
+    print("✅ test_cursor_pages_match_full_scan PASSED")
+
+
+def test_reindex_and_new_tasks_during_paging():
+    """状态变更后索引随之更新; 翻页期间新建的任务不影响后续页"""
+    store = make_store()
+    task = store["task-000"]
+    task.status = TaskStatus.RUNNING
+    store.reindex(task)
+    assert [t.id for t in store.page(status=TaskStatus.RUNNING)[0]] == ["task-000"]
+    assert "task-000" not in [t.id for t in store.page(status=TaskStatus.PENDING)[0]]
+
+    first, cursor = store.page(limit=10)
+    store.add(Task(id="task-new", title="new", created_at=datetime(2026, 2, 1)))
+    rest = all_pages_from(store, cursor)
+    assert [t.id for t in first] + rest == all_pages(store, 100)[1:]
+    print("✅ test_reindex_and_new_tasks_during_paging PASSED")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    base64.urlsafe_b64encode(b"no separator").decode(),
+    encode_cursor((datetime(2026, 1, 1, tzinfo=datetime.now().astimezone().tzinfo), "task-001")),
+    base64.urlsafe_b64encode(b"2026-01-01T00:00:00+08:00|task-001").decode(),
+])
+def test_invalid_cursor_raises_value_error(cursor):
+    """非法游标 (含带时区的时间) 抛出 ValueError, API 返回 400 而不是 500"""
+    with pytest.raises(ValueError):
+        make_store().page(limit=5, cursor=cursor)
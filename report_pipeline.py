@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日报流水线 - 定时任务用: 每日快照 + 增量采集 + 机器可读输出
+
+每次运行:
+  1. 读取最近一次快照 (out/YYYY-MM-DD/), 按各证券上次的拉取时间数出之后开始过的交易时段:
+     没有新时段的证券直接沿用快照; 其余只拉取尾部 (新时段数+1根, 覆盖上次可能未收盘的一根);
+     快照中没有的证券完整拉取 history 根. 拉取失败的证券沿用快照, 下次重试
+  2. 合并为每只证券最近 history 根K线, 在 FinancialAnalyzer.daily_report 上生成日报
+  3. 写入今天的快照目录:
+       bars      全部K线长表 (market, code, time, open, high, low, close, volume)
+       metrics   全部证券的指标截面 (见 Indicators.snapshot) + 名称, 最后一根K线时间, 拉取时间
+       report.json  日报各项结果 + 采集统计 + 各阶段耗时;  report.txt  文字日报
+表格优先写 Parquet (需要 pyarrow 或 fastparquet), 否则写 csv.gz.
+
+用法:
+    python report_pipeline.py run [--out ~/.ashare/reports] [--history 60] [--universe 证券池.csv] [--filter ...]
+    python report_pipeline.py bench [--symbols 2000] [--latency 0.05]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+from datetime import time as dtime
+
+import numpy as np
+import pandas as pd
+
+from financial_analyzer import INDICES, FinancialAnalyzer
+from indicators import FIELDS, normalize_ohlcv
+from screener import Screener, load_universe
+
+MARKETS = ['a', 'hk']
+SESSIONS = {'a': (dtime(9, 30), dtime(15, 0)), 'hk': (dtime(9, 30), dtime(16, 10))}   # 开盘, 收盘 (港股含收市竞价)
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+# ============ 表格读写 ============
+def write_table(df, stem):
+    """表格 → stem.parquet, 没有Parquet引擎时 stem.csv.gz; 返回写入的文件名"""
+    try:
+        df.to_parquet(stem + '.parquet', index=False)
+        return os.path.basename(stem) + '.parquet'
+    except ImportError:
+        df.to_csv(stem + '.csv.gz', index=False, compression={'method': 'gzip', 'compresslevel': 1})
+        return os.path.basename(stem) + '.csv.gz'
+
+
+def read_table(stem):
+    """读取 write_table 写入的表格; 不存在时为 None"""
+    if os.path.exists(stem + '.parquet'):
+        return pd.read_parquet(stem + '.parquet')
+    if os.path.exists(stem + '.csv.gz'):
+        return pd.read_csv(stem + '.csv.gz', dtype={'market': str, 'code': str})
+    return None
+
+
+def new_sessions(fetched_at, now, market):
+    """fetched_at 之后到 now 开始过的交易时段数 (按工作日估计, 不含节假日); fetched_at 在盘中时算上当时的时段"""
+    open_, close = SESSIONS[market]
+    first = fetched_at.date() + timedelta(days=fetched_at.time() >= open_)
+    last = now.date() - timedelta(days=now.time() < open_)
+    sessions = int(np.busday_count(first, last + timedelta(days=1))) if last >= first else 0
+    in_session = np.is_busday(fetched_at.date()) and open_ <= fetched_at.time() < close
+    return sessions + int(in_session)
+
+
+# ============ 流水线 ============
+class ReportPipeline:
+    """analyzer 的证券池和选股条件决定快照覆盖的证券; out_dir 下每天一个快照目录"""
+
+    def __init__(self, analyzer, out_dir, history=60, clock=datetime.now):
+        self.analyzer = analyzer
+        self.out_dir = os.path.expanduser(out_dir)
+        self.history = history
+        self.clock = clock
+        self.timings = {}
+        self.stats = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def latest_snapshot(self):
+        """最近一次快照目录 (可以是今天的, 即当天重跑); 没有时为 None"""
+        if not os.path.isdir(self.out_dir):
+            return None
+        days = sorted(name for name in os.listdir(self.out_dir)
+                      if len(name) == 10 and os.path.exists(os.path.join(self.out_dir, name, 'report.json')))
+        return os.path.join(self.out_dir, days[-1]) if days else None
+
+    @staticmethod
+    def load(folder):
+        """快照 → ({'a': {代码: K线}, 'hk': {...}}, {(市场, 代码): 拉取时间})"""
+        data, fetched = {market: {} for market in MARKETS}, {}
+        bars, metrics = read_table(os.path.join(folder, 'bars')), read_table(os.path.join(folder, 'metrics'))
+        if bars is None or metrics is None or not len(bars):
+            return data, fetched
+        keys = (bars['market'] + ' ' + bars['code']).to_numpy()
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])     # 写入时每只证券连续存放
+        times = np.array(bars['time'].astype(str), dtype='datetime64[ns]')
+        values = bars[FIELDS].to_numpy(dtype=float)
+        for start, end in zip(starts, np.r_[starts[1:], len(keys)]):
+            df = pd.DataFrame(values[start:end], index=pd.DatetimeIndex(times[start:end]), columns=FIELDS)
+            df.index.name = ''
+            market, code = keys[start].split(' ', 1)
+            data[market][code] = df
+        for market, code, stamp in metrics[['market', 'code', 'fetched_at']].itertuples(index=False):
+            if isinstance(stamp, str) and stamp:
+                fetched[(market, code)] = datetime.strptime(stamp, TIME_FORMAT)
+        return data, fetched
+
+    def update(self, data, fetched):
+        """按快照补齐到现在: 返回合并后的数据和新的拉取时间; 统计写入 self.stats"""
+        now = self.clock()
+        codes = self.analyzer.report_codes(full=True)
+        tasks, sizes = {}, {}
+        getters = {'a': self.analyzer.get_a_stock, 'hk': self.analyzer.get_hk_stock}
+        stats = {'full': 0, 'delta': 0, 'reused': 0, 'failed': 0, 'bars_fetched': 0}
+        for market in MARKETS:
+            for code in codes[market]:
+                old = data[market].get(code)
+                if old is None or not len(old) or (market, code) not in fetched:
+                    count, kind = self.history, 'full'
+                else:
+                    sessions = new_sessions(fetched[(market, code)], now, market)
+                    if sessions == 0:
+                        stats['reused'] += 1
+                        continue
+                    count, kind = min(self.history, sessions + 1), 'delta'
+                sizes[(market, code)] = kind
+                tasks[(market, code)] = (lambda get=getters[market], code=code, count=count: get(code, days=count))
+
+        merged = {market: {code: data[market][code] for code in codes[market] if code in data[market]}
+                  for market in MARKETS}
+        fetched = {key: stamp for key, stamp in fetched.items() if key[1] in merged[key[0]]}
+        for (market, code), df in self.analyzer.gather(tasks).items():
+            if df is None or not len(df):
+                stats['failed'] += 1
+                continue
+            df = normalize_ohlcv(df)
+            stats[sizes[(market, code)]] += 1
+            stats['bars_fetched'] += len(df)
+            old = merged[market].get(code)
+            if old is not None and sizes[(market, code)] == 'delta':
+                df = pd.concat([old[old.index < df.index[0]], df])
+            merged[market][code] = df[-self.history:]
+            fetched[(market, code)] = now
+        self.stats = stats
+        return merged, fetched
+
+    def metrics_table(self, data, fetched):
+        """全部证券的指标截面, 行为 (市场, 代码)"""
+        universe = self.analyzer.universe
+        names = {**universe['name'].to_dict(), **{code: name for name, code in INDICES.items()}}
+        tables = []
+        for market in MARKETS:
+            table = self.analyzer.trend_table(data[market])
+            last_bar = {code: df.index[-1] for code, df in data[market].items() if df is not None and len(df)}
+            table.insert(0, 'name', [names.get(code, '') for code in table.index])
+            table.insert(0, 'market', market)
+            table['last_bar'] = [last_bar[code].strftime(TIME_FORMAT) for code in table.index]
+            table['fetched_at'] = [fetched[(market, code)].strftime(TIME_FORMAT) if (market, code) in fetched else ''
+                                   for code in table.index]
+            tables.append(table)
+        out = pd.concat(tables)
+        out.index.name = 'code'
+        return out.reset_index()[['market', 'code'] + [col for col in out.columns if col != 'market']]
+
+    @staticmethod
+    def bars_table(data):
+        """{市场: {代码: K线}} → 长表, 每只证券连续存放 (数组一次拼接, 不逐只建表)"""
+        frames = [(market, code, df) for market in MARKETS for code, df in data[market].items()
+                  if df is not None and len(df)]
+        lengths = [len(df) for _, _, df in frames]
+        return pd.DataFrame({
+            'market': np.repeat(np.array([market for market, _, _ in frames], dtype=object), lengths),
+            'code': np.repeat(np.array([code for _, code, _ in frames], dtype=object), lengths),
+            'time': np.concatenate([df.index.values for _, _, df in frames] or [np.array([], 'datetime64[ns]')]),
+            **{field: np.concatenate([df[field].to_numpy(dtype=float) for _, _, df in frames] or [np.array([])])
+               for field in FIELDS},
+        })
+
+    def save(self, folder, data, fetched, report, text):
+        """先写临时目录再整体替换, 中途失败不会留下半个快照"""
+        tmp = os.path.join(self.out_dir, '.' + os.path.basename(folder) + '.tmp')
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        report['files'] = {'bars': write_table(self.bars_table(data), os.path.join(tmp, 'bars')),
+                           'metrics': write_table(self.metrics_table(data, fetched), os.path.join(tmp, 'metrics'))}
+        with open(os.path.join(tmp, 'report.txt'), 'w', encoding='utf-8') as f:
+            f.write(text)
+        with open(os.path.join(tmp, 'report.json'), 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        shutil.rmtree(folder, ignore_errors=True)
+        os.replace(tmp, folder)
+
+    def run(self, echo=True):
+        """执行一次: 返回今天快照目录的路径"""
+        self.timings = {}
+        now = self.clock()
+        self.analyzer.today = now.strftime('%Y-%m-%d')
+        folder = os.path.join(self.out_dir, now.strftime('%Y-%m-%d'))
+        previous = self.latest_snapshot()
+        with self.stage('load_snapshot'):
+            data, fetched = self.load(previous) if previous else ({market: {} for market in MARKETS}, {})
+        with self.stage('fetch'):
+            data, fetched = self.update(data, fetched)
+
+        buffer = io.StringIO()
+        with self.stage('report'), contextlib.redirect_stdout(buffer):
+            self.analyzer.daily_report(data)
+        text = buffer.getvalue()
+        if echo:
+            print(text, end='')
+
+        if not self.analyzer.screener.rank:                 # 没有排序表达式时 score 只是证券池顺序
+            self.analyzer.results = {name: table.drop(columns='score', errors='ignore')
+                                     for name, table in self.analyzer.results.items()}
+        report = {
+            'date': now.strftime('%Y-%m-%d'),
+            'generated_at': now.strftime(TIME_FORMAT),
+            'previous_snapshot': os.path.basename(previous) if previous else None,
+            'fetch': self.stats,
+            'results': {name: json.loads(table.reset_index().to_json(orient='records', force_ascii=False))
+                        for name, table in self.analyzer.results.items() if table is not None},
+        }
+        with self.stage('save'):
+            report['timings'] = {**self.timings, **{f'report.{name}': seconds
+                                                    for name, seconds in self.analyzer.timings.items()}}
+            self.save(folder, data, fetched, report, text)
+        return folder
+
+
+# ============ 基准测试 ============
+class _SyntheticMarket:
+    """按代码和日期确定的日线 (截至 clock 当天), 每次请求休眠 latency 秒; 统计请求数和K线数"""
+
+    def __init__(self, clock, latency):
+        self.clock = clock
+        self.latency = latency
+        self.requests = 0
+        self.bars = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, code, days=10):
+        time.sleep(self.latency)
+        index = pd.bdate_range(end=self.clock().date(), periods=days)
+        seed = sum(map(ord, code))
+        phase = index.values.astype('datetime64[D]').astype(np.int64) + seed
+        close = 10 + seed % 50 + np.sin(phase / 7.0) + np.cos(phase / 3.0) * 0.3
+        with self._lock:
+            self.requests += 1
+            self.bars += days
+        return pd.DataFrame({'open': close - 0.1, 'high': close + 0.2, 'low': close - 0.2, 'close': close,
+                             'volume': 1e6 + (phase % 10) * 1e5}, index=index)[FIELDS]
+
+
+def bench(n_symbols, latency, history=60):
+    import tempfile
+
+    now = [datetime(2026, 1, 27, 17, 0)]
+    clock = lambda: now[0]
+    universe = pd.DataFrame({'name': [f"股票{i}" for i in range(n_symbols)],
+                             'sector': [f"板块{i % 30:02d}" for i in range(n_symbols)], 'market': 'a', 'index': ''},
+                            index=pd.Index([f"sh{600000 + i}" for i in range(n_symbols)], name='code'))
+    analyzer = FinancialAnalyzer(universe=universe, screener=Screener(rank="change_5d_pct", top_n=5))
+    market = _SyntheticMarket(clock, latency)
+    analyzer.get_a_stock = market
+    analyzer.get_hk_stock = market
+
+    print(f"{n_symbols} symbols, {history} bars kept, simulated latency {latency * 1000:.0f} ms per request")
+    print(f"  {'run':<28}{'seconds':>9}{'requests':>10}{'bars':>9}   stages")
+    with tempfile.TemporaryDirectory() as folder:
+        pipeline = ReportPipeline(analyzer, folder, history=history, clock=clock)
+        for name, advance in [("first run (full)", 0), ("same evening rerun", 1), ("next day (delta)", 23),
+                              ("after weekend (delta)", 72)]:
+            now[0] += timedelta(hours=advance)
+            requests, bars = market.requests, market.bars
+            start = time.perf_counter()
+            pipeline.run(echo=False)
+            elapsed = time.perf_counter() - start
+            stages = ' '.join(f"{stage} {seconds:.2f}" for stage, seconds in pipeline.timings.items())
+            print(f"  {name:<28}{elapsed:>9.2f}{market.requests - requests:>10}{market.bars - bars:>9}   {stages}")
+
+        # 增量结果与从头完整拉取一致
+        data, _ = ReportPipeline.load(pipeline.latest_snapshot())
+        market.latency = 0
+        fresh = {code: market(code, days=history) for code in data['a']}
+        assert all(np.allclose(data['a'][code].to_numpy(), fresh[code].to_numpy()) for code in data['a'])
+        print("  delta snapshot identical to a full refetch")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="日报流水线")
+    parser.add_argument("command", choices=["run", "bench"])
+    parser.add_argument("--out", default="~/.ashare/reports", help="快照目录 (默认 ~/.ashare/reports)")
+    parser.add_argument("--history", type=int, default=60, help="每只证券保留的K线数 (默认60)")
+    parser.add_argument("--universe", help="证券池CSV, 见 screener.load_universe")
+    parser.add_argument("--filter", help="筛选表达式")
+    parser.add_argument("--rank", help="排序表达式 (越大越靠前)")
+    parser.add_argument("--top", type=int, help="每个板块展示前N名")
+    parser.add_argument("--symbols", type=int, default=2000, help="bench: 证券数量 (默认2000)")
+    parser.add_argument("--latency", type=float, default=0.05, help="bench: 模拟每次请求的秒数 (默认0.05)")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        universe = load_universe(args.universe) if args.universe else None
+        analyzer = FinancialAnalyzer(universe=universe, screener=Screener(args.filter, args.rank, args.top))
+        print(ReportPipeline(analyzer, args.out, history=args.history).run())
+    elif args.command == "bench":
+        bench(args.symbols, args.latency)
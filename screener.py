@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+选股器 - 在证券池上按声明式的筛选/排序表达式, 取每个板块的前N名
+
+证券池: 本地CSV文件, 列为 code,name,sector[,market][,index]
+    market 为 a (默认) 或 hk; index 为所属指数, 多个用 | 分隔, 例如:
+        code,name,sector,market,index
+        sh601899,紫金矿业,有色金属,a,沪深300|上证50
+        00700,腾讯控股,港股通,hk,
+表达式: 作用于 Indicators.snapshot() 的列 (close, change_pct, change_5d_pct, ma5, ma20, rsi14,
+    macd, macd_signal, macd_hist, atr14, volume, volume_z20) 以及 name/sector, 例如
+        filter: "rsi14 < 70 and close > ma20"
+        rank:   "change_5d_pct + 2 * volume_z20"      (越大越靠前)
+
+证券池按 chunk_size 分块获取和计算, 每块一次向量化求值; 每个板块只保留前N名,
+内存占用与证券池大小无关. stream() 逐块产出通过筛选的证券.
+
+用法: python screener.py bench [--symbols 5000] [--chunk 500]
+"""
+
+import argparse
+import heapq
+import itertools
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from indicators import FIELDS, Indicators, make_panel
+
+UNIVERSE_COLUMNS = ['name', 'sector', 'market', 'index']
+
+
+# ============ 证券池 ============
+def load_universe(path, sectors=None, index=None, market=None):
+    """读取证券池CSV → 以 code 为索引的表; 可按板块, 所属指数, 市场过滤"""
+    universe = pd.read_csv(path, dtype=str, keep_default_na=False).set_index('code')
+    for col, default in (('market', 'a'), ('index', '')):
+        if col not in universe.columns:
+            universe[col] = default
+    universe['market'] = universe['market'].replace('', 'a')
+    if sectors is not None:
+        universe = universe[universe['sector'].isin(sectors)]
+    if index is not None:
+        universe = universe[universe['index'].str.split('|').apply(lambda names: index in names)]
+    if market is not None:
+        universe = universe[universe['market'] == market]
+    return universe[UNIVERSE_COLUMNS]
+
+
+def universe_from_sectors(sectors, market='a'):
+    """{板块: {名称: 代码}} → 证券池表"""
+    rows = [(code, name, sector, market, '') for sector, stocks in sectors.items() for name, code in stocks.items()]
+    return pd.DataFrame(rows, columns=['code'] + UNIVERSE_COLUMNS).set_index('code')
+
+
+# ============ 选股 ============
+class Screener:
+    """filter/rank 为 DataFrame.eval 表达式; rank 为空时保持证券池顺序; top_n 为空时不限名额"""
+
+    def __init__(self, filter=None, rank=None, top_n=None, chunk_size=500):
+        self.filter = filter
+        self.rank = rank
+        self.top_n = top_n
+        self.chunk_size = chunk_size
+        self._heaps = {}
+        self._sector_order = {}
+        self._columns = ['name', 'sector', 'score']
+        self._seq = itertools.count()
+
+    def evaluate(self, universe, frames):
+        """一块证券: 指标截面 + 筛选 + 排序分数, 一次向量化求值; 返回通过筛选的行 (含 score 列)"""
+        codes = [code for code in universe.index if frames.get(code) is not None and len(frames[code]) >= 3]
+        table = Indicators(make_panel({code: frames[code] for code in codes})).snapshot()
+        table = universe.loc[codes, ['name', 'sector']].join(table)
+        if self.filter:
+            table = table[table.eval(self.filter).fillna(False).astype(bool)]
+        if self.rank:
+            table['score'] = pd.to_numeric(table.eval(self.rank), errors='coerce')
+        else:
+            table['score'] = -np.arange(len(table), dtype=float) - next(self._seq) * self.chunk_size
+        return table
+
+    def _keep(self, table):
+        """把一块的结果并入各板块的前N名 (小根堆, 堆顶是当前门槛)"""
+        for code, row in zip(table.index, table.to_dict('records')):
+            if pd.isna(row['score']):
+                continue
+            sector = row['sector']
+            self._sector_order.setdefault(sector, len(self._sector_order))
+            heap = self._heaps.setdefault(sector, [])
+            item = (row['score'], -next(self._seq), code, row)
+            if self.top_n is None or len(heap) < self.top_n:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    def stream(self, universe, fetch):
+        """逐块获取 (fetch(codes) → {code: K线}) 并筛选, 逐块产出通过筛选的证券"""
+        self._heaps, self._sector_order = {}, {}
+        for start in range(0, len(universe), self.chunk_size):
+            chunk = universe.iloc[start:start + self.chunk_size]
+            table = self.evaluate(chunk, fetch(list(chunk.index)))
+            self._columns = list(table.columns)
+            self._keep(table)
+            yield table
+
+    def result(self):
+        """当前各板块前N名: 按板块首次出现顺序, 板块内按分数从高到低"""
+        rows = []
+        for sector in sorted(self._heaps, key=self._sector_order.get):
+            for score, _, code, row in sorted(self._heaps[sector], reverse=True):
+                rows.append({'code': code, **row})
+        return pd.DataFrame(rows, columns=['code'] + self._columns).set_index('code')
+
+    def run(self, universe, fetch):
+        for _ in self.stream(universe, fetch):
+            pass
+        return self.result()
+
+
+# ============ 基准测试 ============
+def _synthetic_fetch(n_bars=60):
+    """按代码生成确定的随机K线, 模拟批量行情接口"""
+    index = pd.bdate_range(end='2026-01-30', periods=n_bars)
+
+    def fetch(codes):
+        frames = {}
+        for code in codes:
+            rng = np.random.default_rng(int(code[2:]))
+            close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n_bars)))
+            frames[code] = pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+                                         'volume': rng.uniform(1e5, 1e7, n_bars)}, index=index)[FIELDS]
+        return frames
+    return fetch
+
+
+def bench(n_symbols, chunk_size, top_n=10):
+    sectors = [f"板块{i:02d}" for i in range(30)]
+    universe = pd.DataFrame({'name': [f"股票{i}" for i in range(n_symbols)],
+                             'sector': [sectors[i % len(sectors)] for i in range(n_symbols)],
+                             'market': 'a', 'index': ''},
+                            index=pd.Index([f"sh{600000 + i}" for i in range(n_symbols)], name='code'))
+    fetch = _synthetic_fetch()
+    options = dict(filter="rsi14 < 80 and close > ma20", rank="change_5d_pct + volume_z20", top_n=top_n)
+
+    results = {}
+    print(f"{n_symbols} symbols, {len(sectors)} sectors, top {top_n} per sector, filter/rank: {options['filter']!r} / {options['rank']!r}")
+    for name, size in [("one pass", n_symbols), (f"streamed, chunk {chunk_size}", chunk_size)]:
+        fetch_s = 0.0
+
+        def timed_fetch(codes):
+            nonlocal fetch_s
+            start = time.perf_counter()
+            frames = fetch(codes)
+            fetch_s += time.perf_counter() - start
+            return frames
+
+        start = time.perf_counter()
+        results[name] = Screener(chunk_size=size, **options).run(universe, timed_fetch)
+        screen_s = time.perf_counter() - start - fetch_s
+
+        tracemalloc.start()
+        Screener(chunk_size=size, **options).run(universe, fetch)
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+        print(f"  {name:<24} screen {screen_s:6.2f} s  (+ synthetic fetch {fetch_s:5.2f} s)   peak {peak:7.1f} MiB")
+    first, second = results.values()
+    pd.testing.assert_frame_equal(first, second)
+    print(f"  identical top-N ({len(first)} rows)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="选股器")
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("--symbols", type=int, default=5000, help="证券数量 (默认5000)")
+    parser.add_argument("--chunk", type=int, default=500, help="每块证券数 (默认500)")
+
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        bench(args.symbols, args.chunk)
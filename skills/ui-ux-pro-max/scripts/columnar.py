@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Columnar Storage - compact, interned representation of a CSV corpus
+
+A table is a string table (every distinct cell value stored once) plus one
+uint32 array of string ids per column. Indexing reads only the search
+columns; result rows are materialized on demand for the top-k hits.
+
+Compiled layout (little-endian, 4-byte aligned):
+    b"UIPC" | version u32 | meta_len u32 | meta JSON (padded)
+    string offsets u32[n_strings + 1] | string blob (utf-8, padded)
+    column ids u32[n_rows] for each column, in header order
+"""
+
+import csv
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+MAGIC = b"UIPC"
+FORMAT_VERSION = 1
+MISSING = 0xFFFFFFFF  # Short CSV row: csv.DictReader yields None for the cell
+
+
+def _pad(length):
+    return (4 - length % 4) % 4
+
+
+def _u32_array(values=()):
+    arr = array('I', values)
+    assert arr.itemsize == 4
+    return arr
+
+
+class ColumnarTable:
+    """Column-oriented, string-interned view of a CSV file"""
+
+    def __init__(self, header, n_rows, string_at, columns, mapped=None):
+        self.header = header
+        self.n_rows = n_rows
+        self._string_at = string_at
+        self._columns = columns  # name -> sequence of string ids
+        self._mapped = mapped
+
+    # ---------- construction ----------
+    @classmethod
+    def from_csv(cls, filepath):
+        """Parse a CSV (same row semantics as csv.DictReader) into interned columns"""
+        strings, ids = [], {}
+        with open(filepath, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            columns = [_u32_array() for _ in header]
+            n_rows = 0
+            for values in reader:
+                if not values:
+                    continue
+                for col_idx, column in enumerate(columns):
+                    if col_idx >= len(values):
+                        column.append(MISSING)
+                        continue
+                    value = values[col_idx]
+                    string_id = ids.get(value)
+                    if string_id is None:
+                        string_id = ids[value] = len(strings)
+                        strings.append(sys.intern(value))
+                    column.append(string_id)
+                n_rows += 1
+
+        return cls(header, n_rows, strings.__getitem__, dict(zip(header, columns)))
+
+    # ---------- access ----------
+    def _value(self, string_id):
+        return None if string_id == MISSING else self._string_at(string_id)
+
+    def column(self, name):
+        """All values of one column (None for missing cells); [] if the column is unknown"""
+        ids = self._columns.get(name)
+        if ids is None:
+            return []
+        return [self._value(string_id) for string_id in ids]
+
+    def row(self, idx, cols=None):
+        """Materialize one row as a dict, limited to cols when given"""
+        names = self.header if cols is None else [col for col in cols if col in self._columns]
+        return {name: self._value(self._columns[name][idx]) for name in names}
+
+    # ---------- compiled file ----------
+    def save(self, path):
+        """Write the compiled binary form (atomically)"""
+        strings, ids = [], {}
+        columns = []
+        for name in self.header:
+            remapped = _u32_array()
+            for value in self.column(name):
+                if value is None:
+                    remapped.append(MISSING)
+                    continue
+                string_id = ids.get(value)
+                if string_id is None:
+                    string_id = ids[value] = len(strings)
+                    strings.append(value.encode('utf-8'))
+                remapped.append(string_id)
+            columns.append(remapped)
+
+        offsets = _u32_array([0])
+        for encoded in strings:
+            offsets.append(offsets[-1] + len(encoded))
+        blob = b"".join(strings)
+
+        meta = json.dumps({"header": self.header, "n_rows": self.n_rows, "n_strings": len(strings)},
+                          ensure_ascii=False).encode('utf-8')
+        if sys.byteorder != "little":
+            offsets.byteswap()
+            for column in columns:
+                column.byteswap()
+
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC + struct.pack("<II", FORMAT_VERSION, len(meta)))
+            f.write(meta + b"\0" * _pad(len(meta)))
+            f.write(offsets.tobytes())
+            f.write(blob + b"\0" * _pad(len(blob)))
+            for column in columns:
+                f.write(column.tobytes())
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a compiled table; strings are decoded only when read"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            header, n_strings, n_rows, pos = cls._check_layout(mapped, path)
+        except ValueError:
+            mapped.close()
+            raise
+
+        view = memoryview(mapped)
+        offsets = view[pos:pos + 4 * (n_strings + 1)].cast('I')
+        pos += 4 * (n_strings + 1)
+        blob_len = offsets[n_strings]
+        blob = view[pos:pos + blob_len]
+        pos += blob_len + _pad(blob_len)
+
+        columns = {}
+        for name in header:
+            columns[name] = view[pos:pos + 4 * n_rows].cast('I')
+            pos += 4 * n_rows
+
+        def string_at(string_id):
+            return str(blob[offsets[string_id]:offsets[string_id + 1]], 'utf-8')
+
+        return cls(header, n_rows, string_at, columns, mapped)
+
+    @staticmethod
+    def _check_layout(mapped, path):
+        """(header, n_strings, n_rows, offsets position); ValueError unless the file is exactly as long as its meta says"""
+        size = len(mapped)
+        if size < 12 or mapped[:4] != MAGIC:
+            raise ValueError(f"Not a columnar table: {path}")
+        version, meta_len = struct.unpack_from("<II", mapped, 4)
+        if version != FORMAT_VERSION or sys.byteorder != "little":
+            raise ValueError(f"Unsupported columnar table: {path}")
+
+        pos = 12
+        try:
+            meta = json.loads(bytes(mapped[pos:pos + meta_len]).decode('utf-8'))
+            header, n_strings, n_rows = list(meta["header"]), int(meta["n_strings"]), int(meta["n_rows"])
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Corrupt columnar table meta: {path}") from e
+        pos += meta_len + _pad(meta_len)
+
+        blob_at = pos + 4 * (n_strings + 1)
+        if n_strings < 0 or n_rows < 0 or blob_at > size:
+            raise ValueError(f"Truncated columnar table: {path}")
+        blob_len, = struct.unpack_from("<I", mapped, blob_at - 4)
+        expected = blob_at + blob_len + _pad(blob_len) + 4 * n_rows * len(header)
+        if expected != size:
+            raise ValueError(f"Columnar table is {size} bytes, expected {expected}: {path}")
+        return header, n_strings, n_rows, pos
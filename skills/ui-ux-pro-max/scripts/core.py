@@ -5,14 +5,28 @@ UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
 import csv
+import hashlib
+import heapq
+import json
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from math import log
-from collections import defaultdict
+from collections import Counter, defaultdict
+# Allow both `python core.py ...` and `python -m ...` execution.
+try:
+    from columnar import ColumnarTable
+except ImportError:  # pragma: no cover
+    from .columnar import ColumnarTable
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent / "data"
+INDEX_DIR = DATA_DIR / ".index"
+INDEX_VERSION = 2
 MAX_RESULTS = 3
+QUERY_CACHE_SIZE = 4096  # Distinct query strings memoized by tokenize() / detect_domain()
 
 CSV_CONFIG = {
     "style": {
@@ -90,6 +104,22 @@ _STACK_COLS = {
 }
 
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
+ALL_STACKS = "all"  # search_stack() pseudo-stack: rank every stack together
+
+
+# ============ TOKENIZATION ============
+# Same tokens as lowercasing, re.sub(r'[^\w\s]', ' ') + split() and dropping words <= 2 chars
+_TOKEN_RE = re.compile(r'\w{3,}')
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _tokenize_cached(text):
+    return tuple(_TOKEN_RE.findall(text.lower()))
+
+
+def tokenize(text):
+    """Lowercase, split, remove punctuation, filter short words (cached per string)"""
+    return list(_tokenize_cached(str(text)))
 
 
 # ============ BM25 IMPLEMENTATION ============
@@ -100,7 +130,9 @@ class BM25:
         self.k1 = k1
         self.b = b
         self.corpus = []
+        self.postings = {}  # term -> [(doc_idx, tf), ...] in doc order
         self.doc_lengths = []
+        self.doc_norms = []  # k1 * (1 - b + b * dl / avgdl) per document
         self.avgdl = 0
         self.idf = {}
         self.doc_freqs = defaultdict(int)
@@ -108,51 +140,259 @@ class BM25:
 
     def tokenize(self, text):
         """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
-        return [w for w in text.split() if len(w) > 2]
+        return tokenize(text)
 
     def fit(self, documents):
         """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
+        # Documents are seen once, so bypass the per-query token cache
+        self.corpus = [_TOKEN_RE.findall(str(doc).lower()) for doc in documents]
         self.N = len(self.corpus)
         if self.N == 0:
             return
         self.doc_lengths = [len(doc) for doc in self.corpus]
         self.avgdl = sum(self.doc_lengths) / self.N
 
-        for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
-
-        for word, freq in self.doc_freqs.items():
-            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
+        postings = defaultdict(list)
+        for idx, doc in enumerate(self.corpus):
+            for word, tf in Counter(doc).items():
+                postings[word].append((idx, tf))
+        self.postings = dict(postings)
 
-    def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
+        for word, docs in self.postings.items():
+            self.doc_freqs[word] = len(docs)
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
+        self._compute_idf()
+        self._compute_norms()
 
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+    def _compute_idf(self):
+        for word, freq in self.doc_freqs.items():
+            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
 
-            scores.append((idx, score))
+    def _compute_norms(self):
+        """Precompute the length-normalization term of the BM25 denominator"""
+        self.doc_norms = [self.k1 * (1 - self.b + self.b * doc_len / self.avgdl) for doc_len in self.doc_lengths]
+
+    def score(self, query, top_k=None):
+        """Score documents containing at least one query token.
+
+        Returns (idx, score) pairs by descending score (ties in document order).
+        Documents sharing no token with the query score 0 and are omitted.
+        With top_k, only the best top_k are selected via a heap.
+        """
+        return self.score_tokens(self.tokenize(query), top_k)
+
+    def score_tokens(self, query_tokens, top_k=None):
+        """score() for an already tokenized query"""
+        scores = defaultdict(float)
+
+        for token in query_tokens:
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = self.idf[token]
+            numerator_k1 = self.k1 + 1
+            for idx, tf in postings:
+                scores[idx] += idf * (tf * numerator_k1) / (tf + self.doc_norms[idx])
+
+        ranking_key = lambda x: (x[1], -x[0])
+        if top_k is not None:
+            return heapq.nlargest(top_k, scores.items(), key=ranking_key)
+        return sorted(scores.items(), key=ranking_key, reverse=True)
+
+    def to_dict(self):
+        """Serialize fitted index as postings lists (term -> [[doc, tf], ...])"""
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "N": self.N,
+            "avgdl": self.avgdl,
+            "doc_lengths": self.doc_lengths,
+            "idf": self.idf,
+            "postings": self.postings
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restore a fitted index produced by to_dict() without re-tokenizing"""
+        bm25 = cls(k1=data["k1"], b=data["b"])
+        bm25.N = data["N"]
+        bm25.avgdl = data["avgdl"]
+        bm25.doc_lengths = data["doc_lengths"]
+        bm25.idf = data["idf"]
+        bm25.postings = {word: [tuple(p) for p in docs] for word, docs in data["postings"].items()}
+        for word, docs in bm25.postings.items():
+            bm25.doc_freqs[word] = len(docs)
+        if bm25.N:
+            bm25._compute_norms()
+        return bm25
+
+
+# ============ PERSISTENT INDEX ============
+class CsvIndex:
+    """Fitted BM25 index for one CSV plus its columnar row storage"""
+
+    def __init__(self, filepath, search_cols, signature, table, bm25):
+        self.filepath = filepath
+        self.search_cols = search_cols
+        self.signature = signature
+        self.table = table
+        self.bm25 = bm25
+
+    def read_rows(self, indices, cols=None):
+        """Materialize only the requested rows (and columns)"""
+        return [self.table.row(idx, cols) for idx in indices]
+
+
+_INDEXES = {}  # (filepath, search_cols) -> CsvIndex
+_INDEX_LOCK = threading.Lock()
+
+
+def _file_signature(filepath, with_hash=False):
+    """Cheap change detection (mtime + size), optionally with a content hash"""
+    stat = filepath.stat()
+    signature = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    if with_hash:
+        signature["sha256"] = hashlib.sha256(filepath.read_bytes()).hexdigest()
+    return signature
+
+
+def _index_path(filepath, suffix=".json"):
+    """Index files live under data/.index/ mirroring the CSV's relative path"""
+    return (INDEX_DIR / filepath.relative_to(DATA_DIR)).with_suffix(suffix)
+
+
+def _search_documents(table, search_cols):
+    """One text per row built from the search columns only"""
+    columns = [table.column(col) if col in table.header else [""] * table.n_rows for col in search_cols]
+    return [" ".join(str(value) for value in values) for values in zip(*columns)] if columns else [""] * table.n_rows
+
+
+def build_index(filepath, search_cols, save=True):
+    """Tokenize and fit a CSV once, optionally persisting the result to data/.index/"""
+    filepath = Path(filepath)
+    table = ColumnarTable.from_csv(filepath)
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+    bm25 = BM25()
+    bm25.fit(_search_documents(table, search_cols))
+    signature = _file_signature(filepath, with_hash=True)
+    index = CsvIndex(filepath, list(search_cols), signature, table, bm25)
+
+    if save:
+        index_path = _index_path(filepath)
+        payload = {
+            "version": INDEX_VERSION,
+            "source": signature,
+            "search_cols": index.search_cols,
+            "bm25": bm25.to_dict()
+        }
+        try:
+            index_path.parent.mkdir(parents=True, exist_ok=True)
+            table.save(_index_path(filepath, ".col"))
+            _write_payload(index_path, payload)
+        except OSError:
+            pass  # Read-only install: keep the in-memory index only
+
+    return index
+
+
+def _write_payload(index_path, payload):
+    tmp_path = index_path.with_suffix(".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+    tmp_path.replace(index_path)
+
+
+def _load_index(filepath, search_cols):
+    """Load a persisted index if it still matches the CSV, else return None"""
+    index_path = _index_path(filepath)
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if payload.get("version") != INDEX_VERSION or payload.get("search_cols") != list(search_cols):
+        return None
+
+    source = payload["source"]
+    current = _file_signature(filepath)
+    restamp = (current["mtime_ns"], current["size"]) != (source["mtime_ns"], source["size"])
+    if restamp:
+        # Touched but possibly unchanged (e.g. fresh checkout): fall back to the hash
+        current = _file_signature(filepath, with_hash=True)
+        if current["sha256"] != source.get("sha256"):
+            return None
+        source = current
+
+    try:
+        table = ColumnarTable.load(_index_path(filepath, ".col"))
+    except (OSError, ValueError):
+        return None
+
+    if restamp:
+        # Record the new mtime/size so later loads skip the hash
+        try:
+            _write_payload(index_path, {**payload, "source": source})
+        except OSError:
+            pass
+    bm25 = BM25.from_dict(payload["bm25"])
+    return CsvIndex(filepath, list(search_cols), source, table, bm25)
+
+
+def _is_current(index, filepath):
+    current = _file_signature(filepath)
+    return (current["mtime_ns"], current["size"]) == (index.signature["mtime_ns"], index.signature["size"])
+
+
+def get_index(filepath, search_cols):
+    """Return the fitted index for a CSV: memory -> disk -> rebuild"""
+    key = (str(filepath), tuple(search_cols))
+    index = _INDEXES.get(key)
+    if index is not None and _is_current(index, filepath):
+        return index
+
+    with _INDEX_LOCK:
+        # Another thread may have refreshed it while we waited
+        index = _INDEXES.get(key)
+        if index is not None and _is_current(index, filepath):
+            return index
+        index = _load_index(filepath, search_cols) or build_index(filepath, search_cols)
+        _INDEXES[key] = index
+    return index
+
+
+def refresh_indexes():
+    """Load every domain/stack index, rebuilding any whose CSV changed; returns refreshed files"""
+    refreshed = []
+    for filepath, search_cols in _index_targets():
+        index = _INDEXES.get((str(filepath), tuple(search_cols)))
+        if index is None or not _is_current(index, filepath):
+            get_index(filepath, search_cols)
+            refreshed.append(filepath)
+    return refreshed
+
+
+def clear_index_cache():
+    """Drop in-memory indexes (persisted files are kept)"""
+    _INDEXES.clear()
+
+
+def _index_targets():
+    """(filepath, search_cols) for every configured domain and stack"""
+    targets = [(DATA_DIR / config["file"], config["search_cols"]) for config in CSV_CONFIG.values()]
+    targets += [(DATA_DIR / config["file"], _STACK_COLS["search_cols"]) for config in STACK_CONFIG.values()]
+    return [(filepath, cols) for filepath, cols in targets if filepath.exists()]
+
+
+def build_all_indexes(force=False):
+    """Build (or refresh stale) persisted indexes for all domains and stacks"""
+    built = []
+    for filepath, search_cols in _index_targets():
+        if force or _load_index(filepath, search_cols) is None:
+            build_index(filepath, search_cols)
+            built.append(filepath)
+    clear_index_cache()
+    return built
 
 
 # ============ SEARCH FUNCTIONS ============
@@ -162,77 +402,151 @@ def _load_csv(filepath):
         return list(csv.DictReader(f))
 
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
-    if not filepath.exists():
-        return []
-
-    data = _load_csv(filepath)
+def _search_index(index, output_cols, query_tokens, max_results):
+    """Rank a loaded index and materialize the top rows"""
+    ranked = index.bm25.score_tokens(query_tokens, top_k=max_results)
 
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+    # Get top results with score > 0, materializing only their output columns
+    hits = [idx for idx, score in ranked if score > 0]
+    return index.read_rows(hits, output_cols)
 
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
 
-    # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
+def _search_csv(filepath, search_cols, output_cols, query, max_results):
+    """Core search function using a cached BM25 index"""
+    if not filepath.exists():
+        return []
 
-    return results
+    index = get_index(filepath, search_cols)
+    return _search_index(index, output_cols, index.bm25.tokenize(query), max_results)
+
+
+DOMAIN_KEYWORDS = {
+    "color": ["color", "palette", "hex", "#", "rgb"],
+    "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
+    "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
+    "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
+    "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora", "prompt", "css", "implementation", "variable", "checklist", "tailwind"],
+    "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
+    "typography": ["font", "typography", "heading", "serif", "sans"],
+    "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
+    "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
+    "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+}
 
 
+class KeywordMatcher:
+    """Aho-Corasick automaton: finds every keyword occurring in a text in one pass"""
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        goto, fail, output = [{}], [0], [set()]
+        for kw_id, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                if ch not in goto[state]:
+                    goto.append({})
+                    fail.append(0)
+                    output.append(set())
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            output[state].add(kw_id)
+
+        # Breadth-first failure links, folded into a full transition table (DFA)
+        order = list(goto[0].values())
+        for state in order:
+            for ch, nxt in goto[state].items():
+                order.append(nxt)
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[nxt] = goto[fallback].get(ch, 0)
+                output[nxt] |= output[fail[nxt]]
+
+        self._delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        for state in order:
+            self._delta[state] = dict(self._delta[fail[state]], **goto[state])
+        self._output = [frozenset(ids) for ids in output]
+
+    def find(self, text):
+        """Ids of the keywords that occur in text"""
+        found = set()
+        delta, output, state = self._delta, self._output, 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+_DOMAIN_KEYWORD_LIST = [(domain, kw) for domain, keywords in DOMAIN_KEYWORDS.items() for kw in keywords]
+_DOMAIN_MATCHER = KeywordMatcher(kw for _, kw in _DOMAIN_KEYWORD_LIST)
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
 def detect_domain(query):
     """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
-
-    domain_keywords = {
-        "color": ["color", "palette", "hex", "#", "rgb"],
-        "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
-        "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
-        "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
-        "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora", "prompt", "css", "implementation", "variable", "checklist", "tailwind"],
-        "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
-        "typography": ["font", "typography", "heading", "serif", "sans"],
-        "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
-        "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
-        "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
-    }
+    scores = dict.fromkeys(DOMAIN_KEYWORDS, 0)
+    for kw_id in _DOMAIN_MATCHER.find(query.lower()):
+        scores[_DOMAIN_KEYWORD_LIST[kw_id][0]] += 1
 
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
     best = max(scores, key=scores.get)
     return best if scores[best] > 0 else "style"
 
 
 def search(query, domain=None, max_results=MAX_RESULTS):
     """Main search function with auto-domain detection"""
-    if domain is None:
-        domain = detect_domain(query)
+    return search_many([(query, domain, max_results)])[0]
 
-    config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
-    filepath = DATA_DIR / config["file"]
 
-    if not filepath.exists():
-        return {"error": f"File not found: {filepath}", "domain": domain}
+def search_many(queries):
+    """Run several (query, domain, max_results) searches in one call.
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    Each distinct query is tokenized once and each domain's index is
+    resolved once, so a batch costs one lookup per query instead of a
+    full search() round-trip. Returns results in input order, each shaped
+    like search()'s return value.
+    """
+    tokens_by_query = {}
+    indexes = {}
+    responses = []
 
-    return {
-        "domain": domain,
-        "query": query,
-        "file": config["file"],
-        "count": len(results),
-        "results": results
-    }
+    for query, domain, max_results in queries:
+        if domain is None:
+            domain = detect_domain(query)
+
+        config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
+        filepath = DATA_DIR / config["file"]
+
+        if not filepath.exists():
+            responses.append({"error": f"File not found: {filepath}", "domain": domain})
+            continue
+
+        index = indexes.get(config["file"])
+        if index is None:
+            index = indexes[config["file"]] = get_index(filepath, config["search_cols"])
 
+        tokens = tokens_by_query.get(query)
+        if tokens is None:
+            tokens = tokens_by_query[query] = index.bm25.tokenize(query)
+
+        results = _search_index(index, config["output_cols"], tokens, max_results)
+
+        responses.append({
+            "domain": domain,
+            "query": query,
+            "file": config["file"],
+            "count": len(results),
+            "results": results
+        })
+
+    return responses
+
+
+def search_stack(query, stack, max_results=MAX_RESULTS, workers=None):
+    """Search stack-specific guidelines ("all" ranks every stack together)"""
+    if stack == ALL_STACKS:
+        return search_all_stacks(query, max_results, workers=workers)
 
-def search_stack(query, stack, max_results=MAX_RESULTS):
-    """Search stack-specific guidelines"""
     if stack not in STACK_CONFIG:
         return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
 
@@ -251,3 +565,152 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
         "count": len(results),
         "results": results
     }
+
+
+# ============ CROSS-STACK SEARCH ============
+class MergedStackIndex:
+    """One BM25 index over several stacks, with a stack field per document"""
+
+    def __init__(self, stack_indexes):
+        self.stack_indexes = stack_indexes  # [(stack, CsvIndex)], in merge order
+        self.doc_stacks = []  # merged doc -> (stack, CsvIndex, local row)
+        doc_lengths, postings = [], defaultdict(list)
+
+        for stack, index in stack_indexes:
+            base = len(doc_lengths)
+            doc_lengths.extend(index.bm25.doc_lengths)
+            self.doc_stacks.extend((stack, index, local) for local in range(index.bm25.N))
+            for word, docs in index.bm25.postings.items():
+                postings[word].extend((base + idx, tf) for idx, tf in docs)
+
+        # Re-derive global statistics from the merged postings (no re-tokenizing)
+        self.bm25 = bm25 = BM25()
+        bm25.N = len(doc_lengths)
+        bm25.doc_lengths = doc_lengths
+        bm25.postings = dict(postings)
+        for word, docs in bm25.postings.items():
+            bm25.doc_freqs[word] = len(docs)
+        if bm25.N:
+            bm25.avgdl = sum(doc_lengths) / bm25.N
+            bm25._compute_idf()
+            bm25._compute_norms()
+
+
+_MERGED_STACKS = {}  # tuple(stacks) -> MergedStackIndex
+
+
+def _stack_indexes(stacks):
+    indexes = []
+    for stack in stacks:
+        filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
+        if filepath.exists():
+            indexes.append((stack, get_index(filepath, _STACK_COLS["search_cols"])))
+    return indexes
+
+
+def get_merged_stack_index(stacks):
+    """Merged index for the given stacks, rebuilt whenever any stack index is refreshed"""
+    stack_indexes = _stack_indexes(stacks)
+    merged = _MERGED_STACKS.get(tuple(stacks))
+    if merged is None or [index for _, index in merged.stack_indexes] != [index for _, index in stack_indexes]:
+        merged = _MERGED_STACKS[tuple(stacks)] = MergedStackIndex(stack_indexes)
+    return merged
+
+
+def _stack_query_stats(stack, query_tokens):
+    """Worker: per-stack corpus stats and query-term postings for global scoring"""
+    filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
+    if not filepath.exists():
+        return stack, 0, 0, {}
+    bm25 = get_index(filepath, _STACK_COLS["search_cols"]).bm25
+    hits = {token: [(idx, tf, bm25.doc_lengths[idx]) for idx, tf in bm25.postings.get(token, ())]
+            for token in set(query_tokens)}
+    return stack, bm25.N, sum(bm25.doc_lengths), hits
+
+
+def _score_stacks_parallel(stacks, query_tokens, max_results, workers):
+    """Score stacks in a process pool using global BM25 stats (same ranking as the merged index)"""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        stats = list(pool.map(_stack_query_stats, stacks, [query_tokens] * len(stacks)))
+
+    bm25 = BM25()  # Default k1/b, same as every per-stack index
+    k1, b = bm25.k1, bm25.b
+    n_docs = sum(n for _, n, _, _ in stats)
+    if n_docs == 0:
+        return []
+    avgdl = sum(total for _, _, total, _ in stats) / n_docs
+
+    # Merged doc ids follow stack order, so ties break exactly like MergedStackIndex
+    bases, base = {}, 0
+    for stack, n, _, _ in stats:
+        bases[stack] = base
+        base += n
+
+    scores = defaultdict(float)
+    for token in query_tokens:
+        df = sum(len(hits.get(token, ())) for _, _, _, hits in stats)
+        if df == 0:
+            continue
+        idf = log((n_docs - df + 0.5) / (df + 0.5) + 1)
+        for stack, _, _, hits in stats:
+            for idx, tf, doc_len in hits.get(token, ()):
+                scores[(bases[stack] + idx, stack, idx)] += idf * (tf * (k1 + 1)) / (tf + k1 * (1 - b + b * doc_len / avgdl))
+
+    return heapq.nlargest(max_results, scores.items(), key=lambda x: (x[1], -x[0][0]))
+
+
+def search_all_stacks(query, max_results=MAX_RESULTS, stacks=None, workers=None):
+    """Rank guidelines from every stack (or the given ones) in a single pass.
+
+    Results are globally ranked and carry a "Stack" field; "stacks" counts
+    hits per stack. With workers > 1 the stacks are scored in a process pool,
+    which only pays off for large custom stack sets.
+    """
+    stacks = list(stacks or AVAILABLE_STACKS)
+    unknown = [stack for stack in stacks if stack not in STACK_CONFIG]
+    if unknown:
+        return {"error": f"Unknown stack: {', '.join(unknown)}. Available: {', '.join(AVAILABLE_STACKS)}"}
+
+    output_cols = _STACK_COLS["output_cols"]
+    query_tokens = tokenize(query)
+    results = []
+
+    if workers and workers > 1:
+        ranked = _score_stacks_parallel(stacks, query_tokens, max_results, workers)
+        indexes = dict(_stack_indexes(stacks))
+        for (_, stack, local), score in ranked:
+            if score > 0:
+                results.append(dict({"Stack": stack}, **indexes[stack].table.row(local, output_cols)))
+    else:
+        merged = get_merged_stack_index(stacks)
+        for idx, score in merged.bm25.score_tokens(query_tokens, top_k=max_results):
+            if score > 0:
+                stack, index, local = merged.doc_stacks[idx]
+                results.append(dict({"Stack": stack}, **index.table.row(local, output_cols)))
+
+    per_stack = Counter(row["Stack"] for row in results)
+    return {
+        "domain": "stack",
+        "stack": ALL_STACKS,
+        "query": query,
+        "file": "stacks/*.csv",
+        "count": len(results),
+        "stacks": dict(per_stack),
+        "results": results
+    }
+
+
+# ============ CLI SUPPORT ============
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="UI Pro Max search index")
+    parser.add_argument("command", choices=["build-index"], help="build-index: precompute BM25 indexes into data/.index/")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if persisted indexes are up to date")
+
+    args = parser.parse_args()
+
+    built = build_all_indexes(force=args.force)
+    print(f"Built {len(built)} index(es) in {INDEX_DIR}")
+    for filepath in built:
+        print(f"  - {filepath.relative_to(DATA_DIR)}")
@@ -13,16 +13,19 @@ Usage:
     result = generate_design_system("SaaS dashboard", "My Project", persist=True, page="dashboard")
 """
 
+import atexit
 import csv
 import json
 import os
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 # Allow both `python design_system.py ...` and `python -m ...` execution.
 try:
-    from core import search, DATA_DIR
+    from core import search, search_many, CSV_CONFIG, DATA_DIR
 except ImportError:  # pragma: no cover
-    from .core import search, DATA_DIR
+    from .core import search, search_many, CSV_CONFIG, DATA_DIR
 
 
 # ============ CONFIGURATION ============
@@ -36,64 +39,126 @@ SEARCH_CONFIG = {
     "typography": {"max_results": 2}
 }
 
+CACHE_MAXSIZE = 256
+CACHE_FILE_ENV = "UIPRO_DESIGN_CACHE"  # Optional JSON file to keep the cache across restarts
+CACHE_SAVE_INTERVAL = 1.0  # Seconds a persisted cache batches puts before rewriting the file
+
+
+# ============ REASONING INDEX ============
+class ReasoningIndex:
+    """ui-reasoning.csv compiled once into category lookup tables."""
+
+    def __init__(self, rules: list):
+        self.rules = rules
+        self.resolved = [self._resolve(rule) for rule in rules]
+        self._categories = [(rule.get("UI_Category") or "").lower() for rule in rules]
+        self._exact = {}
+        self._keywords = {}  # keyword -> first rule declaring it
+        for idx, ui_cat in enumerate(self._categories):
+            self._exact.setdefault(ui_cat, idx)
+            for kw in ui_cat.replace("/", " ").replace("-", " ").split():
+                self._keywords.setdefault(kw, idx)
+        self._memo = {}
+
+    @staticmethod
+    def _resolve(rule: dict) -> dict:
+        """Pre-split priorities and pre-decode the Decision_Rules JSON."""
+        decision_rules = {}
+        try:
+            decision_rules = json.loads(rule.get("Decision_Rules") or "{}")
+        except json.JSONDecodeError:
+            pass
+
+        return {
+            "pattern": rule.get("Recommended_Pattern", ""),
+            "style_priority": [s.strip() for s in (rule.get("Style_Priority") or "").split("+")],
+            "color_mood": rule.get("Color_Mood", ""),
+            "typography_mood": rule.get("Typography_Mood", ""),
+            "key_effects": rule.get("Key_Effects", ""),
+            "anti_patterns": rule.get("Anti_Patterns", ""),
+            "decision_rules": decision_rules,
+            "severity": rule.get("Severity", "MEDIUM")
+        }
+
+    def find(self, category: str):
+        """Index of the matching rule (exact > partial > keyword), or None."""
+        category_lower = category.lower()
+        if category_lower in self._exact:
+            return self._exact[category_lower]
+        if category_lower not in self._memo:
+            self._memo[category_lower] = self._scan(category_lower)
+        return self._memo[category_lower]
+
+    def _scan(self, category_lower: str):
+        # Partial match: first rule whose category contains or is contained in the query category
+        for idx, ui_cat in enumerate(self._categories):
+            if ui_cat in category_lower or category_lower in ui_cat:
+                return idx
+
+        # Keyword match: earliest rule with any keyword inside the category
+        matches = [idx for kw, idx in self._keywords.items() if kw in category_lower]
+        return min(matches) if matches else None
+
+
+_reasoning_index = None
+_reasoning_signature = None
+_reasoning_lock = threading.Lock()
+
+
+def get_reasoning_index() -> ReasoningIndex:
+    """Process-wide reasoning index, re-parsed only when the CSV changes."""
+    global _reasoning_index, _reasoning_signature
+    filepath = DATA_DIR / REASONING_FILE
+    try:
+        stat = filepath.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        signature = None
+
+    with _reasoning_lock:
+        if _reasoning_index is None or signature != _reasoning_signature:
+            rules = []
+            if signature is not None:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    rules = list(csv.DictReader(f))
+            _reasoning_index = ReasoningIndex(rules)
+            _reasoning_signature = signature
+        return _reasoning_index
+
 
 # ============ DESIGN SYSTEM GENERATOR ============
 class DesignSystemGenerator:
     """Generates design system recommendations from aggregated searches."""
 
     def __init__(self):
-        self.reasoning_data = self._load_reasoning()
+        self.reasoning = get_reasoning_index()
+        self.reasoning_data = self.reasoning.rules
 
     def _load_reasoning(self) -> list:
-        """Load reasoning rules from CSV."""
-        filepath = DATA_DIR / REASONING_FILE
-        if not filepath.exists():
-            return []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
-
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
-        results = {}
-        for domain, config in SEARCH_CONFIG.items():
-            if domain == "style" and style_priority:
-                # For style, also search with priority keywords
-                priority_query = " ".join(style_priority[:2]) if style_priority else query
-                combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
-            else:
-                results[domain] = search(query, domain, config["max_results"])
-        return results
-
-    def _find_reasoning_rule(self, category: str) -> dict:
-        """Find matching reasoning rule for a category."""
-        category_lower = category.lower()
+        """Load reasoning rules from CSV (shared, parsed once per process)."""
+        return get_reasoning_index().rules
 
-        # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
-
-        # Try partial match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
+    def _multi_domain_search(self, query: str) -> dict:
+        """Search every domain that needs only the query (product included) in one batched call."""
+        batch = [(query, domain, config["max_results"]) for domain, config in SEARCH_CONFIG.items() if domain != "style"]
+        return {domain: result for (_, domain, _), result in zip(batch, search_many(batch))}
 
-        # Try keyword match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
+    def _style_search(self, query: str, style_priority: list = None) -> dict:
+        """Style search, also matching the category's priority keywords."""
+        if style_priority:
+            query = f"{query} {' '.join(style_priority[:2])}"
+        return search(query, "style", SEARCH_CONFIG["style"]["max_results"])
 
-        return {}
+    def _find_reasoning_rule(self, category: str) -> dict:
+        """Find matching reasoning rule for a category."""
+        idx = self.reasoning.find(category)
+        return self.reasoning.rules[idx] if idx is not None else {}
 
     def _apply_reasoning(self, category: str, search_results: dict) -> dict:
         """Apply reasoning rules to search results."""
-        rule = self._find_reasoning_rule(category)
+        idx = self.reasoning.find(category)
 
-        if not rule:
+        if idx is None:
             return {
                 "pattern": "Hero + Features + CTA",
                 "style_priority": ["Minimalism", "Flat Design"],
@@ -105,23 +170,12 @@ class DesignSystemGenerator:
                 "severity": "MEDIUM"
             }
 
-        # Parse decision rules JSON
-        decision_rules = {}
-        try:
-            decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
-        except json.JSONDecodeError:
-            pass
-
-        return {
-            "pattern": rule.get("Recommended_Pattern", ""),
-            "style_priority": [s.strip() for s in rule.get("Style_Priority", "").split("+")],
-            "color_mood": rule.get("Color_Mood", ""),
-            "typography_mood": rule.get("Typography_Mood", ""),
-            "key_effects": rule.get("Key_Effects", ""),
-            "anti_patterns": rule.get("Anti_Patterns", ""),
-            "decision_rules": decision_rules,
-            "severity": rule.get("Severity", "MEDIUM")
-        }
+        resolved = self.reasoning.resolved[idx]
+        return dict(
+            resolved,
+            style_priority=list(resolved["style_priority"]),
+            decision_rules=dict(resolved["decision_rules"])
+        )
 
     def _select_best_match(self, results: list, priority_keywords: list) -> dict:
         """Select best matching result based on priority keywords."""
@@ -166,9 +220,9 @@ class DesignSystemGenerator:
 
     def generate(self, query: str, project_name: str = None) -> dict:
         """Generate complete design system recommendation."""
-        # Step 1: First search product to get category
-        product_result = search(query, "product", 1)
-        product_results = product_result.get("results", [])
+        # Step 1: One batch for product (gives the category) and the domains that need only the query
+        search_results = self._multi_domain_search(query)
+        product_results = self._extract_results(search_results.get("product", {}))
         category = "General"
         if product_results:
             category = product_results[0].get("Product Type", "General")
@@ -177,9 +231,8 @@ class DesignSystemGenerator:
         reasoning = self._apply_reasoning(category, {})
         style_priority = reasoning.get("style_priority", [])
 
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
-        search_results["product"] = product_result  # Reuse product search
+        # Step 3: Style search with the category's priority hints (depends on step 1, so it runs after)
+        search_results["style"] = self._style_search(query, style_priority)
 
         # Step 4: Select best matches from each domain using priority
         style_results = self._extract_results(search_results.get("style", {}))
@@ -462,6 +515,137 @@ def format_markdown(design_system: dict) -> str:
     return "\n".join(lines)
 
 
+# ============ RESULT CACHE ============
+class DesignSystemCache:
+    """Bounded LRU cache for generated design systems and their rendered output."""
+
+    def __init__(self, maxsize: int = CACHE_MAXSIZE, path: str = None, save_interval: float = CACHE_SAVE_INTERVAL):
+        self.maxsize = maxsize
+        self.path = Path(path) if path else None
+        self.save_interval = save_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._timer = None
+        if self.path:
+            self._load()
+            atexit.register(self.flush)
+
+    def get(self, key: str):
+        """Return the cached value (refreshing its recency) or None."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value) -> None:
+        """Store a value, evicting the least recently used entries over maxsize."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            if self.path:
+                self._schedule_save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+            if self.path:
+                self._schedule_save()
+
+    def flush(self) -> None:
+        """Write pending changes of a persisted cache now (also run at exit)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._dirty:
+                self._save()
+
+    def info(self) -> dict:
+        """Hit/miss counters for sizing the cache."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError, TypeError):
+            return
+        if not isinstance(entries, list):
+            return
+        for entry in entries:
+            # Skip malformed entries (hand edits, truncated writes of an older version)
+            if isinstance(entry, list) and len(entry) == 2 and isinstance(entry[0], str):
+                self._entries[entry[0]] = entry[1]
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _schedule_save(self) -> None:
+        # Caller holds the lock: rewrite the file at most once per save_interval
+        self._dirty = True
+        if self.save_interval <= 0:
+            self._save()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.save_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _save(self) -> None:
+        self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(list(self._entries.items()), f, ensure_ascii=False)
+            tmp_path.replace(self.path)
+        except OSError:
+            pass  # Cache persistence is best effort
+
+
+_cache = DesignSystemCache(path=os.environ.get(CACHE_FILE_ENV))
+
+
+def configure_cache(maxsize: int = CACHE_MAXSIZE, path: str = None) -> DesignSystemCache:
+    """Replace the process-wide cache (e.g. to resize it or persist it to disk)."""
+    global _cache
+    _cache.flush()
+    _cache = DesignSystemCache(maxsize, path)
+    return _cache
+
+
+def cache_info() -> dict:
+    """Hit/miss counters of the process-wide design system cache."""
+    return _cache.info()
+
+
+def _data_version() -> list:
+    """mtime/size of every file generation reads, so edited data invalidates entries."""
+    files = [CSV_CONFIG[domain]["file"] for domain in SEARCH_CONFIG] + [REASONING_FILE]
+    version = []
+    for name in files:
+        try:
+            stat = (DATA_DIR / name).stat()
+            version.append([name, stat.st_mtime_ns, stat.st_size])
+        except OSError:
+            version.append([name, None, None])
+    return version
+
+
+def _cache_key(kind: str, query: str, project_name: str, output_format: str = None) -> str:
+    # Search tokenization is case/whitespace-insensitive, but the default project name is not
+    normalized = " ".join(query.lower().split())
+    return json.dumps([kind, normalized, project_name or query.upper(), output_format, _data_version()])
+
+
 # ============ MAIN ENTRY POINT ============
 def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii", 
                            persist: bool = False, page: str = None, output_dir: str = None) -> str:
@@ -479,16 +663,23 @@ def generate_design_system(query: str, project_name: str = None, output_format:
     Returns:
         Formatted design system string
     """
-    generator = DesignSystemGenerator()
-    design_system = generator.generate(query, project_name)
+    design_key = _cache_key("design", query, project_name)
+    design_system = _cache.get(design_key)
+    if design_system is None:
+        generator = DesignSystemGenerator()
+        design_system = generator.generate(query, project_name)
+        _cache.put(design_key, design_system)
     
     # Persist to files if requested
     if persist:
         persist_design_system(design_system, page, output_dir, query)
 
-    if output_format == "markdown":
-        return format_markdown(design_system)
-    return format_ascii_box(design_system)
+    output_key = _cache_key("output", query, project_name, output_format)
+    output = _cache.get(output_key)
+    if output is None:
+        output = format_markdown(design_system) if output_format == "markdown" else format_ascii_box(design_system)
+        _cache.put(output_key, output)
+    return output
 
 
 # ============ PERSISTENCE FUNCTIONS ============
@@ -922,16 +1113,16 @@ def _generate_intelligent_overrides(page_name: str, page_query: str, design_syst
     Uses the existing search infrastructure to find relevant style, UX, and layout
     data instead of hardcoded page types.
     """
-    from .core import search
-    
     page_lower = page_name.lower()
     query_lower = (page_query or "").lower()
     combined_context = f"{page_lower} {query_lower}"
     
     # Search across multiple domains for page-specific guidance
-    style_search = search(combined_context, "style", max_results=1)
-    ux_search = search(combined_context, "ux", max_results=3)
-    landing_search = search(combined_context, "landing", max_results=1)
+    style_search, ux_search, landing_search = search_many([
+        (combined_context, "style", 1),
+        (combined_context, "ux", 3),
+        (combined_context, "landing", 1)
+    ])
     
     # Extract results from search response
     style_results = style_search.get("results", [])
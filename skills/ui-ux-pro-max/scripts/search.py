@@ -7,21 +7,34 @@ Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-r
        python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard"]
 
 Domains: style, prompt, color, chart, landing, product, ux, typography
-Stacks: html-tailwind, react, nextjs
+Stacks: html-tailwind, react, nextjs, ... or "all" to rank every stack together
 
 Persistence (Master + Overrides pattern):
   --persist    Save design system to design-system/MASTER.md
   --page       Also create a page-specific override file in design-system/pages/
+
+Indexes are built lazily into data/.index/ on first search; prebuild them with
+  python core.py build-index [--force]
+
+Server mode (indexes stay resident between calls):
+  python server.py                      Start the search server
+  --server [URL]                        Send the request to a running server
+                                        (default URL from $UIPRO_SEARCH_SERVER)
 """
 
 import argparse
+import os
+import sys
+from urllib.error import HTTPError, URLError
 # Allow both `python search.py ...` and `python -m ...` execution.
 try:
-    from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
+    from core import CSV_CONFIG, AVAILABLE_STACKS, ALL_STACKS, MAX_RESULTS, search, search_stack
     from design_system import generate_design_system, persist_design_system
+    from server import DEFAULT_URL, request_server, server_error
 except ImportError:  # pragma: no cover
-    from .core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
+    from .core import CSV_CONFIG, AVAILABLE_STACKS, ALL_STACKS, MAX_RESULTS, search, search_stack
     from .design_system import generate_design_system, persist_design_system
+    from .server import DEFAULT_URL, request_server, server_error
 
 
 def format_output(result):
@@ -50,11 +63,29 @@ def format_output(result):
     return "\n".join(output)
 
 
+def run(server, endpoint, payload, local):
+    """
+    Answer from the search server when one is configured, else in-process
+
+    Only an unreachable server (connection refused, timeout) falls back to the local search;
+    an error answered by the server (bad request, internal error) is reported and exits
+    """
+    if server:
+        try:
+            return request_server(server, endpoint, payload)
+        except HTTPError as e:
+            sys.exit(f"Search server error {e.code}: {server_error(e)}")
+        except (URLError, ConnectionError, TimeoutError) as e:
+            print(f"Search server unavailable ({e}), searching locally", file=sys.stderr)
+    return local()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
     parser.add_argument("query", help="Search query")
     parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
-    parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
+    parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS + [ALL_STACKS], help="Stack-specific search (html-tailwind, react, nextjs, ... or 'all')")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size for --stack all (default: single pass in-process)")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
     # Design system generation
@@ -65,19 +96,29 @@ if __name__ == "__main__":
     parser.add_argument("--persist", action="store_true", help="Save design system to design-system/MASTER.md (creates hierarchical structure)")
     parser.add_argument("--page", type=str, default=None, help="Create page-specific override file in design-system/pages/")
     parser.add_argument("--output-dir", "-o", type=str, default=None, help="Output directory for persisted files (default: current directory)")
+    # Client mode
+    parser.add_argument("--server", nargs="?", const=DEFAULT_URL, default=os.environ.get("UIPRO_SEARCH_SERVER"),
+                        help=f"Query a running search server (default: $UIPRO_SEARCH_SERVER or {DEFAULT_URL})")
 
     args = parser.parse_args()
 
     # Design system takes priority
     if args.design_system:
-        result = generate_design_system(
-            args.query, 
-            args.project_name, 
-            args.format,
-            persist=args.persist,
-            page=args.page,
-            output_dir=args.output_dir
-        )
+        # Resolve relative to the client's cwd, not the server's
+        output_dir = os.path.abspath(args.output_dir or os.getcwd())
+        result = run(
+            args.server, "/design_system",
+            {"query": args.query, "project_name": args.project_name, "format": args.format,
+             "persist": args.persist, "page": args.page, "output_dir": output_dir},
+            lambda: {"output": generate_design_system(
+                args.query,
+                args.project_name,
+                args.format,
+                persist=args.persist,
+                page=args.page,
+                output_dir=output_dir
+            )}
+        )["output"]
         print(result)
         
         # Print persistence confirmation
@@ -95,7 +136,11 @@ if __name__ == "__main__":
             print("=" * 60)
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
+        result = run(
+            args.server, "/search_stack",
+            {"query": args.query, "stack": args.stack, "max_results": args.max_results, "workers": args.workers},
+            lambda: search_stack(args.query, args.stack, args.max_results, workers=args.workers)
+        )
         if args.json:
             import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -103,7 +148,11 @@ if __name__ == "__main__":
             print(format_output(result))
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
+        result = run(
+            args.server, "/search",
+            {"query": args.query, "domain": args.domain, "max_results": args.max_results},
+            lambda: search(args.query, args.domain, args.max_results)
+        )
         if args.json:
             import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
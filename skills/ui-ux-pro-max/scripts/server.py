@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Search Server - keeps every BM25 index resident for agents
+Usage: python server.py [--host 127.0.0.1] [--port 8765] [--reload-interval 2]
+
+Endpoints (JSON in, JSON out):
+  GET  /health
+  GET  /stats          design-system cache hit/miss counters
+  POST /search         {"query", "domain", "max_results"}
+  POST /search_stack   {"query", "stack", "max_results", "workers"}  (stack "all" = every stack)
+  POST /design_system  {"query", "project_name", "format", "persist", "page", "output_dir"}
+
+Clients: python search.py "<query>" --server [http://127.0.0.1:8765]
+         (or export UIPRO_SEARCH_SERVER=http://127.0.0.1:8765)
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib import request as urlrequest
+# Allow both `python server.py ...` and `python -m ...` execution.
+try:
+    from core import MAX_RESULTS, refresh_indexes, search, search_stack
+    from design_system import cache_info, generate_design_system
+except ImportError:  # pragma: no cover
+    from .core import MAX_RESULTS, refresh_indexes, search, search_stack
+    from .design_system import cache_info, generate_design_system
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_URL = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
+# Raised for a malformed body or payload (missing field, wrong type): answered 400, anything else 500
+BAD_REQUEST_ERRORS = (KeyError, ValueError, TypeError)
+
+
+# ============ REQUEST HANDLING ============
+def _handle_search(payload):
+    return search(payload["query"], payload.get("domain"), payload.get("max_results", MAX_RESULTS))
+
+
+def _handle_search_stack(payload):
+    return search_stack(payload["query"], payload["stack"], payload.get("max_results", MAX_RESULTS),
+                        workers=payload.get("workers"))
+
+
+def _handle_design_system(payload):
+    output = generate_design_system(
+        payload["query"],
+        payload.get("project_name"),
+        payload.get("format", "ascii"),
+        persist=payload.get("persist", False),
+        page=payload.get("page"),
+        output_dir=payload.get("output_dir")
+    )
+    return {"output": output}
+
+
+ROUTES = {
+    "/search": _handle_search,
+    "/search_stack": _handle_search_stack,
+    "/design_system": _handle_design_system
+}
+
+
+class SearchRequestHandler(BaseHTTPRequestHandler):
+    """Routes JSON POST bodies to the in-process search functions"""
+
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self._send_json(200, {"design_system_cache": cache_info()})
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self):
+        handler = ROUTES.get(self.path)
+        if handler is None:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(payload, dict):
+                raise ValueError("body must be a JSON object")
+            body = handler(payload)
+        except BAD_REQUEST_ERRORS as e:
+            self._send_json(400, {"error": f"Bad request: {e}"})
+            return
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            self._send_json(500, {"error": f"Internal error: {type(e).__name__}: {e}"})
+            return
+        self._send_json(200, body)
+
+    def log_message(self, format, *args):
+        pass  # Keep the daemon quiet; agents read results, not access logs
+
+
+# ============ HOT RELOAD ============
+def _watch_data(interval, stop_event):
+    """Rebuild indexes in the background as soon as a CSV changes on disk"""
+    while not stop_event.wait(interval):
+        for filepath in refresh_indexes():
+            print(f"Reloaded index: {filepath.name}")
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, reload_interval=2.0):
+    """Warm every index, then serve until interrupted"""
+    start = time.perf_counter()
+    loaded = refresh_indexes()
+    print(f"Loaded {len(loaded)} indexes in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    stop_event = threading.Event()
+    if reload_interval > 0:
+        threading.Thread(target=_watch_data, args=(reload_interval, stop_event), daemon=True).start()
+
+    server = ThreadingHTTPServer((host, port), SearchRequestHandler)
+    server.daemon_threads = True
+    print(f"UI Pro Max search server listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        server.server_close()
+
+
+# ============ CLIENT ============
+def request_server(url, endpoint, payload, timeout=10):
+    """POST a request to a running search server and return the decoded JSON"""
+    data = json.dumps(payload).encode("utf-8")
+    req = urlrequest.Request(url.rstrip("/") + endpoint, data=data, headers={"Content-Type": "application/json"})
+    with urlrequest.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read().decode("utf-8"))
+
+
+def server_error(error):
+    """The "error" message of a server's 4xx/5xx JSON answer (urllib HTTPError)"""
+    try:
+        return json.loads(error.read().decode("utf-8"))["error"]
+    except (ValueError, KeyError, TypeError):
+        return error.reason
+
+
+# ============ CLI SUPPORT ============
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max search server")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Bind address (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument("--reload-interval", type=float, default=2.0, help="Seconds between CSV change checks, 0 disables (default: 2)")
+
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.reload_interval)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max columnar storage tests - CSV parsing and compiled-file round trip
+Usage: python -m pytest skills/ui-ux-pro-max/scripts
+"""
+
+import csv
+
+import pytest
+
+# Allow both `pytest` from the scripts folder and from the repository root.
+try:
+    import core
+    from columnar import ColumnarTable
+except ImportError:  # pragma: no cover
+    from . import core
+    from .columnar import ColumnarTable
+
+CSV_TEXT = (
+    'Name,Colors,Notes\n'
+    'Glass,"#FFF, #000","multi-line\nnote"\n'
+    '\n'
+    'Short,#123\n'
+    'Unicode,"蓝色 — ✓",\n'
+    'Glass,"#FFF, #000",repeated values\n'
+)
+
+
+def _dict_rows(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.fixture
+def sample(tmp_path):
+    path = tmp_path / "sample.csv"
+    path.write_text(CSV_TEXT, encoding='utf-8')
+    return path
+
+
+def test_rows_match_dict_reader(sample):
+    """Rows (short rows as None, blank lines skipped) are what csv.DictReader yields"""
+    table = ColumnarTable.from_csv(sample)
+    expected = _dict_rows(sample)
+    assert table.n_rows == len(expected)
+    assert [table.row(idx) for idx in range(table.n_rows)] == expected
+    assert table.column("Notes") == [row["Notes"] for row in expected]
+    assert table.column("Unknown") == []
+    assert table.row(0, ["Notes", "Unknown", "Name"]) == {"Notes": "multi-line\nnote", "Name": "Glass"}
+
+
+def test_compiled_round_trip(sample, tmp_path):
+    """save() + load() (memory-mapped) returns the same header, rows and columns"""
+    table = ColumnarTable.from_csv(sample)
+    path = tmp_path / "sample.col"
+    table.save(path)
+    loaded = ColumnarTable.load(path)
+    assert loaded.header == table.header and loaded.n_rows == table.n_rows
+    assert [loaded.row(idx) for idx in range(loaded.n_rows)] == [table.row(idx) for idx in range(table.n_rows)]
+    for name in table.header:
+        assert loaded.column(name) == table.column(name)
+
+
+def test_load_rejects_foreign_files(tmp_path):
+    path = tmp_path / "bogus.col"
+    path.write_bytes(b"not a table at all")
+    with pytest.raises(ValueError):
+        ColumnarTable.load(path)
+
+
+def test_load_rejects_truncated_or_corrupt_files(sample, tmp_path):
+    """A file whose length does not match its meta raises ValueError, not TypeError/struct.error"""
+    path = tmp_path / "styles.col"
+    ColumnarTable.from_csv(sample).save(path)
+    data = path.read_bytes()
+    meta_len = int.from_bytes(data[8:12], 'little')
+    for broken in [data[:-4], data[:12 + meta_len + 2], data[:10], data + b"\0" * 4,
+                   data[:12] + b"[" + data[13:], b""]:
+        path.write_bytes(broken)
+        with pytest.raises(ValueError):
+            ColumnarTable.load(path)
+
+
+@pytest.mark.parametrize("domain", sorted(core.CSV_CONFIG))
+def test_shipped_corpora_round_trip(domain, tmp_path):
+    """Every bundled CSV survives the columnar round trip unchanged"""
+    source = core.DATA_DIR / core.CSV_CONFIG[domain]["file"]
+    if not source.exists():
+        pytest.skip(f"{source.name} not shipped")
+    path = tmp_path / "corpus.col"
+    ColumnarTable.from_csv(source).save(path)
+    loaded = ColumnarTable.load(path)
+    assert [loaded.row(idx) for idx in range(loaded.n_rows)] == _dict_rows(source)
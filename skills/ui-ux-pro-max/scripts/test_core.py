@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max search engine tests - persisted indexes, BM25 scoring, batched and cross-stack search
+Usage: python -m pytest skills/ui-ux-pro-max/scripts
+"""
+
+import csv
+import os
+
+import pytest
+
+# Allow both `pytest` from the scripts folder and from the repository root.
+try:
+    import core
+except ImportError:  # pragma: no cover
+    from . import core
+
+ROWS = [
+    {"Name": "Glassmorphism", "Keywords": "glass blur frosted transparent", "Description": "Frosted glass panels"},
+    {"Name": "Neumorphism", "Keywords": "soft shadow extruded", "Description": "Soft extruded surfaces"},
+    {"Name": "Brutalism", "Keywords": "raw bold harsh", "Description": "Raw bold layouts with harsh contrast"},
+    {"Name": "Dark Mode", "Keywords": "dark night contrast", "Description": "Dark surfaces with high contrast text"},
+]
+COLS = ["Name", "Keywords"]
+
+
+def _write_csv(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Empty data/ folder with its own .index/, and no indexes held in memory"""
+    monkeypatch.setattr(core, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(core, "INDEX_DIR", tmp_path / ".index")
+    monkeypatch.setattr(core, "_INDEXES", {})
+    return tmp_path
+
+
+def _ranking(index, query):
+    return [(idx, round(score, 9)) for idx, score in index.bm25.score(query)]
+
+
+# ============ PERSISTED INDEX ============
+def test_persisted_index_round_trip(data_dir):
+    """A saved index loads back with identical rankings and rows, without re-tokenizing"""
+    path = data_dir / "styles.csv"
+    _write_csv(path, ROWS)
+    built = core.build_index(path, COLS)
+    assert core._index_path(path).exists() and core._index_path(path, ".col").exists()
+
+    loaded = core._load_index(path, COLS)
+    assert loaded is not None
+    for query in ["glass blur", "dark contrast", "soft bold raw"]:
+        assert _ranking(loaded, query) == _ranking(built, query), query
+    assert loaded.read_rows([0, 3]) == built.read_rows([0, 3])
+    assert core._load_index(path, ["Name"]) is None, "Different search columns must not reuse the index"
+
+
+def test_touched_csv_reuses_index_by_hash(data_dir):
+    """Same content with a new mtime (fresh checkout) keeps the index; edited content drops it"""
+    path = data_dir / "styles.csv"
+    _write_csv(path, ROWS)
+    core.build_index(path, COLS)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert core._load_index(path, COLS) is not None
+
+    _write_csv(path, ROWS[:2])
+    assert core._load_index(path, COLS) is None
+
+
+def test_hash_match_restamps_index(data_dir, monkeypatch):
+    """After a match by hash the new mtime/size are recorded, so the next load does not hash again"""
+    path = data_dir / "styles.csv"
+    _write_csv(path, ROWS)
+    core.build_index(path, COLS)
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    hashed = []
+    signature = core._file_signature
+    monkeypatch.setattr(core, "_file_signature",
+                        lambda filepath, with_hash=False: hashed.append(with_hash) or signature(filepath, with_hash))
+    assert core._load_index(path, COLS) is not None
+    assert core._load_index(path, COLS) is not None
+    assert hashed == [False, True, False]
+
+
+def test_corrupt_columnar_file_drops_index(data_dir):
+    """A truncated .col file makes the persisted index unusable instead of raising"""
+    path = data_dir / "styles.csv"
+    _write_csv(path, ROWS)
+    core.build_index(path, COLS)
+    col_path = core._index_path(path, ".col")
+    col_path.write_bytes(col_path.read_bytes()[:-4])
+    assert core._load_index(path, COLS) is None
+    assert core.get_index(path, COLS).bm25.N == len(ROWS)
+
+
+def test_get_index_picks_up_csv_changes(data_dir):
+    """In-memory indexes are rebuilt once the CSV changes on disk"""
+    path = data_dir / "styles.csv"
+    _write_csv(path, ROWS)
+    first = core.get_index(path, COLS)
+    assert core.get_index(path, COLS) is first
+
+    _write_csv(path, ROWS + [{"Name": "Aurora", "Keywords": "aurora gradient glow", "Description": "Glowing"}])
+    second = core.get_index(path, COLS)
+    assert second is not first and second.bm25.N == len(ROWS) + 1
+    assert second.read_rows([idx for idx, _ in second.bm25.score("aurora")], ["Name"]) == [{"Name": "Aurora"}]
+
+
+# ============ POSTINGS SCORING ============
+class _LegacyBM25(core.BM25):
+    """The original scorer: term frequencies recounted for every document on every query"""
+
+    def score(self, query, top_k=None):
+        query_tokens = self.tokenize(query)
+        scores = []
+        for idx, doc in enumerate(self.corpus):
+            score = 0
+            doc_len = self.doc_lengths[idx]
+            term_freqs = {}
+            for word in doc:
+                term_freqs[word] = term_freqs.get(word, 0) + 1
+            for token in query_tokens:
+                if token in self.idf:
+                    tf = term_freqs.get(token, 0)
+                    numerator = tf * (self.k1 + 1)
+                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
+                    score += self.idf[token] * numerator / denominator
+            scores.append((idx, score))
+        return sorted(scores, key=lambda x: x[1], reverse=True)
+
+
+def test_postings_top_k_matches_full_scan():
+    """Heap top-k over postings returns exactly the old full-scan ranking (ties in document order)"""
+    import random
+
+    rng = random.Random(2)
+    vocabulary = [f"term{i:02d}" for i in range(40)]
+    documents = [" ".join(rng.choices(vocabulary, k=rng.randint(0, 12))) for _ in range(500)]
+    new, old = core.BM25(), _LegacyBM25()
+    new.fit(documents)
+    old.fit(documents)
+
+    for _ in range(200):
+        query = " ".join(rng.choices(vocabulary + ["missing"], k=rng.randint(1, 4)))
+        expected = [(idx, score) for idx, score in old.score(query) if score > 0]
+        assert new.score(query) == expected, query
+        for top_k in (1, 3, 10):
+            assert new.score(query, top_k=top_k) == expected[:top_k], (query, top_k)
+    assert new.score("") == [] and new.score("missing") == []
+
+
+# ============ BATCHED SEARCH ============
+def test_search_many_matches_single_searches():
+    """search_many() answers each query exactly like a separate per-file search, in input order"""
+    queries = [("saas dashboard", None, 2), ("glassmorphism", "style", 3), ("fintech blue", "color", 2),
+               ("glassmorphism", "style", 1), ("heading serif", None, 3), ("anything", "unknown", 2)]
+    responses = core.search_many(queries)
+    assert len(responses) == len(queries)
+    for (query, domain, max_results), response in zip(queries, responses):
+        domain = domain or core.detect_domain(query)
+        config = core.CSV_CONFIG.get(domain, core.CSV_CONFIG["style"])
+        expected = core._search_csv(core.DATA_DIR / config["file"], config["search_cols"],
+                                    config["output_cols"], query, max_results)
+        assert response["domain"] == domain and response["query"] == query
+        assert response["results"] == expected and response["count"] == len(expected), query
+
+
+def test_search_many_reports_missing_files(data_dir):
+    """A missing domain file yields an error entry without failing the rest of the batch"""
+    _write_csv(data_dir / core.CSV_CONFIG["style"]["file"],
+               [{"Style Category": "Glassmorphism", "Keywords": "glass blur"}])
+    style, color = core.search_many([("glass", "style", 3), ("blue", "color", 3)])
+    assert style["count"] == 1 and style["results"][0]["Style Category"] == "Glassmorphism"
+    assert color["domain"] == "color" and "error" in color
+
+
+# ============ CROSS-STACK SEARCH ============
+def test_all_stacks_matches_one_combined_corpus():
+    """search_stack(q, "all") ranks like a single BM25 fitted over every stack's guidelines"""
+    stacks = [stack for stack in core.AVAILABLE_STACKS
+              if (core.DATA_DIR / core.STACK_CONFIG[stack]["file"]).exists()]
+    if len(stacks) < 2:
+        pytest.skip("needs at least two stack files")
+    documents, owners = [], []
+    for stack, index in core._stack_indexes(stacks):
+        documents += core._search_documents(index.table, core._STACK_COLS["search_cols"])
+        owners += [(stack, index, local) for local in range(index.table.n_rows)]
+    combined = core.BM25()
+    combined.fit(documents)
+
+    output_cols = core._STACK_COLS["output_cols"]
+    for query in ["state management hooks", "image optimization lazy loading", "accessibility focus", "xyzzy"]:
+        expected = []
+        for idx, score in combined.score(query, top_k=5):
+            stack, index, local = owners[idx]
+            expected.append(dict({"Stack": stack}, **index.table.row(local, output_cols)))
+        response = core.search_stack(query, core.ALL_STACKS, max_results=5)
+        assert response["results"] == expected, query
+        assert sum(response["stacks"].values()) == response["count"] == len(expected)
+
+
+def test_all_stacks_parallel_matches_merged():
+    """Scoring stacks in a process pool gives the merged index's exact ranking"""
+    for query in ["performance memo rerender", "routing navigation"]:
+        merged = core.search_all_stacks(query, max_results=8)
+        parallel = core.search_all_stacks(query, max_results=8, workers=2)
+        assert parallel["results"] == merged["results"], query
+    assert "error" in core.search_stack("hooks", "cobol")
+    assert "error" in core.search_all_stacks("hooks", stacks=["react", "cobol"])
+
+
+# ============ QUERY TOKENIZATION ============
+def _legacy_tokenize(text):
+    import re
+    text = re.sub(r'[^\w\s]', ' ', str(text).lower())
+    return [w for w in text.split() if len(w) > 2]
+
+
+def _legacy_detect_domain(query):
+    query_lower = query.lower()
+    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in core.DOMAIN_KEYWORDS.items()}
+    best = max(scores, key=scores.get)
+    return best if scores[best] > 0 else "style"
+
+
+def _random_queries(n):
+    import random
+
+    rng = random.Random(9)
+    words = [kw for keywords in core.DOMAIN_KEYWORDS.values() for kw in keywords]
+    words += ["Modern", "SaaS", "e-commerce!", "#1A1A2E", "café", "über-clean", "a", "of", "x_y", "  ", "dashboard/admin"]
+    return ["".join(rng.choice([" ", "", "-", ", "]) + rng.choice(words) for _ in range(rng.randint(0, 6)))
+            for _ in range(n)]
+
+
+def test_tokenize_matches_original():
+    """The single-regex tokenizer yields the original tokens (unicode, punctuation, short words)"""
+    for query in _random_queries(2000) + ["", "ab cd", "Ünïcödé wörds", "tab\tseparated\nlines"]:
+        assert core.tokenize(query) == _legacy_tokenize(query), repr(query)
+        assert core.BM25().tokenize(query) == _legacy_tokenize(query)
+
+
+def test_detect_domain_matches_original():
+    """The Aho-Corasick matcher picks the same domain as counting substring hits per keyword"""
+    for query in _random_queries(2000) + ["", "dark mode", "svg icon set", "input type=email", "server component"]:
+        assert core.detect_domain(query) == _legacy_detect_domain(query), repr(query)
+
+
+def test_keyword_matcher_finds_overlapping_keywords():
+    matcher = core.KeywordMatcher(["he", "she", "his", "hers", "ui", "uix"])
+    found = {matcher.keywords[i] for i in matcher.find("ushers and a uix")}
+    assert found == {kw for kw in matcher.keywords if kw in "ushers and a uix"}
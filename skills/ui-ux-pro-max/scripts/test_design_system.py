@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max design system tests - result cache and reasoning-rule index
+Usage: python -m pytest skills/ui-ux-pro-max/scripts
+"""
+
+import os
+import shutil
+
+import pytest
+
+# Allow both `pytest` from the scripts folder and from the repository root.
+try:
+    import design_system
+except ImportError:  # pragma: no cover
+    from . import design_system
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """A fresh process-wide cache, restored afterwards"""
+    monkeypatch.setattr(design_system, "_cache", design_system.DesignSystemCache())
+    return design_system._cache
+
+
+# ============ RESULT CACHE ============
+def test_lru_evicts_least_recently_used(tmp_path):
+    """Reads refresh recency; entries over maxsize are evicted oldest first and survive a restart"""
+    path = tmp_path / "cache.json"
+    lru = design_system.DesignSystemCache(maxsize=2, path=str(path))
+    lru.put("a", 1)
+    lru.put("b", 2)
+    assert lru.get("a") == 1
+    lru.put("c", 3)
+    assert lru.get("b") is None and lru.get("a") == 1 and lru.get("c") == 3
+    assert lru.info() == {"hits": 3, "misses": 1, "size": 2, "maxsize": 2}
+
+    lru.flush()
+    reloaded = design_system.DesignSystemCache(maxsize=2, path=str(path))
+    assert reloaded.get("a") == 1 and reloaded.get("c") == 3
+
+
+def test_persisted_cache_batches_writes(tmp_path, monkeypatch):
+    """Puts within save_interval share one rewrite of the file; flush() writes pending entries"""
+    path = tmp_path / "cache.json"
+    lru = design_system.DesignSystemCache(maxsize=8, path=str(path), save_interval=60)
+    writes = []
+    save = lru._save
+    monkeypatch.setattr(lru, "_save", lambda: writes.append(len(lru._entries)) or save())
+    for i in range(5):
+        lru.put(str(i), i)
+    assert writes == [] and not path.exists()
+    lru.flush()
+    lru.flush()
+    assert writes == [5]
+    assert design_system.DesignSystemCache(maxsize=8, path=str(path)).get("4") == 4
+
+
+def test_load_skips_malformed_entries(tmp_path):
+    """A damaged cache file keeps its well-formed entries and never raises"""
+    path = tmp_path / "cache.json"
+    path.write_text('[["a", 1], "junk", ["b"], [2, 3], ["c", {"x": 1}], null]', encoding='utf-8')
+    lru = design_system.DesignSystemCache(path=str(path))
+    assert lru.get("a") == 1 and lru.get("c") == {"x": 1} and lru.info()["size"] == 2
+    for content in ['{"a": 1}', '[["a", 1]', '5']:
+        path.write_text(content, encoding='utf-8')
+        assert design_system.DesignSystemCache(path=str(path)).info()["size"] == 0
+
+
+def test_generate_design_system_is_cached(cache):
+    """Repeated queries (any case/spacing) are served from the cache with identical output"""
+    first = design_system.generate_design_system("SaaS dashboard", "Acme")
+    assert cache.info()["misses"] == 2
+    again = design_system.generate_design_system("  saas   DASHBOARD ", "Acme")
+    assert again == first and cache.info()["hits"] == 2
+    markdown = design_system.generate_design_system("SaaS dashboard", "Acme", output_format="markdown")
+    assert markdown != first and cache.info()["hits"] == 3, "The design system is shared across formats"
+
+
+def test_generate_batches_product_with_query_only_domains(monkeypatch):
+    """product, color, landing and typography share one search_many call; only style waits for the category"""
+    calls = []
+    search_many, search = design_system.search_many, design_system.search
+    monkeypatch.setattr(design_system, "search_many", lambda batch: calls.append(("batch", batch)) or search_many(batch))
+    monkeypatch.setattr(design_system, "search",
+                        lambda query, domain, n: calls.append(("search", (query, domain, n))) or search(query, domain, n))
+    result = design_system.DesignSystemGenerator().generate("SaaS dashboard")
+
+    (kind, batch), (single, (style_query, domain, _)) = calls
+    assert kind == "batch" and single == "search" and domain == "style"
+    assert sorted(d for _, d, _ in batch) == ["color", "landing", "product", "typography"]
+    assert result["category"] == search("SaaS dashboard", "product", 1)["results"][0]["Product Type"]
+    priority = design_system.DesignSystemGenerator()._apply_reasoning(result["category"], {})["style_priority"]
+    assert style_query == " ".join(["SaaS dashboard"] + priority[:2])
+
+
+def test_cache_key_changes_when_data_changes(tmp_path, monkeypatch):
+    """Editing any CSV generation reads invalidates cached entries"""
+    for name in os.listdir(design_system.DATA_DIR):
+        if name.endswith(".csv"):
+            shutil.copy(design_system.DATA_DIR / name, tmp_path / name)
+    monkeypatch.setattr(design_system, "DATA_DIR", tmp_path)
+    before = design_system._cache_key("design", "saas dashboard", None)
+    assert design_system._cache_key("design", "saas dashboard", None) == before
+
+    reasoning = tmp_path / design_system.REASONING_FILE
+    stat = reasoning.stat()
+    os.utime(reasoning, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert design_system._cache_key("design", "saas dashboard", None) != before
+
+
+# ============ REASONING INDEX ============
+def _legacy_find(rules, category):
+    """The original three-pass scan of ui-reasoning.csv"""
+    category_lower = category.lower()
+    for rule in rules:
+        if rule.get("UI_Category", "").lower() == category_lower:
+            return rule
+    for rule in rules:
+        ui_cat = rule.get("UI_Category", "").lower()
+        if ui_cat in category_lower or category_lower in ui_cat:
+            return rule
+    for rule in rules:
+        ui_cat = rule.get("UI_Category", "").lower()
+        if any(kw in category_lower for kw in ui_cat.replace("/", " ").replace("-", " ").split()):
+            return rule
+    return {}
+
+
+def test_reasoning_index_matches_linear_scan():
+    """Exact, partial and keyword lookups pick the same rule as the original scan"""
+    generator = design_system.DesignSystemGenerator()
+    rules = generator.reasoning_data
+    assert rules, "ui-reasoning.csv should not be empty"
+    categories = [rule["UI_Category"] for rule in rules]
+    queries = categories + [c.upper() for c in categories] + [c.split()[0] + " platform" for c in categories]
+    queries += ["SaaS", "e-commerce luxury", "dashboard/admin", "fintech crypto app", "zzz unknown", ""]
+    for query in queries:
+        assert generator._find_reasoning_rule(query) == _legacy_find(rules, query), query
+
+
+def test_reasoning_index_is_shared_until_csv_changes(tmp_path, monkeypatch):
+    """Generators share one parsed index; editing the CSV re-parses it"""
+    assert design_system.get_reasoning_index() is design_system.DesignSystemGenerator().reasoning
+    source = design_system.DATA_DIR / design_system.REASONING_FILE
+    copy = tmp_path / design_system.REASONING_FILE
+    shutil.copy(source, copy)
+    monkeypatch.setattr(design_system, "DATA_DIR", tmp_path)
+    first = design_system.get_reasoning_index()
+    assert design_system.get_reasoning_index() is first
+
+    lines = copy.read_text(encoding='utf-8').splitlines(keepends=True)
+    copy.write_text("".join(lines[:2]), encoding='utf-8')
+    second = design_system.get_reasoning_index()
+    assert second is not first and len(second.rules) == 1
+    rule = second.resolved[0]
+    assert isinstance(rule["style_priority"], list) and isinstance(rule["decision_rules"], dict)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max search server tests - JSON endpoints and hot reload of changed CSVs
+Usage: python -m pytest skills/ui-ux-pro-max/scripts
+"""
+
+import csv
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+
+import pytest
+
+# Allow both `pytest` from the scripts folder and from the repository root.
+try:
+    import core
+    import search
+    import server
+except ImportError:  # pragma: no cover
+    from . import core
+    from . import search
+    from . import server
+
+STYLE_HEADER = ["Style Category", "Type", "Keywords", "Best For"]
+
+
+def _write_styles(path, rows):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(STYLE_HEADER)
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def styles(tmp_path, monkeypatch):
+    """A data/ folder holding only styles.csv"""
+    monkeypatch.setattr(core, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(core, "INDEX_DIR", tmp_path / ".index")
+    monkeypatch.setattr(core, "_INDEXES", {})
+    path = tmp_path / core.CSV_CONFIG["style"]["file"]
+    _write_styles(path, [["Glassmorphism", "General", "glass blur frosted", "Dashboards"],
+                         ["Brutalism", "General", "raw bold harsh", "Portfolios"]])
+    return path
+
+
+@pytest.fixture
+def url():
+    """Serve on an ephemeral port for the duration of one test"""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), server.SearchRequestHandler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_search_endpoint_matches_in_process_search(styles, url):
+    """POST /search returns what core.search() returns"""
+    payload = {"query": "frosted glass", "domain": "style", "max_results": 2}
+    response = server.request_server(url, "/search", payload)
+    assert response == core.search("frosted glass", "style", 2)
+    assert response["results"][0]["Style Category"] == "Glassmorphism"
+
+
+def test_bad_requests(url):
+    """Missing fields and non-object bodies answer 400, unknown endpoints 404"""
+    for endpoint, payload, status in [("/search", {}, 400), ("/search", ["query"], 400), ("/nothing", {}, 404)]:
+        with pytest.raises(HTTPError) as error:
+            server.request_server(url, endpoint, payload)
+        assert error.value.code == status
+
+
+def test_handler_failure_answers_500_json(url, monkeypatch):
+    """An unexpected exception in a handler answers 500 with a JSON error body"""
+    def broken(query, domain=None, max_results=None):
+        raise RuntimeError("index corrupted")
+
+    monkeypatch.setattr(server, "search", broken)
+    with pytest.raises(HTTPError) as error:
+        server.request_server(url, "/search", {"query": "glass"})
+    assert error.value.code == 500
+    assert server.server_error(error.value) == "Internal error: RuntimeError: index corrupted"
+
+
+def test_client_falls_back_only_when_unreachable(url, capsys):
+    """The CLI searches locally when the server cannot be reached, but reports errors the server answers"""
+    with pytest.raises(SystemExit) as error:
+        search.run(url, "/search", {}, lambda: pytest.fail("a 400 must not fall back to local search"))
+    assert str(error.value).startswith("Search server error 400: Bad request")
+
+    with ThreadingHTTPServer(("127.0.0.1", 0), server.SearchRequestHandler) as closed:
+        unreachable = f"http://127.0.0.1:{closed.server_address[1]}"
+    assert search.run(unreachable, "/search", {}, lambda: "local") == "local"
+    assert "searching locally" in capsys.readouterr().err
+
+
+def test_hot_reload_picks_up_edited_csv(styles, url):
+    """refresh_indexes() (run by the watcher thread) rebuilds only changed CSVs"""
+    assert core.refresh_indexes() == [styles]
+    assert core.refresh_indexes() == []
+
+    _write_styles(styles, [["Aurora UI", "General", "aurora gradient glow", "Landing pages"]])
+    assert core.refresh_indexes() == [styles]
+    response = server.request_server(url, "/search", {"query": "aurora glow", "domain": "style"})
+    assert [row["Style Category"] for row in response["results"]] == ["Aurora UI"]
@@ -0,0 +1,188 @@
+"""
+Ashare 行情接口测试 - 连接池批量获取, 报文解析, 多证券宽表 (行情接口用本地报文代替, 不访问网络)
+"""
+import json
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Ashare
+
+
+def sina_payload(n, start='2026-01-05', minutes=0):
+    times = pd.bdate_range(start, periods=n) if not minutes else \
+        pd.date_range(f'{start} 09:30', periods=n, freq=f'{minutes}min')
+    fmt = '%Y-%m-%d' if not minutes else '%Y-%m-%d %H:%M:%S'
+    return json.dumps([{'day': t.strftime(fmt), 'open': f'{10 + i:.2f}', 'high': f'{11 + i:.2f}',
+                        'low': f'{9 + i:.2f}', 'close': f'{10.5 + i:.3f}', 'volume': str(1000 * (i + 1)), 'ma_price5': 1}
+                       for i, t in enumerate(times)]).encode()
+
+
+def tx_day_payload(code, n, unit='day', start='2026-01-05'):
+    rows = [[t.strftime('%Y-%m-%d'), f'{10 + i:.2f}', f'{10.5 + i:.2f}', f'{11 + i:.2f}', f'{9 + i:.2f}', f'{1000.0 * (i + 1)}']
+            for i, t in enumerate(pd.bdate_range(start, periods=n))]
+    if rows:
+        rows[-1].append({'nd': '2025', 'fh_sh': '1.5'})              # 分红信息列
+    return json.dumps({'data': {code: {'qfq' + unit: rows}}}).encode()
+
+
+def tx_min_payload(code, n, ts=1, start='2026-01-05'):
+    times = pd.date_range(f'{start} 09:31', periods=n, freq=f'{ts}min')
+    rows = [[t.strftime('%Y%m%d%H%M'), f'{10 + i:.2f}', f'{10.5 + i:.2f}', f'{11 + i:.2f}', f'{9 + i:.2f}',
+             f'{100.0 * (i + 1)}', {}, ''] for i, t in enumerate(times)]
+    qt = [None, None, None, '12.345']
+    return json.dumps({'data': {code: {'m' + str(ts): rows, 'qt': {code: qt}}}}).encode()
+
+
+@pytest.fixture(autouse=True)
+def fresh_router():
+    """每个测试使用新的行情源路由 (熔断状态不互相影响), 不启用本地仓库"""
+    Ashare.configure_sources()
+    Ashare.set_bar_store(None)
+    yield
+    Ashare.configure_sources()
+
+
+# ---------- 连接池 + 批量获取 ----------
+def test_get_prices_bounded_concurrency(monkeypatch):
+    """get_prices 并发请求, 同时在途的请求不超过 max_concurrency; 主源失败转腾讯, 都失败的为 None"""
+    lock, active, peak = threading.Lock(), [0], [0]
+
+    def fake_get(url):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        try:
+            time.sleep(0.02)
+            if 'sz000bad' in url:
+                raise IOError('HTTP 502')
+            if 'sh600002' in url and 'sina' in url:
+                raise IOError('sina down')
+            return tx_day_payload('sh600002', 5) if 'gtimg' in url else sina_payload(5)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    monkeypatch.setattr(Ashare, '_http_get', fake_get)
+    codes = [f'sh6000{i:02d}' for i in range(16)] + ['sz000bad']
+    frames = Ashare.get_prices(codes, count=5, max_concurrency=4)
+    assert list(frames) == codes
+    assert frames['sz000bad'] is None
+    assert all(len(frames[code]) == 5 for code in codes[:-1])
+    assert 1 < peak[0] <= 4, f"Expected 2..4 requests in flight, got {peak[0]}"
+    print("✅ test_get_prices_bounded_concurrency PASSED")
+
+
+def test_session_is_pooled():
+    """所有请求共用一个 keep-alive Session, 连接池大小等于最大并发数"""
+    adapter = Ashare._session.get_adapter(Ashare.SINA_URL)
+    assert adapter._pool_maxsize == Ashare.MAX_CONCURRENCY
+    assert Ashare._executor._max_workers == Ashare.MAX_CONCURRENCY
+    print("✅ test_session_is_pooled PASSED")
+
+
+# ---------- 报文解析 ----------  与原 pandas 逐列转换的结果比较 (新解析的时间索引固定为 ns 精度)
+def ns_index(df):
+    df.index = df.index.as_unit('ns')
+    return df
+
+
+def legacy_sina(content):
+    df = pd.DataFrame(json.loads(content), columns=['day', 'open', 'high', 'low', 'close', 'volume'])
+    df[['open', 'high', 'low', 'close', 'volume']] = df[['open', 'high', 'low', 'close', 'volume']].astype(float)
+    df.day = pd.to_datetime(df.day);   df.set_index(['day'], inplace=True);   df.index.name = ''
+    return ns_index(df)
+
+
+def legacy_tx_day(content, code, unit):
+    stk = json.loads(content)['data'][code]
+    buf = stk['qfq' + unit] if 'qfq' + unit in stk else stk[unit]
+    df = pd.DataFrame([r[:6] for r in buf], columns=['time', 'open', 'close', 'high', 'low', 'volume'])
+    df[['open', 'close', 'high', 'low', 'volume']] = df[['open', 'close', 'high', 'low', 'volume']].astype(float)
+    df.time = pd.to_datetime(df.time);   df.set_index(['time'], inplace=True);   df.index.name = ''
+    return ns_index(df)
+
+
+def legacy_tx_min(content, code, ts):
+    st = json.loads(content)
+    df = pd.DataFrame(st['data'][code]['m' + str(ts)], columns=['time', 'open', 'close', 'high', 'low', 'volume', 'n1', 'n2'])
+    df = df[['time', 'open', 'close', 'high', 'low', 'volume']]
+    df[['open', 'close', 'high', 'low', 'volume']] = df[['open', 'close', 'high', 'low', 'volume']].astype('float')
+    df.time = pd.to_datetime(df.time);   df.set_index(['time'], inplace=True);   df.index.name = ''
+    df.iloc[-1, df.columns.get_loc('close')] = float(st['data'][code]['qt'][code][3])
+    return ns_index(df)
+
+
+@pytest.mark.parametrize('minutes', [0, 15])
+def test_parse_sina_matches_legacy(minutes):
+    """新浪日线/分钟线: 数值, 列顺序, 时间索引与原解析一致"""
+    content = sina_payload(300, minutes=minutes)
+    pd.testing.assert_frame_equal(Ashare._parse_sina(content), legacy_sina(content), check_freq=False)
+    print("✅ test_parse_sina_matches_legacy PASSED")
+
+
+def test_parse_tx_day_matches_legacy():
+    """腾讯日线 (最后一行带分红信息列) 与指数的 day 键"""
+    content = tx_day_payload('sh600519', 300)
+    pd.testing.assert_frame_equal(Ashare._parse_tx_day(content, 'sh600519', 'day'),
+                                  legacy_tx_day(content, 'sh600519', 'day'), check_freq=False)
+    index = json.dumps({'data': {'sh000001': {'day': json.loads(content)['data']['sh600519']['qfqday']}}})
+    pd.testing.assert_frame_equal(Ashare._parse_tx_day(index, 'sh000001', 'day'),
+                                  legacy_tx_day(index, 'sh000001', 'day'), check_freq=False)
+    print("✅ test_parse_tx_day_matches_legacy PASSED")
+
+
+def test_parse_tx_min_matches_legacy():
+    """腾讯分钟线: 跨日的紧凑时间格式, 最后一根的收盘价取实时报价"""
+    content = tx_min_payload('sz000001', 600, ts=5)
+    df = Ashare._parse_tx_min(content, 'sz000001', 5)
+    pd.testing.assert_frame_equal(df, legacy_tx_min(content, 'sz000001', 5), check_freq=False)
+    assert df['close'].iloc[-1] == 12.345
+    assert df.index[-1] > df.index[0] + pd.Timedelta(days=1)
+    print("✅ test_parse_tx_min_matches_legacy PASSED")
+
+
+def test_parse_empty():
+    """空报文返回空表, 列与正常时一致"""
+    assert list(Ashare._parse_sina(b'null').columns) == ['open', 'high', 'low', 'close', 'volume']
+    assert len(Ashare._parse_tx_min(tx_min_payload('sz000001', 0), 'sz000001', 1)) == 0
+    print("✅ test_parse_empty PASSED")
+
+
+# ---------- 多证券宽表 ----------
+def bars(dates, base):
+    index = pd.DatetimeIndex(pd.to_datetime(dates))
+    values = np.arange(len(dates), dtype=float)[:, None] + base + np.arange(5)
+    return pd.DataFrame(values, index=index, columns=Ashare.PANEL_FIELDS)
+
+
+def test_panel_array_alignment():
+    """日历为所有K线时间的并集, 停牌/缺失处为 NaN, 获取失败 (None) 的代码整列 NaN; 结果同 pandas concat 对齐"""
+    frames = {'a': bars(['2026-01-05', '2026-01-06', '2026-01-07'], 10),
+              'b': bars(['2026-01-05', '2026-01-07', '2026-01-08'], 20),
+              'c': None}
+    calendar, data = Ashare._panel_array(frames, ['a', 'b', 'c'])
+    assert list(calendar.strftime('%m-%d')) == ['01-05', '01-06', '01-07', '01-08']
+    assert data.shape == (4, 5, 3)
+    assert np.isnan(data[:, :, 2]).all()
+    assert np.isnan(data[1, :, 1]).all() and np.isnan(data[3, :, 0]).all()
+    expected = pd.concat({code: df for code, df in frames.items() if df is not None}, axis=1)
+    for j, code in enumerate(['a', 'b']):
+        np.testing.assert_array_equal(data[:, :, j], expected[code].to_numpy())
+    print("✅ test_panel_array_alignment PASSED")
+
+
+def test_get_price_panel(monkeypatch):
+    """去重保序, 只保留最近 count 个交易时间, panel['close'] 为 时间×代码"""
+    frames = {'sh600000': bars(pd.bdate_range('2026-01-05', periods=6), 10),
+              'sz000001': bars(pd.bdate_range('2026-01-06', periods=6), 20)}
+    monkeypatch.setattr(Ashare, 'get_prices', lambda codes, **kw: {code: frames.get(code) for code in codes})
+    panel = Ashare.get_price_panel(['sh600000', 'sz000001', 'sh600000', 'sz000bad'], count=4)
+    assert list(panel['close'].columns) == ['sh600000', 'sz000001', 'sz000bad']
+    assert list(panel.index) == list(pd.bdate_range('2026-01-08', periods=4))
+    assert np.isnan(panel['close', 'sh600000'].iloc[-1]) and panel['close', 'sz000001'].iloc[-1] == 20 + 5 + 3
+    assert panel['close', 'sz000bad'].isna().all()
+    print("✅ test_get_price_panel PASSED")
@@ -0,0 +1,98 @@
+"""
+行情源熔断测试 - ashare_health.SourceHealth / SourceRouter
+"""
+import pytest
+
+from ashare_health import CLOSED, HALF_OPEN, OPEN, SourceHealth, SourceRouter, SourceUnavailable
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fail():
+    raise IOError("timeout")
+
+
+def open_breaker(health):
+    for _ in range(health.min_calls):
+        health.record(False, 0.1)
+
+
+def test_breaker_transitions():
+    """连续失败打开 → 冷却后探测半开 → 成功关闭 / 失败重新打开"""
+    clock = FakeClock()
+    health = SourceHealth('sina', min_calls=3, cooldown=10, clock=clock)
+    open_breaker(health)
+    assert health.state == OPEN, f"Expected open, got {health.state}"
+    assert not health.try_acquire()
+    clock.now = 10
+    assert health.try_acquire() and health.state == HALF_OPEN
+    assert not health.try_acquire(), "半开时只放行一次探测"
+    health.record(False, 0.1)
+    assert health.state == OPEN
+    clock.now = 20
+    assert health.try_acquire()
+    health.record(True, 0.1)
+    assert health.state == CLOSED
+    print("✅ test_breaker_transitions PASSED")
+
+
+def test_order_does_not_consume_probe():
+    """选源只查看状态: 冷却结束但本次没有实际请求的源, 下次仍可探测"""
+    clock = FakeClock()
+    router = SourceRouter(['sina', 'tencent'], adaptive=False, min_calls=3, cooldown=10, clock=clock)
+    open_breaker(router.sources['tencent'])
+    clock.now = 10
+    for _ in range(5):
+        assert router.call([('sina', lambda: 'sina'), ('tencent', lambda: 'tx')]) == 'sina'
+    assert router.sources['tencent'].state == OPEN, "没有请求过的源不应进入半开"
+    assert router.call([('tencent', lambda: 'tx')]) == 'tx'
+    assert router.sources['tencent'].state == CLOSED
+    print("✅ test_order_does_not_consume_probe PASSED")
+
+
+def test_unfinished_probe_expires():
+    """探测放行后一直没有结果, 再过一个冷却期放行新的探测"""
+    clock = FakeClock()
+    health = SourceHealth('tencent', min_calls=3, cooldown=10, clock=clock)
+    open_breaker(health)
+    clock.now = 10
+    assert health.try_acquire()
+    assert not health.available()
+    clock.now = 20
+    assert health.available() and health.try_acquire()
+    print("✅ test_unfinished_probe_expires PASSED")
+
+
+def test_router_failover_and_unavailable():
+    """主源失败转备用; 全部熔断时抛出 SourceUnavailable"""
+    clock = FakeClock()
+    router = SourceRouter(['sina', 'tencent'], adaptive=False, min_calls=2, cooldown=10, clock=clock)
+    attempts = [('sina', fail), ('tencent', lambda: 'tx')]
+    assert router.call(attempts) == 'tx'
+    assert router.call(attempts) == 'tx'
+    assert router.sources['sina'].state == OPEN
+    router.sources['tencent'].record(False, 0.1)
+    router.sources['tencent'].record(False, 0.1)
+    with pytest.raises(SourceUnavailable):
+        router.call(attempts)
+    print("✅ test_router_failover_and_unavailable PASSED")
+
+
+def test_routing_keeps_price_basis():
+    """口径不同的源不按耗时互换: 备用源更快也只在主源失败时使用, 不参与对冲; 口径相同的源照常按耗时排序"""
+    router = SourceRouter(['sina', 'tencent'], min_calls=3, explore_every=0)
+    for _ in range(3):
+        router.sources['sina'].record(True, 2.0)
+        router.sources['tencent'].record(True, 0.1)
+    daily = [('sina', lambda: 'bfq', 'bfq'), ('tencent', lambda: 'qfq', 'qfq')]
+    assert router.call(daily) == 'bfq'
+    assert router.call(daily, hedge=True) == 'bfq'
+    assert router.call([('sina', fail, 'bfq'), ('tencent', lambda: 'qfq', 'qfq')]) == 'qfq', "主源失败时故障转移"
+    assert router.call([('sina', lambda: 'sina'), ('tencent', lambda: 'tx')]) == 'tx', "口径相同时快的源在前"
+    print("✅ test_routing_keeps_price_basis PASSED")
@@ -0,0 +1,52 @@
+"""
+港股行情测试 - ashare_hk.get_hk_price 经 Ashare.get_price_via_store 共用本地K线仓库
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import Ashare
+import ashare_hk
+
+
+@pytest.fixture
+def hk_source(monkeypatch):
+    """替换港股行情接口, 记录每次拉取的 (代码, 根数)"""
+    calls = []
+
+    def fake_fetch(xcode, end_date='', count=10, frequency='1d'):
+        calls.append((xcode, count))
+        days = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=count)
+        close = np.arange(count, dtype='float') + 300
+        return pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close, 'volume': close},
+                            index=days)
+
+    monkeypatch.setattr(ashare_hk, '_fetch_hk', fake_fetch)
+    return calls
+
+
+def test_hk_price_without_store(hk_source):
+    """未启用仓库时直接访问行情接口"""
+    Ashare.set_bar_store(None)
+    df = ashare_hk.get_hk_price('00700', count=5)
+    assert len(df) == 5 and hk_source == [('hk00700', 5)]
+    print("✅ test_hk_price_without_store PASSED")
+
+
+def test_hk_price_shares_bar_store(hk_source, tmp_path):
+    """启用仓库后港股K线按 hk 前缀缓存, TTL内第二次不访问网络"""
+    store = Ashare.set_bar_store(str(tmp_path / 'bars.db'))
+    try:
+        first = ashare_hk.get_hk_price('00700', count=5)
+        second = ashare_hk.get_hk_price('00700', count=5)
+    finally:
+        Ashare.set_bar_store(None)
+    assert hk_source == [('hk00700', 5)], f"Expected one fetch, got {hk_source}"
+    assert list(second['close']) == list(first['close'])
+    assert store.stats['hits'] == 1 and len(store.read('hk00700', '1d', 100)) == 5
+    print("✅ test_hk_price_shares_bar_store PASSED")
+
+
+def test_hk_rejects_unknown_frequency():
+    with pytest.raises(ValueError):
+        ashare_hk.get_hk_price('00700', frequency='3d')
@@ -0,0 +1,85 @@
+"""
+本地K线合成测试 - ashare_resample 与 pandas resample/groupby 的结果比较
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from ashare_resample import BASE, base_count, resample_bars
+
+AGG = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+
+def minute_bars(days, seed=0):
+    """每个交易日 09:30 集合竞价 + 09:31-11:30 + 13:01-15:00 共241根1分钟线"""
+    times = []
+    for day in pd.bdate_range('2026-01-05', periods=days):
+        times += [day + pd.Timedelta(hours=9, minutes=30)]
+        times += list(pd.date_range(day + pd.Timedelta(hours=9, minutes=31), periods=120, freq='1min'))
+        times += list(pd.date_range(day + pd.Timedelta(hours=13, minutes=1), periods=120, freq='1min'))
+    return random_bars(pd.DatetimeIndex(times), seed)
+
+
+def random_bars(index, seed):
+    rng = np.random.default_rng(seed)
+    close = 10 + rng.standard_normal(len(index)).cumsum() * 0.01
+    return pd.DataFrame({'open': close + 0.01, 'high': close + 0.02, 'low': close - 0.02, 'close': close,
+                         'volume': rng.integers(100, 1000, len(index)).astype(float)}, index=index)
+
+
+def pandas_intraday(df, ts):
+    """上午/下午分别按右闭区间, 右标签重采样; 09:30 集合竞价并入第一根"""
+    df = df.set_axis(df.index.where(df.index.strftime('%H:%M') != '09:30', df.index + pd.Timedelta(minutes=1)))
+    morning = df[df.index.hour < 12]
+    parts = [morning.resample(f'{ts}min', closed='right', label='right', offset='30min').agg(AGG),
+             df.drop(morning.index).resample(f'{ts}min', closed='right', label='right').agg(AGG)]
+    return pd.concat(parts).dropna(subset=['open']).sort_index()
+
+
+def pandas_period(df, freq):
+    """自然周/月分组, 标签为组内最后一个交易日"""
+    groups = df.groupby(df.index.to_period(freq))
+    out = groups.agg(AGG)
+    out.index = pd.DatetimeIndex(groups.apply(lambda g: g.index[-1]).values)
+    return out
+
+
+@pytest.mark.parametrize('frequency', ['5m', '15m', '30m', '60m'])
+def test_intraday_matches_pandas(frequency):
+    """分钟线合成与 pandas 结果一致, 每天 240/ts 根, 60m 标签为 10:30, 11:30, 14:00, 15:00"""
+    df = minute_bars(3, seed=int(frequency[:-1]))
+    out = resample_bars(df, frequency)
+    expected = pandas_intraday(df, int(frequency[:-1]))
+    pd.testing.assert_frame_equal(out, expected, check_freq=False, check_index_type=False)
+    assert len(out) == 3 * 240 // int(frequency[:-1])
+    if frequency == '60m':
+        assert list(out.index[:4].strftime('%H:%M')) == ['10:30', '11:30', '14:00', '15:00']
+    print("✅ test_intraday_matches_pandas PASSED")
+
+
+@pytest.mark.parametrize('frequency, freq', [('1w', 'W-SUN'), ('1M', 'M')])
+def test_period_matches_pandas(frequency, freq):
+    """周线/月线合成 (含节假日缺口) 与 pandas 分组结果一致"""
+    index = pd.bdate_range('2025-09-01', '2026-03-31')
+    index = index[~((index >= '2025-10-01') & (index <= '2025-10-08'))]
+    df = random_bars(index, seed=7)
+    pd.testing.assert_frame_equal(resample_bars(df, frequency), pandas_period(df, freq),
+                                  check_freq=False, check_index_type=False)
+    print("✅ test_period_matches_pandas PASSED")
+
+
+@pytest.mark.parametrize('frequency, count', [('5m', 10), ('60m', 7), ('60m', 30), ('1w', 8), ('1M', 3)])
+def test_base_count_covers_count(frequency, count):
+    """取最近 base_count 根基础K线合成, 得到的最近 count 根与全量合成的相同 (最早一根也是完整的)"""
+    df = minute_bars(12) if BASE[frequency] == '1m' else random_bars(pd.bdate_range('2024-01-01', periods=400), 3)
+    full = resample_bars(df, frequency)[-count:]
+    tail = resample_bars(df[-base_count(frequency, count):], frequency)[-count:]
+    pd.testing.assert_frame_equal(tail, full)
+    print("✅ test_base_count_covers_count PASSED")
+
+
+def test_rejects_unknown_frequency():
+    with pytest.raises(ValueError):
+        resample_bars(minute_bars(1), '1d')
+    assert resample_bars(minute_bars(1)[:0], '5m').empty
+    print("✅ test_rejects_unknown_frequency PASSED")
@@ -0,0 +1,115 @@
+"""
+本地K线仓库测试 - ashare_store.BarStore (TTL命中, 尾部增量, 长时间停更后的缺口, 历史区间)
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from ashare_store import BarStore
+
+
+class Market:
+    """模拟行情源: 工作日日线, 收盘价为日期序号; limit为单次最多返回的K线数"""
+
+    def __init__(self, limit=None):
+        self.now = datetime(2026, 3, 2, 16, 0)
+        self.limit = limit
+        self.calls = []
+
+    def clock(self):
+        return self.now
+
+    def bars(self, count, end_date=''):
+        days = pd.bdate_range(end=end_date or self.now.date(), periods=count)
+        close = np.array([d.toordinal() for d in days], dtype='float')
+        return pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close, 'volume': close},
+                            index=days)
+
+    def fetch(self, code, end_date, count, frequency):
+        self.calls.append(count)
+        return self.bars(min(count, self.limit or count), end_date)
+
+
+def make_store(tmp_path, market, **options):
+    return BarStore(tmp_path / 'bars.db', clock=market.clock, **options)
+
+
+def test_ttl_hit_and_tail_fetch(tmp_path):
+    """TTL内不访问网络; 过期后只拉尾部"""
+    market = Market()
+    store = make_store(tmp_path, market)
+    store.get('sh600519', '', 20, '1d', market.fetch)
+    market.now += timedelta(minutes=10)
+    store.get('sh600519', '', 20, '1d', market.fetch)
+    assert market.calls == [20], f"Expected one fetch, got {market.calls}"
+    market.now += timedelta(days=1)
+    df = store.get('sh600519', '', 20, '1d', market.fetch)
+    assert market.calls[1] < 20, f"Expected a tail fetch, got {market.calls}"
+    assert list(df['close']) == list(market.bars(20)['close'])
+    assert store.stats['tail_fetches'] == 1
+    print("✅ test_ttl_hit_and_tail_fetch PASSED")
+
+
+def test_long_pause_has_no_gap(tmp_path):
+    """停更时间超过count根: 尾部按需要的根数拉取, 与缓存衔接"""
+    market = Market()
+    store = make_store(tmp_path, market)
+    store.get('sh600519', '', 10, '1d', market.fetch)
+    market.now += timedelta(days=60)
+    store.get('sh600519', '', 10, '1d', market.fetch)
+    cached = store.read('sh600519', '1d', 1000)
+    expected = pd.bdate_range(cached.index[0], market.now.date())
+    assert list(cached.index) == list(expected), "缓存中间出现缺口"
+    print("✅ test_long_pause_has_no_gap PASSED")
+
+
+def test_gap_triggers_full_refetch(tmp_path):
+    """尾部超过单次拉取上限, 或行情源返回的尾部接不上缓存 → 完整拉取, 另起一个区间"""
+    for options, limit in (({'max_fetch': 20}, None), ({}, 15)):
+        market = Market(limit)
+        store = make_store(tmp_path / str(limit), market, **options)
+        store.get('sh600519', '', 10, '1d', market.fetch)
+        market.now += timedelta(days=90)
+        df = store.get('sh600519', '', 10, '1d', market.fetch)
+        assert list(df.index) == list(market.bars(10).index)
+        assert store.stats['full_fetches'] == 2 and store.stats['tail_fetches'] == 0
+        df = store.get('sh600519', '', 15, '1d', market.fetch)
+        assert list(df.index) == list(market.bars(15).index), "不应把停更前的缓存拼进窗口"
+        assert market.calls[-1] == 15
+    print("✅ test_gap_triggers_full_refetch PASSED")
+
+
+def test_history_does_not_refresh_latest(tmp_path):
+    """带结束时间的历史拉取不刷新最新K线的拉取时间: 之后取最新K线不会命中历史K线"""
+    market = Market()
+    store = make_store(tmp_path, market)
+    store.get('sh600519', '2019-06-28', 10, '1d', market.fetch)
+    df = store.get('sh600519', '', 10, '1d', market.fetch)
+    assert list(df.index) == list(market.bars(10).index), "TTL内的历史拉取被当成了最新K线"
+
+    market.now += timedelta(hours=2)                       # 最新K线已过期
+    store.get('sh600519', '2019-05-31', 10, '1d', market.fetch)
+    calls = len(market.calls)
+    df = store.get('sh600519', '', 10, '1d', market.fetch)
+    assert len(market.calls) == calls + 1 and store.stats['tail_fetches'] == 1
+    assert list(df.index) == list(market.bars(10).index)
+    print("✅ test_history_does_not_refresh_latest PASSED")
+
+
+def test_end_date_read_stays_in_one_range(tmp_path):
+    """缓存中有 2019 和 2026 两段不相连的K线: 带结束时间的读取不把两段拼成一个窗口"""
+    market = Market()
+    store = make_store(tmp_path, market)
+    store.get('sh600519', '2019-06-28', 30, '1d', market.fetch)
+    store.get('sh600519', '', 10, '1d', market.fetch)
+    calls = len(market.calls)
+    df = store.get('sh600519', '2026-02-27', 20, '1d', market.fetch)
+    assert len(market.calls) == calls + 1, "两段缓存合起来够20根, 但中间不连续, 应拉取"
+    assert list(df.index) == list(market.bars(20, '2026-02-27').index)
+
+    hits = store.stats['hits']
+    df = store.get('sh600519', '2019-06-21', 20, '1d', market.fetch)     # 在2019那一段内, 命中
+    assert store.stats['hits'] == hits + 1
+    assert list(df.index) == list(market.bars(20, '2019-06-21').index)
+    print("✅ test_end_date_read_stays_in_one_range PASSED")
@@ -0,0 +1,87 @@
+"""
+财经分析工具测试 - 并发采集 (gather / collect / daily_report), 行情接口用本地K线代替
+"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from financial_analyzer import HK_CONNECT, HOT_SECTORS, INDICES, FinancialAnalyzer
+
+
+def fake_bars(code, days=10):
+    close = 10 + np.arange(days, dtype=float) + sum(map(ord, code)) % 7
+    return pd.DataFrame({'open': close - 0.1, 'high': close + 0.2, 'low': close - 0.2, 'close': close,
+                         'volume': np.full(days, 1000.0)}, index=pd.bdate_range('2026-01-05', periods=days))
+
+
+class SlowFeed:
+    """每次请求耗时 delay 秒, 记录同时在途的请求数"""
+
+    def __init__(self, delay=0.05, fail=()):
+        self.delay, self.fail = delay, set(fail)
+        self.lock = threading.Lock()
+        self.active = self.peak = 0
+        self.calls = []
+
+    def __call__(self, code, days=10):
+        with self.lock:
+            self.calls.append(code)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            return None if code in self.fail else fake_bars(code, days)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def test_gather_timeout_and_failure():
+    """gather: 结果按key返回, 抛异常的为 None, 超过 fetch_timeout 的不再等待"""
+    analyzer = FinancialAnalyzer(max_workers=4, fetch_timeout=0.2)
+
+    def boom():
+        raise IOError('HTTP 502')
+
+    start = time.perf_counter()
+    results = analyzer.gather({'ok': lambda: 1, 'boom': boom, 'slow': lambda: time.sleep(1) or 'late'})
+    assert results == {'ok': 1, 'boom': None, 'slow': None}
+    assert time.perf_counter() - start < 0.8, "gather waited for the timed-out call"
+    print("✅ test_gather_timeout_and_failure PASSED")
+
+
+def test_collect_fetches_report_codes_concurrently(monkeypatch):
+    """collect 一次并发获取指数, 板块股和港股通, 总耗时接近单次请求而非逐个累加"""
+    feed = SlowFeed(delay=0.1)
+    analyzer = FinancialAnalyzer(max_workers=16)
+    monkeypatch.setattr(analyzer, 'get_a_stock', feed)
+    monkeypatch.setattr(analyzer, 'get_hk_stock', feed)
+    start = time.perf_counter()
+    data = analyzer.collect()
+    elapsed = time.perf_counter() - start
+
+    a_codes = set(INDICES.values()) | {code for sector in HOT_SECTORS.values() for code in sector.values()}
+    assert set(data['a']) == a_codes and set(data['hk']) == set(HK_CONNECT.values())
+    assert sorted(feed.calls) == sorted(a_codes | set(HK_CONNECT.values()))
+    assert feed.peak > 4, f"Expected concurrent fetches, peak was {feed.peak}"
+    assert elapsed < 0.1 * len(feed.calls) / 2, f"collect took {elapsed:.2f}s"
+    print("✅ test_collect_fetches_report_codes_concurrently PASSED")
+
+
+def test_daily_report_uses_collected_data(monkeypatch):
+    """日报各项只用 collect() 的数据, 不再现场请求; 获取失败的证券不出现在结果中"""
+    feed = SlowFeed(delay=0.0, fail={'sh600547', '03690'})
+    analyzer = FinancialAnalyzer()
+    monkeypatch.setattr(analyzer, 'get_a_stock', feed)
+    monkeypatch.setattr(analyzer, 'get_hk_stock', feed)
+    monkeypatch.setattr(analyzer, 'get_a_panel', lambda *a, **kw: (_ for _ in ()).throw(AssertionError('refetch')))
+    timings = analyzer.daily_report()
+    assert list(timings) == ['collect', 'analyze_index', 'scan_hot_sectors', 'scan_hk_connect', 'recommendations']
+    assert len(feed.calls) == len(set(feed.calls)), "a code was fetched twice"
+    assert set(analyzer.results['index'].index) == set(INDICES.values())
+    assert 'sh600547' not in analyzer.results['hot_sectors'].index
+    assert 'sh601899' in analyzer.results['hot_sectors'].index
+    assert '03690' not in analyzer.results['hk_connect'].index
+    print("✅ test_daily_report_uses_collected_data PASSED")
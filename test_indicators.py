@@ -0,0 +1,98 @@
+"""
+技术指标引擎测试 - Indicators 与逐列 pandas 实现 / 原 analyze_trend 的结果比较
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from financial_analyzer import FinancialAnalyzer
+from indicators import FIELDS, Indicators, _pandas_snapshot, _synthetic_panel, make_panel, normalize_ohlcv
+
+
+def legacy_analyze_trend(df, stock_name):
+    """原 FinancialAnalyzer.analyze_trend (逐只证券, 兼容中文列名)"""
+    if df is None or len(df) < 3:
+        return None
+    latest, prev = df.iloc[-1], df.iloc[-2]
+    close = latest['close'] if 'close' in df.columns else latest['收盘']
+    prev_close = prev['close'] if 'close' in df.columns else prev['收盘']
+    change_pct = ((close - prev_close) / prev_close) * 100
+    five_days_ago = df.iloc[-5]['close'] if 'close' in df.columns else df.iloc[-5]['收盘']
+    five_day_pct = ((close - five_days_ago) / five_days_ago) * 100
+    trend = "🔺 上涨" if change_pct > 0 else "🔻 下跌"
+    return {
+        'name': stock_name,
+        'price': f"{close:.2f}",
+        'change': f"{trend} {change_pct:+.2f}%",
+        '5day_change': f"{five_day_pct:+.2f}%",
+        'volume': f"{latest['volume']:,.0f}" if 'volume' in df.columns else f"{latest['成交量']:,.0f}"
+    }
+
+
+def test_snapshot_matches_pandas():
+    """全部指标与逐列 pandas 实现一致 (含约1%停牌的K线)"""
+    panel = _synthetic_panel(60, 120, seed=3)
+    snapshot = Indicators(panel).snapshot()
+    reference = _pandas_snapshot(panel)
+    for col in reference.columns:
+        np.testing.assert_allclose(snapshot[col], reference[col], rtol=1e-6, atol=1e-9, err_msg=col)
+    np.testing.assert_allclose(snapshot['ma5'], [panel['close'][code].rolling(5).mean().loc[
+        panel['close'][code].last_valid_index()] for code in snapshot.index], rtol=1e-9)
+    print("✅ test_snapshot_matches_pandas PASSED")
+
+
+def test_suspended_symbol_uses_last_bar():
+    """停牌的证券取停牌前最后一根; 涨跌幅跨过停牌与上一个交易日比较"""
+    index = pd.bdate_range('2026-01-05', periods=6)
+    a = pd.DataFrame({f: np.arange(10.0, 16.0) for f in FIELDS}, index=index)
+    b = a.drop(index[[2, 5]])                   # 第3天和最后一天停牌
+    snapshot = Indicators(make_panel({'a': a, 'b': b})).snapshot()
+    assert snapshot.at['b', 'close'] == 14.0
+    assert snapshot.at['b', 'change_pct'] == pytest.approx((14 / 13 - 1) * 100)
+    assert snapshot.at['a', 'change_5d_pct'] == pytest.approx((15 / 11 - 1) * 100)
+    print("✅ test_suspended_symbol_uses_last_bar PASSED")
+
+
+def test_change_counts_own_bars_across_suspension():
+    """停牌的证券的5日涨跌幅也跨越它自己的5根K线, 不是日历上的5行"""
+    index = pd.bdate_range('2026-01-05', periods=10)
+    a = pd.DataFrame({f: np.arange(10.0, 20.0) for f in FIELDS}, index=index)
+    b = a.drop(index[[4, 5, 6]])                # 中间停牌3天: 10 11 12 13 17 18 19
+    indicators = Indicators(make_panel({'a': a, 'b': b}))
+    snapshot = indicators.snapshot()
+    assert snapshot.at['a', 'change_5d_pct'] == pytest.approx((19 / 15 - 1) * 100)
+    assert snapshot.at['b', 'change_5d_pct'] == pytest.approx((19 / 12 - 1) * 100)
+    change = indicators.change(4)['b']
+    assert change.loc[index[7]] == pytest.approx(17 / 10 - 1) and change.loc[index[[4, 5, 6]]].isna().all()
+    assert change.loc[index[:7]].isna().all(), "前4根有效K线之前没有可比较的K线"
+    print("✅ test_change_counts_own_bars_across_suspension PASSED")
+
+
+@pytest.mark.parametrize('chinese', [False, True])
+def test_analyze_trend_matches_legacy(chinese):
+    """analyze_trend 的展示结果与原实现逐字一致 (Ashare 英文列 / AKShare 中文列)"""
+    rng = np.random.default_rng(1)
+    analyzer = FinancialAnalyzer()
+    for days in [3, 5, 10, 30]:
+        close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+        df = pd.DataFrame({'open': close, 'close': close, 'high': close * 1.01, 'low': close * 0.99,
+                           'volume': rng.uniform(1e5, 1e7, days)}, index=pd.bdate_range('2026-01-05', periods=days))
+        if chinese:
+            df = df.rename(columns={'open': '开盘', 'close': '收盘', 'high': '最高', 'low': '最低', 'volume': '成交量'})
+        if days < 5:                            # 原实现取 iloc[-5] 会越界
+            continue
+        assert analyzer.analyze_trend(df, 'x') == legacy_analyze_trend(df, 'x')
+    assert analyzer.analyze_trend(df.iloc[:2], 'x') is None and analyzer.analyze_trend(None, 'x') is None
+    print("✅ test_analyze_trend_matches_legacy PASSED")
+
+
+def test_normalize_ohlcv():
+    """中文列名, 字符串日期, 降序 → 标准格式; 缺字段报错"""
+    df = pd.DataFrame({'收盘': [2, 1], '开盘': [2, 1], '最高': [2, 1], '最低': [2, 1], '成交量': [20, 10]},
+                      index=['2026-01-06', '2026-01-05'])
+    out = normalize_ohlcv(df)
+    assert list(out.columns) == FIELDS and out.index.is_monotonic_increasing
+    assert out['close'].tolist() == [1.0, 2.0]
+    with pytest.raises(ValueError):
+        normalize_ohlcv(df.drop(columns=['成交量']))
+    print("✅ test_normalize_ohlcv PASSED")
@@ -0,0 +1,101 @@
+"""
+日报流水线测试 - 交易时段计数, 快照读写, 增量采集与完整拉取的结果比较
+"""
+import json
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from financial_analyzer import FinancialAnalyzer
+from report_pipeline import ReportPipeline, _SyntheticMarket, new_sessions
+from screener import Screener
+
+
+@pytest.mark.parametrize('fetched_at, now, market, expected', [
+    ('2026-01-27 17:00', '2026-01-27 20:00', 'a', 0),       # 收盘后重跑
+    ('2026-01-27 17:00', '2026-01-28 09:00', 'a', 0),       # 次日开盘前
+    ('2026-01-27 17:00', '2026-01-28 17:00', 'a', 1),
+    ('2026-01-30 17:00', '2026-02-02 17:00', 'a', 1),       # 跨周末 (周五 → 周一)
+    ('2026-01-27 10:00', '2026-01-27 17:00', 'a', 1),       # 盘中拉取的一根未收盘
+    ('2026-01-27 15:30', '2026-01-27 17:00', 'hk', 1),      # 港股 16:10 收盘
+    ('2026-01-23 17:00', '2026-01-30 17:00', 'a', 5),
+])
+def test_new_sessions(fetched_at, now, market, expected):
+    assert new_sessions(datetime.fromisoformat(fetched_at), datetime.fromisoformat(now), market) == expected
+    print("✅ test_new_sessions PASSED")
+
+
+def make_pipeline(folder, n_symbols=12, history=30):
+    now = [datetime(2026, 1, 27, 17, 0)]
+    clock = lambda: now[0]
+    universe = pd.DataFrame({'name': [f"股票{i}" for i in range(n_symbols)],
+                             'sector': [f"板块{i % 3}" for i in range(n_symbols)], 'market': 'a', 'index': ''},
+                            index=pd.Index([f"sh{600000 + i}" for i in range(n_symbols)], name='code'))
+    analyzer = FinancialAnalyzer(universe=universe, screener=Screener(rank="change_5d_pct", top_n=2))
+    market = _SyntheticMarket(clock, latency=0)
+    analyzer.get_a_stock = analyzer.get_hk_stock = market
+    return ReportPipeline(analyzer, folder, history=history, clock=clock), market, now
+
+
+def test_snapshot_round_trip(tmp_path):
+    """快照写入后读回: K线数值, 时间索引和拉取时间都不变"""
+    pipeline, market, now = make_pipeline(str(tmp_path))
+    folder = pipeline.run(echo=False)
+    assert os.path.basename(folder) == '2026-01-27'
+    data, fetched = pipeline.update({'a': {}, 'hk': {}}, {})
+    loaded, loaded_fetched = ReportPipeline.load(folder)
+    assert set(loaded['a']) == set(data['a'])
+    for code, df in data['a'].items():
+        pd.testing.assert_frame_equal(loaded['a'][code], df, check_freq=False, check_index_type=False, check_names=False)
+    assert loaded_fetched == fetched
+    report = json.load(open(os.path.join(folder, 'report.json'), encoding='utf-8'))
+    assert report['fetch']['full'] == len(data['a']) and report['previous_snapshot'] is None
+    assert {'index', 'hot_sectors', 'hk_connect'} <= set(report['results'])
+    print("✅ test_snapshot_round_trip PASSED")
+
+
+def test_delta_runs_match_full_fetch(tmp_path):
+    """重跑沿用快照不请求; 次日/周末后只拉取尾部, 合并结果与从头完整拉取一致"""
+    pipeline, market, now = make_pipeline(str(tmp_path))
+    pipeline.run(echo=False)
+    n_codes = pipeline.stats['full']
+
+    now[0] += timedelta(hours=1)
+    requests = market.requests
+    pipeline.run(echo=False)
+    assert market.requests == requests and pipeline.stats['reused'] == n_codes
+
+    for hours in [23, 96]:                                  # 周二 → 周三, 周三 → 周日 (跨周末)
+        now[0] += timedelta(hours=hours)
+        bars = market.bars
+        pipeline.run(echo=False)
+        expected = new_sessions(now[0] - timedelta(hours=hours), now[0], 'a')
+        assert pipeline.stats['delta'] == n_codes
+        assert market.bars - bars == n_codes * (expected + 1)
+
+    data, _ = ReportPipeline.load(pipeline.latest_snapshot())
+    for code, df in data['a'].items():
+        fresh = market(code, days=pipeline.history)
+        np.testing.assert_allclose(df.to_numpy(), fresh.to_numpy())
+        assert list(df.index) == list(fresh.index)
+    print("✅ test_delta_runs_match_full_fetch PASSED")
+
+
+def test_failed_fetch_keeps_snapshot(tmp_path):
+    """拉取失败的证券沿用快照且保留上次的拉取时间, 下次重试"""
+    pipeline, market, now = make_pipeline(str(tmp_path))
+    pipeline.run(echo=False)
+    before, before_fetched = ReportPipeline.load(pipeline.latest_snapshot())
+
+    now[0] += timedelta(days=1)
+    pipeline.analyzer.get_a_stock = lambda code, days=10: None if code == 'sh600001' else market(code, days)
+    pipeline.run(echo=False)
+    assert pipeline.stats['failed'] == 1
+    after, after_fetched = ReportPipeline.load(pipeline.latest_snapshot())
+    pd.testing.assert_frame_equal(after['a']['sh600001'], before['a']['sh600001'])
+    assert after_fetched['a', 'sh600001'] == before_fetched['a', 'sh600001']
+    assert after_fetched['a', 'sh600002'] == now[0]
+    print("✅ test_failed_fetch_keeps_snapshot PASSED")
@@ -0,0 +1,83 @@
+"""
+选股器测试 - 证券池读取, 分块筛选与一次全量排序的结果比较
+"""
+import pandas as pd
+import pytest
+
+from indicators import Indicators, make_panel
+from screener import Screener, _synthetic_fetch, load_universe, universe_from_sectors
+
+
+def make_universe(n, sectors=4):
+    return pd.DataFrame({'name': [f"股票{i}" for i in range(n)], 'sector': [f"板块{i % sectors}" for i in range(n)],
+                         'market': 'a', 'index': ''},
+                        index=pd.Index([f"sh{600000 + i}" for i in range(n)], name='code'))
+
+
+def brute_force(universe, fetch, filter, rank, top_n):
+    """全量指标表 → 筛选 → 每个板块按分数排序取前N (参考实现)"""
+    frames = fetch(list(universe.index))
+    table = universe[['name', 'sector']].join(Indicators(make_panel(frames)).snapshot())
+    table = table[table.eval(filter)]
+    table['score'] = table.eval(rank)
+    sectors = table['sector'].unique()                 # 板块按证券池中首次出现的顺序
+    table = table.sort_values('score', ascending=False, kind='stable')
+    return pd.concat([table[table['sector'] == sector].head(top_n) for sector in sectors])
+
+
+@pytest.mark.parametrize('chunk_size', [7, 50, 1000])
+def test_chunked_top_n_matches_brute_force(chunk_size):
+    """任意分块大小, 各板块前N名都与全量排序的结果相同"""
+    universe, fetch = make_universe(200), _synthetic_fetch()
+    options = dict(filter="rsi14 < 80 and close > ma20", rank="change_5d_pct + volume_z20", top_n=5)
+    result = Screener(chunk_size=chunk_size, **options).run(universe, fetch)
+    expected = brute_force(universe, fetch, **options)
+    assert list(result.index) == list(expected.index)
+    pd.testing.assert_series_equal(result['score'], expected['score'], check_names=False)
+    assert result.groupby('sector').size().max() <= 5
+    print("✅ test_chunked_top_n_matches_brute_force PASSED")
+
+
+def test_stream_fetches_chunk_by_chunk():
+    """stream 逐块获取, 每块只请求本块代码; 获取失败或K线不足的证券跳过; 无 rank 时保持证券池顺序"""
+    universe, fetch = make_universe(25), _synthetic_fetch()
+    requested = []
+
+    def failing_fetch(codes):
+        requested.append(codes)
+        frames = fetch(codes)
+        if 'sh600003' in frames:
+            frames['sh600003'] = None
+            frames['sh600004'] = frames['sh600004'].iloc[:2]
+        return frames
+
+    screener = Screener(chunk_size=10)
+    chunks = list(screener.stream(universe, failing_fetch))
+    assert [len(codes) for codes in requested] == [10, 10, 5]
+    assert sum(len(table) for table in chunks) == 23
+    result = screener.result()
+    expected = [code for sector in ['板块0', '板块1', '板块2', '板块3'] for code in universe.index
+                if universe.at[code, 'sector'] == sector and code not in ('sh600003', 'sh600004')]
+    assert list(result.index) == expected
+    print("✅ test_stream_fetches_chunk_by_chunk PASSED")
+
+
+def test_load_universe(tmp_path):
+    """CSV 缺省 market/index 列; 按板块, 指数 (| 分隔), 市场过滤"""
+    path = tmp_path / 'universe.csv'
+    path.write_text("code,name,sector,market,index\n"
+                    "sh601899,紫金矿业,有色金属,a,沪深300|上证50\n"
+                    "sh600547,山东黄金,有色金属,,沪深300\n"
+                    "00700,腾讯控股,港股通,hk,\n", encoding='utf-8')
+    universe = load_universe(path)
+    assert list(universe.columns) == ['name', 'sector', 'market', 'index']
+    assert universe.at['sh600547', 'market'] == 'a'
+    assert list(load_universe(path, index='上证50').index) == ['sh601899']
+    assert list(load_universe(path, market='hk').index) == ['00700']
+    assert list(load_universe(path, sectors=['有色金属']).index) == ['sh601899', 'sh600547']
+
+    plain = tmp_path / 'plain.csv'
+    plain.write_text("code,name,sector\nsh601899,紫金矿业,有色金属\n", encoding='utf-8')
+    assert load_universe(plain).loc['sh601899'].tolist() == ['紫金矿业', '有色金属', 'a', '']
+    assert universe_from_sectors({'港股通': {'腾讯控股': '00700'}}, market='hk').loc['00700', 'market'] == 'hk'
+    print("✅ test_load_universe PASSED")